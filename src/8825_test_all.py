@@ -1,4 +1,3 @@
-import time
 from distributor import Distributor
 import atexit
 import RPi.GPIO as GPIO
@@ -20,10 +19,11 @@ def move_motors(dist, motors, direction):
     for motor in motors:
         dist.set_dir(motor, direction)
     print(f"Moving {ROTATIONS} rotations {'forward' if direction else 'backward'}...")
-    for _ in range(TOTAL_STEPS):
-        for motor in motors:
-            dist.step(motor)
-        time.sleep(STEP_INTERVAL_SEC)
+    # All motors step together from one precomputed frame sequence.
+    wave = dist.build_waveform(
+        {motor: (TOTAL_STEPS, 1 / STEP_INTERVAL_SEC) for motor in motors}
+    )
+    dist.play(wave)
 
 def main():
 	dist = Distributor()
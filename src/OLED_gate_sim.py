@@ -4,6 +4,8 @@ import busio
 import adafruit_ssd1306
 from PIL import Image, ImageDraw, ImageFont
 
+from gate_position import load_positions
+
 # OLED setup
 i2c = busio.I2C(board.SCL, board.SDA)
 WIDTH, HEIGHT = 128, 64
@@ -21,9 +23,13 @@ pressure_data = [HEIGHT // 2] * WIDTH
 pressure = 0.0
 timestep = 0
 
-# Gate position data
+# Gate position data: the real counted position from gate_controller's
+# state file when there is one, else a simulated sweep
+POSITIONS_PATH = "gate_positions.json"
+GATE_MOTOR = 1
 gate_steps = 0
 gate_max_steps = 200
+gate_label = "sim"
 
 # Mode toggle
 mode = 0  # 0 = Pressure, 1 = Gate
@@ -49,6 +55,26 @@ def simulate_gate():
     if gate_steps > gate_max_steps:
         gate_steps = 0
 
+def update_gate():
+    """Read GATE_MOTOR's position; fall back to the simulation."""
+    global gate_steps, gate_max_steps, gate_label
+    try:
+        pos = load_positions(POSITIONS_PATH).get(GATE_MOTOR)
+    except (OSError, ValueError, TypeError):
+        pos = None
+    if pos is None:
+        gate_label = "sim"
+        simulate_gate()
+        return
+    gate_label = "moving" if pos.moving else f"gate {GATE_MOTOR}"
+    if pos.fraction_open is None:
+        gate_label += " ?"     # not referenced to a limit yet
+        gate_steps = 0
+        gate_max_steps = 1
+    else:
+        gate_steps = pos.steps
+        gate_max_steps = pos.travel
+
 def map_pressure_to_y(p):
     return int((1.0 - (p / 100.0)) * (HEIGHT - 1))
 
@@ -73,10 +99,12 @@ def draw_gate_position():
     draw = ImageDraw.Draw(image)
 
     # Calculate bar height
-    bar_h = int((gate_steps / gate_max_steps) * 40)
+    fraction = min(max(gate_steps / gate_max_steps, 0.0), 1.0)
+    bar_h = int(fraction * 40)
     bar_y = 20 + (40 - bar_h)
 
     draw.text((0, 0), "Gate Position", font=font, fill=255)
+    draw.text((0, 12), gate_label, font=font, fill=255)
     draw.rectangle((100, 0, 127, 15), outline=255)
     draw.text((102, 2), f"{gate_steps}", font=font, fill=255)
 
@@ -99,7 +127,7 @@ while True:
         update_pressure_buffer(y)
         draw_pressure_plot()
     else:
-        simulate_gate()
+        update_gate()
         draw_gate_position()
 
     time.sleep(0.1)
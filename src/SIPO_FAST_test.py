@@ -1,4 +1,5 @@
 import spidev
+import sys
 import time
 import atexit
 
@@ -9,21 +10,15 @@ spi = spidev.SpiDev()
 spi.open(0, 0)  # bus 0, device 0
 spi.max_speed_hz = 1000000
 
-# GPIO latch pin (595 RCLK)
-import RPi.GPIO as GPIO
+# 595 RCLK latch; strategy from the command line (see latch.py):
+#   python3 SIPO_FAST_test.py [rpigpio|gpiod|gpiomem]
+from latch import make_latch
 
-atexit.register(GPIO.cleanup)
 LATCH_PIN = 25
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(LATCH_PIN, GPIO.OUT)
-GPIO.output(LATCH_PIN, 0)
-
-def latch():
-    GPIO.output(LATCH_PIN, 0)
-    time.sleep(0.000001)
-    GPIO.output(LATCH_PIN, 1)
-    time.sleep(0.000001)
-    GPIO.output(LATCH_PIN, 0)
+_latch = make_latch(sys.argv[1] if len(sys.argv) > 1 else "rpigpio",
+                    LATCH_PIN)
+atexit.register(_latch.close)
+latch = _latch.pulse
 
 try:
     while True:
@@ -35,4 +30,4 @@ try:
 except KeyboardInterrupt:
     spi.xfer2([0, 0])
     latch()
-    GPIO.cleanup()
+    print(_latch.jitter.summary())
@@ -0,0 +1,226 @@
+# adc_scheduler.py
+# Round-robin sampling of all four ADS1115 channels at per-channel rates.
+#
+# One thread owns the ADS1115 and spends every conversion slot (1/860 s at
+# the top data rate) on exactly one channel. Each channel asks for its own
+# sample rate (table saw fast, spare input slow); slots are handed out by
+# stride scheduling: the channel whose next sample is most overdue wins,
+# so every channel gets its rate as long as the rates add up to less than
+# the data rate, which is checked up front.
+#
+# - Continuous mode: a mux switch is one config write and restarts the
+#   conversion, so a slot costs one conversion period whether or not the
+#   channel changed. Back-to-back slots on the same channel skip the
+#   write.
+# - Per channel: a RingBuffer of (t, volts) samples for the last
+#   history_s, and ads_sampler.WindowStats (RMS/peak) per window_s
+#   published to listeners. Sample listeners see every raw sample.
+# - Works with any ads_sampler backend (Ads1115Backend, SyntheticAdc).
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from ads_sampler import DATA_RATE, WINDOW_S, WindowStats, window_stats
+from ring_buffer import RingBuffer
+
+HISTORY_S = 10.0             # seconds of raw samples kept per channel
+MAX_LOAD = 0.95              # share of conversion slots that may be booked
+
+
+class ChannelConfig(NamedTuple):
+    channel: int             # ADS1115 input, AINx vs GND
+    name: str                # machine, e.g. "tablesaw"
+    rate_hz: float           # samples/s wanted
+
+
+# Table saw, lathe, drill press and a slow spare input
+MACHINES = (
+    ChannelConfig(0, "tablesaw", 400.0),
+    ChannelConfig(1, "lathe", 160.0),
+    ChannelConfig(2, "drill press", 160.0),
+    ChannelConfig(3, "spare", 20.0),
+)
+
+Listener = Callable[[str, WindowStats], None]
+SampleListener = Callable[[str, float, float], None]
+
+
+class AdcChannel:
+    """Per-channel schedule state and sample buffers."""
+
+    def __init__(self, config: ChannelConfig, data_rate: int,
+                 window_s: float, history_s: float):
+        self.config = config
+        self.name = config.name
+        self.channel = config.channel
+        self.stride = data_rate / config.rate_hz   # slots per sample
+        self.due = 0.0                             # slot of next sample
+        self.window = max(1, round(config.rate_hz * window_s))
+        self._win = np.empty(self.window)
+        self._fill = 0
+        self.buffer = RingBuffer(max(1, round(config.rate_hz * history_s)))
+        self.latest: Optional[WindowStats] = None
+        self.samples = 0
+        self.max_gap = 0         # longest wait past due, in slots
+
+    def add(self, t: float, volts: float) -> Optional[WindowStats]:
+        """Store one sample; return WindowStats when a window fills."""
+        self.samples += 1
+        self.buffer.append(t, (volts,))
+        self._win[self._fill] = volts
+        self._fill += 1
+        if self._fill < self.window:
+            return None
+        self._fill = 0
+        self.latest = window_stats(t, self.channel, self._win)
+        return self.latest
+
+
+class AdcScheduler:
+    """Owns one ADS1115 and samples its channels round-robin.
+
+    :param backend: ads_sampler backend (configure/wait_ready/read_volts).
+    :param channels: ChannelConfig per sampled input.
+    :param data_rate: ADS1115 conversions/s (total over all channels).
+    :param window_s: RMS window per channel.
+    :param history_s: Raw samples kept per channel.
+    :raises ValueError: If the requested rates do not fit the data rate.
+    """
+
+    def __init__(self, backend, channels: Sequence[ChannelConfig] = MACHINES,
+                 data_rate: int = DATA_RATE, window_s: float = WINDOW_S,
+                 history_s: float = HISTORY_S):
+        load = sum(c.rate_hz for c in channels) / data_rate
+        if load > MAX_LOAD:
+            raise ValueError(
+                f"channel rates need {load:.0%} of {data_rate} SPS "
+                f"(max {MAX_LOAD:.0%})"
+            )
+        if len({c.channel for c in channels}) != len(channels):
+            raise ValueError("each ADS1115 input may be listed once")
+        self.backend = backend
+        self.data_rate = data_rate
+        self.channels: List[AdcChannel] = [
+            AdcChannel(c, data_rate, window_s, history_s) for c in channels
+        ]
+        self._by_name: Dict[str, AdcChannel] = {
+            ch.name: ch for ch in self.channels
+        }
+        self._listeners: List[Listener] = []
+        self._sample_listeners: List[SampleListener] = []
+        self._current: Optional[int] = None
+        self.slot = 0
+        self.idle_slots = 0
+        self.mux_switches = 0
+        self.errors = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __getitem__(self, name: str) -> AdcChannel:
+        return self._by_name[name]
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call listener(name, stats) from the scheduler thread."""
+        self._listeners.append(listener)
+
+    def add_sample_listener(self, listener: SampleListener) -> None:
+        """Call listener(name, t, volts) for every raw sample (keep it
+        cheap: it runs between conversions)."""
+        self._sample_listeners.append(listener)
+
+    def latest(self, name: str) -> Optional[WindowStats]:
+        return self._by_name[name].latest
+
+    # --------------------------- scheduling --------------------------- #
+
+    def _pick(self) -> Optional[AdcChannel]:
+        """Most overdue channel, or None if nobody is due this slot."""
+        best = None
+        for ch in self.channels:
+            if ch.due <= self.slot and (best is None or ch.due < best.due):
+                best = ch
+        return best
+
+    def step(self) -> Optional[AdcChannel]:
+        """Spend one conversion slot; return the channel sampled."""
+        ch = self._pick()
+        backend = self.backend
+        if ch is None:
+            # Nothing due: let the current conversion run out the slot
+            self.idle_slots += 1
+            backend.wait_ready()
+            self.slot += 1
+            return None
+        if ch.channel != self._current:
+            backend.configure(ch.channel, self.data_rate)
+            self._current = ch.channel
+            self.mux_switches += 1
+        backend.wait_ready()
+        volts = backend.read_volts()
+        ch.max_gap = max(ch.max_gap, self.slot - int(ch.due))
+        ch.due += ch.stride
+        self.slot += 1
+        t = time.monotonic()
+        for listener in self._sample_listeners:
+            listener(ch.name, t, volts)
+        stats = ch.add(t, volts)
+        if stats is not None:
+            for listener in self._listeners:
+                listener(ch.name, stats)
+        return ch
+
+    def run_slots(self, n: int) -> None:
+        """Run n slots in the calling thread (offline use and tests)."""
+        for _ in range(n):
+            self.step()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-channel achieved rate and worst lateness (slots)."""
+        seconds = self.slot / self.data_rate or 1.0
+        return {
+            ch.name: {
+                "rate_hz": ch.samples / seconds,
+                "wanted_hz": ch.config.rate_hz,
+                "samples": ch.samples,
+                "max_late_slots": ch.max_gap,
+            }
+            for ch in self.channels
+        }
+
+    # ----------------------------- thread ----------------------------- #
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="adc-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except OSError as exc:   # I2C glitch: re-select and go on
+                self.errors += 1
+                print(f"adc_scheduler: conversion failed: {exc}")
+                self._current = None
+                self._stop.wait(0.1)
@@ -2,6 +2,8 @@ import serial
 import RPi.GPIO as GPIO
 import time
 
+from pms import PmsReader
+
 SERIAL_PORT = "/dev/ttyS0"
 BAUDRATE = 9600
 GPIO_PIN = 24
@@ -14,41 +16,10 @@ GPIO.setmode(GPIO.BCM)
 GPIO.setup(GPIO_PIN, GPIO.OUT)
 GPIO.output(GPIO_PIN, GPIO.LOW)
 
-def find_frame(ser):
-    """Scan until a valid frame header (0x42 0x4D) and read full frame."""
-    while True:
-        b1 = ser.read(1)
-        if b1 != b'\x42':
-            continue
-        b2 = ser.read(1)
-        if b2 != b'\x4D':
-            continue
-        rest = ser.read(30)
-        if len(rest) != 30:
-            continue
-        frame = b1 + b2 + rest
-        if verify_checksum(frame):
-            return frame
-        else:
-            print("✖ Checksum failed. Resyncing...")
-
-def verify_checksum(frame):
-    """Return True if checksum is valid."""
-    if len(frame) != 32:
-        return False
-    data = frame[:30]
-    checksum_bytes = frame[30:]
-    expected = int.from_bytes(checksum_bytes, byteorder='big')
-    actual = sum(data)
-    return actual == expected
-
-def parse_pm2_5(frame):
-    """Extract PM2.5 (standard atmosphere) from frame."""
-    return (frame[6] << 8) | frame[7]
-
 def main():
     ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=2)
     ser.reset_input_buffer()
+    reader = PmsReader(ser)
 
     while True:
        GPIO.output(GPIO_PIN, GPIO.HIGH)
@@ -58,8 +29,7 @@ def main():
 
     try:
         while True:
-            frame = find_frame(ser)
-            raw = parse_pm2_5(frame)
+            raw = reader.read().pm25_atm
 
             if filtered is None:
                 filtered = raw
@@ -1,91 +1,197 @@
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
 import serial
 import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from collections import deque
 from datetime import datetime
 
+from pms import PmsFrame, PmsReader
+from ring_buffer import RingBuffer
+from rollup import history
+from ts_store import TimeSeriesStore
+
+# Live mode: a sampler thread reads the sensor and queues frames; the GUI
+# timer drains the queue into NumPy ring buffers and blits only the line
+# artists. Samples keep float epoch stamps; lines are drawn against
+# "seconds ago" so the axes stay fixed and the background can be reused.
+# Axes are only redrawn when a value outgrows the y-range.
+
 # -----------------------------
 # Configuration
 # -----------------------------
 SERIAL_PORT = "/dev/ttyS0"
 BAUDRATE = 9600
 ALPHA = 0.1  # EMA smoothing factor
-UPDATE_INTERVAL = 5000  # milliseconds
+UPDATE_INTERVAL = 1000  # milliseconds
 WINDOW_SECONDS = 300  # plot 5 minutes of data
-MAX_POINTS = WINDOW_SECONDS // (UPDATE_INTERVAL // 1000)
+MAX_POINTS = WINDOW_SECONDS  # sensor sends ~1 frame/s
+THRESHOLD = 35
 
-# -----------------------------
-# Data Buffers
-# -----------------------------
-timestamps = deque(maxlen=MAX_POINTS)
-raw_vals = deque(maxlen=MAX_POINTS)
-ema_vals = deque(maxlen=MAX_POINTS)
-ema = None
+PM_FIELDS = ("pm1_atm", "pm25_atm", "pm10_atm")
+BIN_FIELDS = ("n0_3", "n0_5", "n1_0", "n2_5", "n5_0", "n10")
+FIELDS = PmsFrame._fields
+EMA = len(FIELDS)  # extra channel: EMA of PM2.5
 
 # -----------------------------
-# Serial Reader
+# Sampler thread
 # -----------------------------
-def read_pm2_5_from_sensor(ser):
-    while True:
-        if ser.read() == b'\x42':
-            if ser.read() == b'\x4d':
-                frame = ser.read(30)
-                data = list(frame)
-                pm2_5_atm = data[8] << 8 | data[9]  # Correct offset
-                return pm2_5_atm
+def sampler(reader, out, stop):
+    """Read frames off the serial port and queue (epoch, frame)."""
+    while not stop.is_set():
+        frame = reader.read()
+        out.put((time.time(), frame))
 
 # -----------------------------
-# Plot Setup
+# Live plot
 # -----------------------------
-fig, ax = plt.subplots(figsize=(7, 3))
-line_raw, = ax.plot([], [], label="Raw PM2.5", color="gray")
-line_ema, = ax.plot([], [], label="EMA", linewidth=2, color="blue")
-ax.axhline(35, color="red", linestyle="--", label="Threshold")
-ax.set_xlabel("Time")
-ax.set_ylabel("µg/m³")
-ax.set_title("PM2.5 (ATM) — Real-Time")
-ax.legend()
-ax.grid(True)
+class LivePlot:
+    """Blitted live plot of PM concentrations and particle-count bins."""
 
-# -----------------------------
-# Update Function
-# -----------------------------
-def update(frame):
-    global ema
+    def __init__(self, frames, bins=True):
+        self.frames = frames
+        self.buf = RingBuffer(MAX_POINTS, len(FIELDS) + 1)
+        self.ema = None
+        rows = 2 if bins else 1
+        self.fig, axes = plt.subplots(rows, 1, figsize=(8, 3 * rows),
+                                      squeeze=False)
+        self.ax_pm = axes[0][0]
+        self.ax_bins = axes[1][0] if bins else None
+        self.lines = {}
+        self.pm_channels = [FIELDS.index(f) for f in PM_FIELDS] + [EMA]
+        self.bin_channels = [FIELDS.index(f) for f in BIN_FIELDS]
 
-    pm = read_pm2_5_from_sensor(ser)
+        for f in PM_FIELDS:
+            self._add_line(self.ax_pm, FIELDS.index(f), f)
+        self._add_line(self.ax_pm, EMA, "PM2.5 EMA", linewidth=2)
+        self.ax_pm.axhline(THRESHOLD, color="red", linestyle="--",
+                           label="Threshold")
+        self.ax_pm.set_ylabel("µg/m³")
+        self.ax_pm.set_title("PM (ATM) — Real-Time")
+        axes_list = [self.ax_pm]
+        if self.ax_bins is not None:
+            for f in BIN_FIELDS:
+                self._add_line(self.ax_bins, FIELDS.index(f), f)
+            self.ax_bins.set_ylabel("count/0.1L")
+            axes_list.append(self.ax_bins)
+        for ax in axes_list:
+            ax.set_xlim(-WINDOW_SECONDS, 0)
+            ax.set_ylim(0, 60)
+            ax.grid(True)
+            ax.legend(loc="upper left", fontsize="small")
+        axes_list[-1].set_xlabel("seconds ago")
 
-    if ema is None:
-        ema = pm
-    else:
-        ema = ALPHA * pm + (1 - ALPHA) * ema
+        self.fig.tight_layout()
+        self.background = None
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+        self.timer = self.fig.canvas.new_timer(interval=UPDATE_INTERVAL)
+        self.timer.add_callback(self.tick)
 
-    now = datetime.now().strftime("%H:%M:%S")
-    timestamps.append(now)
-    raw_vals.append(pm)
-    ema_vals.append(ema)
+    def _add_line(self, ax, channel, label, **kw):
+        line, = ax.plot([], [], label=label, animated=True, **kw)
+        self.lines[channel] = line
 
-    line_raw.set_data(timestamps, raw_vals)
-    line_ema.set_data(timestamps, ema_vals)
+    def _on_draw(self, event):
+        # Full redraw (start, resize, rescale): recapture the background
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_lines()
 
-    ax.set_xlim(timestamps[0], timestamps[-1])
-    ax.set_ylim(0, max(max(raw_vals), max(ema_vals), 50) + 10)
+    def _draw_lines(self):
+        for line in self.lines.values():
+            line.axes.draw_artist(line)
 
-    return line_raw, line_ema
+    def _rescale(self, ax, channels):
+        """Grow/shrink the y-range; True if the axes need a redraw."""
+        top = max(self.buf.max(channels), 50) * 1.2
+        lo, hi = ax.get_ylim()
+        if top > hi or top < hi / 3:
+            ax.set_ylim(0, top)
+            return True
+        return False
 
-# -----------------------------
-# Main
-# -----------------------------
-if __name__ == "__main__":
-    ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=2)
+    def tick(self):
+        got = False
+        while True:
+            try:
+                t, frame = self.frames.get_nowait()
+            except queue.Empty:
+                break
+            pm = frame.pm25_atm
+            self.ema = pm if self.ema is None else (
+                ALPHA * pm + (1 - ALPHA) * self.ema
+            )
+            self.buf.append(t, (*frame, self.ema))
+            got = True
+        if not got or self.background is None:
+            return
 
-    ani = animation.FuncAnimation(
-        fig,
-        update,
-        interval=UPDATE_INTERVAL,
-        cache_frame_data=False
-    )
+        t, values = self.buf.view()
+        x = t - time.time()
+        for channel, line in self.lines.items():
+            line.set_data(x, values[:, channel])
 
+        redraw = self._rescale(self.ax_pm, self.pm_channels)
+        if self.ax_bins is not None:
+            redraw |= self._rescale(self.ax_bins, self.bin_channels)
+        canvas = self.fig.canvas
+        if redraw:
+            canvas.draw()          # _on_draw recaptures + draws lines
+        else:
+            canvas.restore_region(self.background)
+            self._draw_lines()
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+    def show(self):
+        self.timer.start()
+        plt.show()
+
+# -----------------------------
+# Stored history (--history HOURS [FIELD])
+# -----------------------------
+def plot_history(hours, field="pm25_atm"):
+    """Plot stored PMS data; the rollup tier is picked to fit ~1000
+    points, so a week draws as fast as an hour."""
+    end = time.time()
+    tier, rows = history(TimeSeriesStore(), "pms", field,
+                         end - hours * 3600, end)
+    if not rows:
+        print("No stored data in that window.")
+        return
+    fig, ax = plt.subplots(figsize=(7, 3))
+    rows = np.array(rows)
+    t = [datetime.fromtimestamp(x) for x in rows[:, 0]]
+    ax.fill_between(t, rows[:, 1], rows[:, 2], color="lightgray",
+                    label="min–max")
+    ax.plot(t, rows[:, 3], color="blue", label="mean")
+    ax.axhline(THRESHOLD, color="red", linestyle="--", label="Threshold")
+    ax.set_ylabel("µg/m³")
+    ax.set_title(f"{field} — last {hours:g} h "
+                 f"({f'{tier} s buckets' if tier else 'raw'})")
+    ax.grid(True)
+    ax.legend()
+    fig.autofmt_xdate()
     plt.tight_layout()
-    print("Starting animation ...")
     plt.show()
+
+# -----------------------------
+# Main
+# -----------------------------
+if __name__ == "__main__" and "--history" in sys.argv:
+    i = sys.argv.index("--history")
+    plot_history(float(sys.argv[i + 1]), *sys.argv[i + 2:i + 3])
+elif __name__ == "__main__":
+    reader = PmsReader(serial.Serial(SERIAL_PORT, BAUDRATE, timeout=2))
+    frames = queue.Queue()
+    stop = threading.Event()
+    threading.Thread(target=sampler, args=(reader, frames, stop),
+                     daemon=True).start()
+
+    plot = LivePlot(frames, bins="--no-bins" not in sys.argv)
+    print("Starting live plot ...")
+    try:
+        plot.show()
+    finally:
+        stop.set()
@@ -1,43 +1,81 @@
-from flask import Flask, render_template_string
+import atexit
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import Flask, Response, jsonify, render_template_string, request
 import serial
-import struct
+
+from event_stream import Broadcaster, EventReceiver
+from pms import LABELS, UNITS, PmsReader
+from pms_sampler import PmsSampler
+from rollup import MAX_POINTS, history
+from ts_store import ROLLUPS, TimeSeriesStore
+
+# The sampler thread owns the serial port; handlers only read its cache,
+# and answer conditional GETs (ETag = boot id + reading seq) with 304.
+# /api/stream pushes every new frame, plus gate and current-sense events
+# sent by the controller (event_stream.EventSender), to all viewers.
+# The sampler and event receiver start with the first request, so the app
+# works under flask run or a WSGI server too; run one worker process, as
+# it owns the serial port and the event port.
 
 app = Flask(__name__)
 ser = serial.Serial("/dev/serial0", baudrate=9600, timeout=2)
+sampler = PmsSampler(PmsReader(ser))
+broadcaster = Broadcaster()
+sampler.add_listener(
+    lambda reading: broadcaster.publish("pms", _reading_dict(reading))
+)
+store = TimeSeriesStore()
+atexit.register(store.close)
+sampler.add_listener(
+    lambda reading: store.append("pms", (reading.t,) + reading.frame)
+)
+
+labels = LABELS
+units = UNITS
+
+_page_cache = (0, "")   # (reading seq, rendered HTML)
+# seq restarts with the process; the boot id keeps old ETags from matching
+BOOT_ID = uuid.uuid4().hex[:8]
+
+_started = False
+_start_lock = threading.Lock()
+
+@app.before_request
+def _start_background():
+    """Start the sampler and event receiver once per process."""
+    global _started
+    if _started:
+        return
+    with _start_lock:
+        if not _started:
+            sampler.start()
+            EventReceiver(broadcaster).start()
+            _started = True
+
+def _reading_dict(reading):
+    return {"t": reading.t, "seq": reading.seq, **reading.frame._asdict()}
 
-labels = [
-    "PM1.0 (CF1)", "PM2.5 (CF1)", "PM10 (CF1)",
-    "PM1.0 (ATM)", "PM2.5 (ATM)", "PM10 (ATM)",
-    "0.3–0.5 μm", "0.5–1.0 μm", "1.0–2.5 μm",
-    "2.5–5.0 μm", "5.0–10 μm", ">10 μm"
-]
-
-units = [
-    "µg/m³", "µg/m³", "µg/m³",
-    "µg/m³", "µg/m³", "µg/m³",
-    "count/0.1L", "count/0.1L", "count/0.1L",
-    "count/0.1L", "count/0.1L", "count/0.1L"
-]
-
-def read_pms1003():
-    while True:
-        if ser.read(1) == b'\x42':
-            if ser.read(1) == b'\x4d':
-                frame = ser.read(30)
-                if len(frame) != 30:
-                    continue
-                data = struct.unpack('!HHHHHHHHHHHHHH', frame[:28])
-                checksum = struct.unpack('!H', frame[28:30])[0]
-                calc_checksum = 0x42 + 0x4D + sum(frame[:28])
-                if checksum == (calc_checksum & 0xFFFF):
-                    return data[:12]
+def _conditional(response, reading):
+    """Tag response with the reading and turn it into a 304 if the
+    client already has it."""
+    response.set_etag(f"{BOOT_ID}-{reading.seq}")
+    response.last_modified = datetime.fromtimestamp(reading.t, timezone.utc)
+    response.cache_control.no_cache = True   # always revalidate
+    return response.make_conditional(request)
+
+def _no_data():
+    return "Waiting for the first PMS1003 frame...", 503, {"Retry-After": "2"}
 
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html>
 <head>
     <title>PMS1003 Air Quality</title>
-    <meta http-equiv="refresh" content="10">
+    <noscript><meta http-equiv="refresh" content="10"></noscript>
     <link rel="icon" href="data:,">
     <style>
         body { font-family: sans-serif; padding: 1em; }
@@ -77,7 +115,7 @@ HTML_TEMPLATE = """
         </tr>
         <tr>
             {% for value, unit in data %}
-            <td>{{ value }} {{ unit }}</td>
+            <td id="v{{ loop.index0 }}">{{ value }} {{ unit }}</td>
             {% endfor %}
         </tr>
     </table>
@@ -93,7 +131,7 @@ HTML_TEMPLATE = """
         {% for i in range(3) %}
             {% set height_px = (data[3+i][0] / max_val) * container_px %}
             <div style="height: {{ height_px|round(0, 'floor') }}px;"
-                 class="bar"
+                 class="bar" id="bar{{ i }}"
                  title="{{ labels[3+i] }}: {{ data[3+i][0] }} µg/m³">
                 {{ data[3+i][0] }}
             </div>
@@ -106,16 +144,106 @@ HTML_TEMPLATE = """
         {% endfor %}
     </div>
 
-    <p>Page auto-refreshes every 10 seconds.</p>
+    <p id="status">Live: <span id="gate">gate: ?</span>,
+       <span id="current">current: ?</span></p>
+
+    <script>
+    const UNITS = {{ units|tojson }};
+    const FIELDS = {{ fields|tojson }};
+    const es = new EventSource("/api/stream");
+    es.addEventListener("pms", (e) => {
+        const r = JSON.parse(e.data);
+        FIELDS.forEach((f, i) => {
+            document.getElementById("v" + i).textContent =
+                r[f] + " " + UNITS[i];
+        });
+        const atm = [r.pm1_atm, r.pm25_atm, r.pm10_atm];
+        const maxVal = Math.min(Math.max(...atm, 50), 1000);
+        atm.forEach((v, i) => {
+            const bar = document.getElementById("bar" + i);
+            bar.style.height = Math.floor(v / maxVal * 200) + "px";
+            bar.textContent = v;
+        });
+    });
+    es.addEventListener("gate", (e) => {
+        const g = JSON.parse(e.data);
+        document.getElementById("gate").textContent =
+            "gate " + g.gate + ": " + g.state;
+    });
+    es.addEventListener("current", (e) => {
+        const c = JSON.parse(e.data);
+        document.getElementById("current").textContent =
+            c.machine + " " + (c.on ? "ON" : "OFF");
+    });
+    </script>
 </body>
 </html>
 """
 
 @app.route("/")
 def index():
-    values = read_pms1003()
-    table_data = list(zip(values, units))
-    return render_template_string(HTML_TEMPLATE, labels=labels, data=table_data)
+    global _page_cache
+    reading = sampler.latest
+    if reading is None:
+        return _no_data()
+    seq, html = _page_cache
+    if seq != reading.seq:
+        table_data = list(zip(reading.frame, units))
+        html = render_template_string(
+            HTML_TEMPLATE, labels=labels, data=table_data, units=units,
+            fields=reading.frame._fields,
+        )
+        _page_cache = (reading.seq, html)
+    return _conditional(app.make_response(html), reading)
+
+@app.route("/api/latest")
+def api_latest():
+    reading = sampler.latest
+    if reading is None:
+        return _no_data()
+    return _conditional(jsonify(_reading_dict(reading)), reading)
+
+@app.route("/api/history")
+def api_history():
+    """Cached readings; ?since=<epoch seconds> for only newer ones."""
+    reading = sampler.latest
+    if reading is None:
+        return _no_data()
+    since = request.args.get("since", type=float)
+    readings = [_reading_dict(r) for r in sampler.history(since)]
+    return _conditional(jsonify(readings), reading)
+
+@app.route("/api/series/<name>")
+def api_series(name):
+    """Stored history of one field, downsampled to fit ?points.
+
+    ?field=pm25_atm&start=<epoch>&end=<epoch>&points=1000[&key=<id>]
+    Returns the tier used (0 = raw seconds) and [t, min, max, mean] rows.
+    """
+    if name not in ROLLUPS:
+        return {"error": f"unknown series {name!r}"}, 404
+    end = request.args.get("end", time.time(), type=float)
+    start = request.args.get("start", end - 3600, type=float)
+    points = request.args.get("points", MAX_POINTS, type=int)
+    field = request.args.get("field", "pm25_atm" if name == "pms" else "")
+    key = request.args.get("key", type=int)
+    if field not in store.fields(name) or field == "t":
+        return {"error": f"unknown field {field!r}"}, 400
+    tier, rows = history(store, name, field, start, end, points, key)
+    return jsonify({"series": name, "field": field, "tier": tier,
+                    "rows": rows})
+
+@app.route("/api/stream")
+def api_stream():
+    """Server-Sent Events: pms, gate and current events as they happen."""
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    return Response(
+        broadcaster.stream(last_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000)
+    _start_background()   # sample before the first page load
+    # threaded: each SSE viewer holds one worker thread while connected
+    app.run(host="0.0.0.0", port=5000, threaded=True)
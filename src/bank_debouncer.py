@@ -0,0 +1,109 @@
+# bank_debouncer.py
+# Debounce all 40 input bits at once.
+#
+# Every bit gets a saturating integrator counter, but the counters are
+# stored "vertically": plane k is an int whose bit n is bit k of pin n's
+# counter. Incrementing, decrementing and comparing all 40 counters is
+# then a handful of XOR/AND operations per plane, so one update costs the
+# same whether one switch or all of them are bouncing.
+#
+# - A pin's counter counts up while its raw level disagrees with the
+#   stable level and back down while it agrees; the stable level flips
+#   when the counter reaches that pin's threshold.
+# - Thresholds are in samples, derived from per-pin debounce times and
+#   the (fixed) sample period.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+WIDTH = 40
+SAMPLE_PERIOD_S = 0.005
+DEBOUNCE_MS = 15
+
+
+class BankDebouncer:
+    """Integrating debouncer for a whole input word.
+
+    :param width: Number of input bits.
+    :param sample_period_s: Period update() is called at.
+    :param debounce_ms: Default debounce time for every pin.
+    :param pin_ms: {pin: debounce_ms} overrides.
+    :param initial: Starting stable word (default: all high / idle).
+    """
+
+    def __init__(
+        self,
+        width: int = WIDTH,
+        sample_period_s: float = SAMPLE_PERIOD_S,
+        debounce_ms: float = DEBOUNCE_MS,
+        pin_ms: Optional[Dict[int, float]] = None,
+        initial: Optional[int] = None,
+    ):
+        self.width = width
+        self.mask = (1 << width) - 1
+        self.stable = self.mask if initial is None else initial & self.mask
+
+        thresholds = [self._samples(debounce_ms, sample_period_s)] * width
+        for pin, ms in (pin_ms or {}).items():
+            if not 0 <= pin < width:
+                raise ValueError(f"pin {pin} out of range 0..{width - 1}")
+            thresholds[pin] = self._samples(ms, sample_period_s)
+        self.thresholds = thresholds
+
+        planes = max(thresholds).bit_length()
+        self._thr: List[int] = [0] * planes
+        for pin, n in enumerate(thresholds):
+            for k in range(planes):
+                if n >> k & 1:
+                    self._thr[k] |= 1 << pin
+        self._cnt: List[int] = [0] * planes
+
+    @staticmethod
+    def _samples(ms: float, period_s: float) -> int:
+        return max(1, math.ceil(ms / (period_s * 1000.0) - 1e-9))
+
+    def update(self, raw: int) -> Tuple[int, int, int]:
+        """Feed one raw sample.
+
+        :return: (stable, rising, falling) where rising/falling are masks
+            of pins whose stable level just changed.
+        """
+        cnt = self._cnt
+        thr = self._thr
+        diff = (raw ^ self.stable) & self.mask
+
+        # Count up where raw disagrees with stable ...
+        carry = diff
+        # ... and down (to zero) where it agrees.
+        nonzero = 0
+        for c in cnt:
+            nonzero |= c
+        borrow = ~diff & nonzero
+        for k, c in enumerate(cnt):
+            cnt[k] = c ^ carry ^ borrow
+            carry &= c
+            borrow &= ~c
+
+        # Flip pins whose counter reached their threshold.
+        flips = diff
+        for k, c in enumerate(cnt):
+            flips &= ~(c ^ thr[k])
+        if flips:
+            for k in range(len(cnt)):
+                cnt[k] &= ~flips
+            self.stable ^= flips
+        return self.stable, flips & raw, flips & ~raw
+
+    @property
+    def settled(self) -> bool:
+        """True when no pin is part-way through debouncing."""
+        return not any(self._cnt)
+
+    def force(self, word: int) -> None:
+        """Set the stable word directly and clear all counters."""
+        self.stable = word & self.mask
+        self._cnt = [0] * len(self._cnt)
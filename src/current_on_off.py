@@ -1,40 +1,31 @@
-import time
-import board
-import busio
-from adafruit_ads1x15.ads1115 import ADS1115
-from adafruit_ads1x15.analog_in import AnalogIn
+from ads_sampler import Ads1115Backend, AdsSampler
+from power_state import PowerClassifier
 
-# Set up I2C
-i2c = busio.I2C(board.SCL, board.SDA)
+# ADS1115 channel 0 in continuous mode (860 SPS); each 100 ms window is
+# reduced to its RMS, so the ON/OFF decision no longer rests on a single
+# instantaneous sample.
+sampler = AdsSampler(Ads1115Backend(gain=1), channel=0)  # ±4.096V
+sampler.backend.configure(sampler.channel, sampler.data_rate)
 
-# Create ADC instance
-ads = ADS1115(i2c)
+# ON/OFF thresholds follow the learned idle baseline and noise; ON needs
+# at least this step above idle (volts, window RMS). The sensor is
+# DC-output and can sit on one ADC code at idle, so no flat-line check;
+# a dead sensor is still flagged by its idle level (min_level_v).
+classifier = PowerClassifier("channel 0", min_delta_v=0.025, flat_v=0.0)
 
-# Optionally set gain
-ads.gain = 1  # ±4.096V
-
-# Create analog input channel 0
-chan0 = AnalogIn(ads, 0)
-
-# Threshold voltage for ON/OFF
-threshold = 0.025
-
-# Start with unknown previous state
-prev_state = None
+print("Learning idle baseline ...")
 
 while True:
-    voltage = chan0.voltage
-    if voltage is None:
-        # Sometimes AnalogIn may return None if I2C glitches
+    try:
+        stats = sampler.collect()
+    except OSError:
+        # I2C glitch: restart conversions and try again
+        sampler.backend.configure(sampler.channel, sampler.data_rate)
         continue
 
-    if voltage < threshold:
-        current_state = "Off"
-    else:
-        current_state = "On"
-
-    if current_state != prev_state:
-        print(current_state)
-        prev_state = current_state
-
-    time.sleep(0.2)
+    for edge in classifier.feed(stats):
+        if edge.kind in ("on", "off"):
+            print(f"{edge.kind.capitalize()} (rms={stats.rms:.3f} V, "
+                  f"threshold={edge.threshold:.3f} V)")
+        else:
+            print(f"Sensor {edge.kind}: {edge.detail}")
@@ -1,23 +1,22 @@
 import time
-import board
-import busio
-from adafruit_ads1x15.ads1115 import ADS1115
-from adafruit_ads1x15.analog_in import AnalogIn
 
-# Set up I2C
-i2c = busio.I2C(board.SCL, board.SDA)
+from adc_scheduler import MACHINES, AdcScheduler
+from ads_sampler import Ads1115Backend
 
-# Create ADC instance
-ads = ADS1115(i2c)
-
-# Optionally set gain
-ads.gain = 1
-
-# Create AnalogIn channels
-channels = [AnalogIn(ads, i) for i in range(4)]
+# One scheduler owns the ADS1115 and interleaves all four channels at
+# their own rates (see adc_scheduler.MACHINES); gain 1 = ±4.096V
+scheduler = AdcScheduler(Ads1115Backend(gain=1), MACHINES)
+scheduler.start()
 
 while True:
-    for i, channel in enumerate(channels):
-        print(f"Channel {i}: raw={channel.value}, voltage={channel.voltage:.6f} V")
-    print("-" * 40)
     time.sleep(1)
+    report = scheduler.report()
+    for ch in scheduler.channels:
+        s = ch.latest
+        if s is None:
+            continue
+        r = report[ch.name]
+        print(f"Channel {ch.channel} ({ch.name}): rms={s.rms:.6f} V "
+              f"peak={s.peak:.6f} V  {r['rate_hz']:.0f}/"
+              f"{r['wanted_hz']:.0f} Hz")
+    print("-" * 40)
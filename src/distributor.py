@@ -1,12 +1,146 @@
 import time
-import spidev
-import RPi.GPIO as GPIO
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+try:
+    import spidev
+except ImportError:  # not on a Pi: only the fake backend below is usable
+    spidev = None
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
 
 
     # Ensure cleanup on exit
 import atexit
-atexit.register(GPIO.cleanup)
-    
+if GPIO is not None:
+    atexit.register(GPIO.cleanup)
+
+# One waveform tick. Every step pulse is high for exactly one tick, so this
+# must stay above the DRV8825 minimum STEP high time (1.9 µs).
+DEFAULT_TICK_S = 0.000050  # 50 µs -> 10 kHz max step rate per motor
+
+# Below this much remaining time, play() spins instead of sleeping.
+SPIN_MARGIN_S = 0.000200
+
+
+class GpioLatch:
+    """Pulses the 74HC595 latch (RCLK) line through RPi.GPIO."""
+
+    def __init__(self, pin=25):
+        if GPIO is None:
+            raise RuntimeError("RPi.GPIO is not available on this host")
+        self.pin = pin
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(self.pin, GPIO.OUT, initial=GPIO.LOW)
+
+    def pulse(self):
+        # No sleep between the edges: the 595 needs ~20 ns of RCLK high,
+        # one GPIO.output call already takes longer, and time.sleep(1e-6)
+        # really sleeps tens to hundreds of µs. Faster strategies (gpiod,
+        # /dev/gpiomem) are in latch.py.
+        GPIO.output(self.pin, GPIO.HIGH)
+        GPIO.output(self.pin, GPIO.LOW)
+
+    def close(self):
+        GPIO.cleanup()
+
+
+class FakeSpi:
+    """Stand-in for spidev.SpiDev that records traffic instead of sending it.
+
+    With wire_time=True each transfer busy-waits for the time the bytes
+    would take on the wire at max_speed_hz, so benchmarks on a plain Linux
+    box see realistic bus cost.
+    """
+
+    def __init__(self, wire_time=False):
+        self.max_speed_hz = 1000000
+        self.wire_time = wire_time
+        self.transfers = 0
+        self.bytes_sent = 0
+        self.shift_reg = 0x0000  # what the two chained 595s now hold
+
+    def xfer2(self, data):
+        self.transfers += 1
+        self.bytes_sent += len(data)
+        for byte in data:
+            self.shift_reg = ((self.shift_reg << 8) | byte) & 0xFFFF
+        if self.wire_time:
+            _sleep_until(
+                time.perf_counter() + len(data) * 8 / self.max_speed_hz
+            )
+        return [0] * len(data)
+
+    def close(self):
+        pass
+
+
+class FakeLatch:
+    """Stand-in for GpioLatch that records every latched output word.
+
+    :param spi: FakeSpi whose shift register contents get latched.
+    :param record: Keep a (perf_counter, word) list of every latch.
+    """
+
+    def __init__(self, spi=None, record=True):
+        self.spi = spi
+        self.record = record
+        self.pulses = 0
+        self.output = 0x0000
+        self.history = []
+
+    def pulse(self):
+        self.pulses += 1
+        if self.spi is not None:
+            self.output = self.spi.shift_reg
+        if self.record:
+            self.history.append((time.perf_counter(), self.output))
+
+    def close(self):
+        pass
+
+
+def _sleep_until(deadline):
+    """Sleep most of the way to deadline (perf_counter), then spin."""
+    remaining = deadline - time.perf_counter()
+    if remaining > SPIN_MARGIN_S:
+        time.sleep(remaining - SPIN_MARGIN_S)
+    while time.perf_counter() < deadline:
+        pass
+
+
+@dataclass
+class StepWaveform:
+    """Precomputed, run-length encoded output sequence for the distributor.
+
+    frames[i] is the [high, low] byte pair for the i-th distinct output
+    word; it is held for holds[i] ticks before frames[i + 1] goes out.
+    Only changes of the output word are stored, so idle time costs no
+    bus traffic.
+    """
+
+    tick_s: float
+    frames: list = field(default_factory=list)
+    holds: array = field(default_factory=lambda: array("I"))
+    steps: dict = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def ticks(self):
+        return sum(self.holds)
+
+    @property
+    def duration_s(self):
+        return self.ticks * self.tick_s
+
+
 class Distributor:
     """
     Controls four DRV8825 stepper drivers via two chained 74HC595 shift registers.
@@ -15,6 +149,16 @@ class Distributor:
     - High byte (bits 15–8) → Chip2 (rotated 180°)
     - Low byte (bits 7–0)   → Chip1 (upright)
     - Data sent MSB first (bit 15 down to bit 0)
+
+    The SPI device and latch can be injected (e.g. FakeSpi/FakeLatch) to
+    run without hardware.
+
+    Bit changes go to the shadow word self.bits; flush() sends it (one
+    xfer2 + latch pulse) only if it differs from what the registers
+    already hold. Inside ``with dist.transaction():`` flushes are held
+    back and the whole batch goes out as one update on exit. Bus traffic
+    is counted in self.flushes (updates sent) and self.skipped (flushes
+    that had nothing to send).
     """
 
     MOTOR_MAP = {
@@ -24,32 +168,75 @@ class Distributor:
         4: {'en': 1, 'step':  2, 'dir': 3},
     }
 
-    def __init__(self, spi_bus=0, spi_device=0, spi_speed=1000000, latch_pin=25):
-        self.spi = spidev.SpiDev()
-        self.spi.open(spi_bus, spi_device)
+    def __init__(self, spi_bus=0, spi_device=0, spi_speed=1000000,
+                 latch_pin=25, spi=None, latch=None):
+        if spi is None:
+            if spidev is None:
+                raise RuntimeError("spidev is not available on this host")
+            spi = spidev.SpiDev()
+            spi.open(spi_bus, spi_device)
+        self.spi = spi
         self.spi.max_speed_hz = spi_speed
 
         self.LATCH_PIN = latch_pin
-        GPIO.setwarnings(False)
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(self.LATCH_PIN, GPIO.OUT, initial=GPIO.LOW)
+        self.latch = latch if latch is not None else GpioLatch(latch_pin)
 
         self.bits = 0x0000
-        self.flush()
+        self._sent = None      # word the registers hold (None = unknown)
+        self._depth = 0        # open transaction() levels
+        self.flushes = 0
+        self.skipped = 0
+        self.commits = 0
         self.reset()
 
-        
-    def flush(self):
+
+    def flush(self, force=False):
+        """Send self.bits unless the registers already hold it.
+
+        Inside a transaction() this only defers to the commit.
+        """
+        if self._depth and not force:
+            return
+        if self.bits == self._sent and not force:
+            self.skipped += 1
+            return
         high = (self.bits >> 8) & 0xFF
         low = self.bits & 0xFF
         self.spi.xfer2([high, low])
-        GPIO.output(self.LATCH_PIN, GPIO.HIGH)
-        time.sleep(0.000001)  # 1 µs
-        GPIO.output(self.LATCH_PIN, GPIO.LOW)        
+        self.latch.pulse()
+        self._sent = self.bits
+        self.flushes += 1
+
+    @contextmanager
+    def transaction(self):
+        """Batch bit changes into one register update.
+
+        Nested transactions commit with the outermost one. If the block
+        raises, the shadow bits roll back and nothing is sent.
+        """
+        start = self.bits
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if not self._depth:
+                self.bits = start
+            raise
+        self._depth -= 1
+        if not self._depth:
+            self.commits += 1
+            self.flush()
 
     def reset(self):
         self.bits = 0x0000
-        self.flush()
+        self.flush(force=True)
+
+    def disable_all(self):
+        """Drop EN on every driver in one update."""
+        with self.transaction():
+            for motor in self.MOTOR_MAP:
+                self.set_enable(motor, False)
 
     def _bit_set(self, bitnum, value):
         if value:
@@ -75,17 +262,118 @@ class Distributor:
         if motor not in self.MOTOR_MAP:
             raise ValueError(f"Invalid motor ID: {motor}")
         bitnum = self.MOTOR_MAP[motor]['step']
+        # A pulse always goes out, also inside a transaction; pending
+        # DIR/EN changes go first so they settle before the STEP edge.
+        if self._depth and self.bits != self._sent:
+            self.flush(force=True)
         self._bit_set(bitnum, 1)
         #print(f"Sending bits: {self.bits:016b}")
-        self.flush()
+        self.flush(force=True)
         time.sleep(pulse_us / 1_000_000)
         #time.sleep(1)
         self._bit_set(bitnum, 0)
-        self.flush()
-        
-    def close(self):
-        self.spi.close()
-        GPIO.cleanup()
+        self.flush(force=True)
+
+    def build_waveform(self, moves=None, tick_s=DEFAULT_TICK_S,
+                       profiles=None):
+        """Precompute one interleaved frame sequence for several motors.
+
+        Set EN and DIR first: the current enable/direction bits are baked
+        into every frame.
+
+        :param moves: {motor_id: (steps, rate_hz)} for constant-rate moves.
+        :param tick_s: Waveform time resolution in seconds.
+        :param profiles: {motor_id: intervals} for ramped moves, where
+            intervals come from motion_profile.step_intervals().
+        :return: StepWaveform ready for play().
+        """
+        step_ticks = {}  # tick index -> OR of step bits going high then
+        steps = {}
+        moves = moves or {}
+        profiles = profiles or {}
+        for motor in list(moves) + list(profiles):
+            if motor not in self.MOTOR_MAP:
+                raise ValueError(f"Invalid motor ID: {motor}")
+            if motor in moves and motor in profiles:
+                raise ValueError(f"Motor {motor} has a move and a profile")
 
+        for motor, (count, rate_hz) in moves.items():
+            if count > 0:
+                period = 1.0 / rate_hz
+                self._add_step_ticks(
+                    step_ticks, motor, [period] * count, tick_s
+                )
+                steps[motor] = count
+        for motor, intervals in profiles.items():
+            if intervals:
+                self._add_step_ticks(step_ticks, motor, intervals, tick_s)
+                steps[motor] = len(intervals)
 
+        wave = StepWaveform(tick_s=tick_s, steps=steps)
+        base = self.bits & ~self._step_mask()
+        ticks = sorted(step_ticks)
+        for i, t in enumerate(ticks):
+            word = base | step_ticks[t]
+            wave.frames.append([(word >> 8) & 0xFF, word & 0xFF])
+            wave.holds.append(1)
+            # Drop STEP again and hold until the next rising edge (one tick
+            # of low after the last pulse keeps its width the same).
+            nxt = ticks[i + 1] if i + 1 < len(ticks) else t + 2
+            wave.frames.append([(base >> 8) & 0xFF, base & 0xFF])
+            wave.holds.append(nxt - t - 1)
+        return wave
 
+    def play(self, wave):
+        """Clock a prebuilt StepWaveform out of the shift registers.
+
+        :return: Worst lateness (seconds) of any frame against its slot.
+        """
+        xfer = self.spi.xfer2
+        pulse = self.latch.pulse
+        frames = wave.frames
+        holds = wave.holds
+        tick_s = wave.tick_s
+
+        worst = 0.0
+        deadline = time.perf_counter()
+        for i in range(len(frames)):
+            now = time.perf_counter()
+            if now < deadline:
+                _sleep_until(deadline)
+            elif now - deadline > worst:
+                worst = now - deadline
+            xfer(frames[i])
+            pulse()
+            deadline += holds[i] * tick_s
+
+        if frames:
+            high, low = frames[-1]
+            self.bits = self._sent = (high << 8) | low
+            self.flushes += len(frames)
+        return worst
+
+    def _add_step_ticks(self, step_ticks, motor, intervals, tick_s):
+        """OR motor's STEP bit into step_ticks at each step's start tick."""
+        mask = 1 << self.MOTOR_MAP[motor]['step']
+        t = 0.0
+        prev = None
+        for interval in intervals:
+            tick = int(t / tick_s + 0.5)
+            if prev is not None and tick - prev < 2:
+                raise ValueError(
+                    f"Motor {motor}: {1.0 / interval:.0f} steps/s needs a "
+                    f"tick shorter than {tick_s * 1e6:.0f} µs"
+                )
+            step_ticks[tick] = step_ticks.get(tick, 0) | mask
+            prev = tick
+            t += interval
+
+    def _step_mask(self):
+        mask = 0
+        for pins in self.MOTOR_MAP.values():
+            mask |= 1 << pins['step']
+        return mask
+
+    def close(self):
+        self.spi.close()
+        self.latch.close()
@@ -0,0 +1,165 @@
+# distributor_bench.py
+# Compare per-step Distributor.step() against a precomputed waveform,
+# using the fake SPI/latch backend so it runs on any Linux box.
+#
+# Also counts register updates for one move start/stop and for the
+# shutdown path with and without Distributor.transaction().
+#
+# Step lateness (actual - planned) for one move timed by a plain
+# sleep(next_t - now) loop vs. the step_scheduler thread, idle and with
+# busy Python threads competing for the CPU and the GIL.
+#
+# Usage: python distributor_bench.py [steps_per_motor] [rate_hz]
+
+import sys
+import threading
+import time
+
+from distributor import Distributor, FakeLatch, FakeSpi
+from step_scheduler import MoveTiming, StepScheduler
+
+MOTORS = [1, 2, 3, 4]
+STEPS = 2000
+RATE_HZ = 1000
+
+
+def _make_dist():
+    spi = FakeSpi(wire_time=True)
+    latch = FakeLatch(spi, record=False)
+    return Distributor(spi=spi, latch=latch)
+
+
+def bench_per_step(steps, rate_hz):
+    """The 8825_test_all.py pattern: step each motor in turn, then sleep."""
+    dist = _make_dist()
+    t0 = time.perf_counter()
+    for _ in range(steps):
+        for motor in MOTORS:
+            dist.step(motor)
+        time.sleep(1.0 / rate_hz)
+    return dist, time.perf_counter() - t0
+
+
+def bench_waveform(steps, rate_hz):
+    dist = _make_dist()
+    t0 = time.perf_counter()
+    wave = dist.build_waveform({m: (steps, rate_hz) for m in MOTORS})
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    worst = dist.play(wave)
+    return dist, time.perf_counter() - t0, t_build, worst, len(wave)
+
+
+def bench_move_overhead(steps=10):
+    """Register updates for enable + dir, `steps` steps, disable, then
+    the all-motors shutdown: one call at a time vs. transactions."""
+    out = {}
+    for batched in (False, True):
+        dist = _make_dist()
+        dist.disable_all()             # idle: no holding torque
+        base = dist.flushes
+        if batched:
+            with dist.transaction():
+                dist.set_enable(1, True)
+                dist.set_dir(1, 1)
+        else:
+            dist.set_enable(1, True)
+            dist.set_dir(1, 1)
+        for _ in range(steps):
+            dist.step(1, pulse_us=0)
+        dist.set_enable(1, False)
+        move = dist.flushes - base
+        with dist.transaction():       # all drivers on, then shut down
+            for m in MOTORS:
+                dist.set_enable(m, True)
+        base = dist.flushes
+        if batched:
+            dist.disable_all()
+        else:
+            for m in MOTORS:
+                dist.set_enable(m, False)
+        out[batched] = (move, dist.flushes - base)
+    return out
+
+
+def _sleep_loop_move(dist, steps, rate_hz):
+    """The old step loop: sleep(next_t - now), then step."""
+    timing = MoveTiming(1)
+    interval = 1.0 / rate_hz
+    next_t = time.perf_counter()
+    for _ in range(steps):
+        delay = next_t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        now = time.perf_counter()
+        dist.step(1, pulse_us=0)
+        next_t = timing.advance(next_t, now, interval)
+    return timing
+
+
+def bench_step_timing(steps, rate_hz, load_threads=0):
+    stop = threading.Event()
+
+    def burn():
+        while not stop.is_set():
+            sum(range(1000))
+
+    load = [threading.Thread(target=burn, daemon=True)
+            for _ in range(load_threads)]
+    for t in load:
+        t.start()
+    try:
+        plain = _sleep_loop_move(_make_dist(), steps, rate_hz)
+        scheduler = StepScheduler(_make_dist())
+        scheduler.start()
+        try:
+            move = scheduler.submit(1, 0, [1.0 / rate_hz] * steps)
+            timed = move.future.result().timing
+            mode = scheduler.mode
+        finally:
+            scheduler.stop()
+    finally:
+        stop.set()
+        for t in load:
+            t.join()
+    return plain, timed, mode
+
+
+def main():
+    steps = int(sys.argv[1]) if len(sys.argv) > 1 else STEPS
+    rate_hz = float(sys.argv[2]) if len(sys.argv) > 2 else RATE_HZ
+    total = steps * len(MOTORS)
+    print(f"{len(MOTORS)} motors x {steps} steps @ {rate_hz:.0f} steps/s")
+
+    dist, elapsed = bench_per_step(steps, rate_hz)
+    print(
+        f"per-step : {elapsed:7.3f} s  {total / elapsed:9.0f} steps/s  "
+        f"{dist.spi.transfers} xfers  {dist.latch.pulses} latches"
+    )
+
+    dist, elapsed, t_build, worst, n = bench_waveform(steps, rate_hz)
+    print(
+        f"waveform : {elapsed:7.3f} s  {total / elapsed:9.0f} steps/s  "
+        f"{dist.spi.transfers} xfers  {dist.latch.pulses} latches  "
+        f"({n} frames, built in {t_build * 1e3:.1f} ms, "
+        f"worst late {worst * 1e6:.0f} µs)"
+    )
+    print(f"ideal    : {steps / rate_hz:7.3f} s")
+
+    for batched, (move, stop) in bench_move_overhead().items():
+        name = "batched" if batched else "per-call"
+        print(f"{name:9s}: move (10 steps) {move} register updates, "
+              f"shutdown {stop}")
+
+    print(f"\nstep lateness, 1 motor x {steps} steps @ {rate_hz:.0f} "
+          "steps/s (µs bins)")
+    for load_threads in (0, 2):
+        plain, timed, mode = bench_step_timing(steps, rate_hz, load_threads)
+        for name, timing in (("sleep", plain), (f"thread/{mode}", timed)):
+            h = timing.histogram
+            print(f"{load_threads} busy, {name:15s}: {timing.late:5d} late "
+                  f"worst {h.worst_s * 1e6:6.0f}  {h.format()}")
+
+
+if __name__ == "__main__":
+    main()
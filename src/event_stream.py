@@ -0,0 +1,190 @@
+# event_stream.py
+# Fan-out of live events (PMS frames, gate moves, current-sense edges) to
+# Server-Sent Events subscribers.
+#
+# - Broadcaster.publish() encodes each event once, as a ready-to-send SSE
+#   block, into a bounded backlog. Subscribers are plain generators that
+#   wait on one shared Condition and yield whatever blocks they have not
+#   sent yet, so the per-event cost is one encode plus one socket write
+#   per viewer, and nothing re-reads the sensor.
+# - Event ids are consecutive; a reconnecting EventSource sends
+#   Last-Event-ID and resumes from the backlog. New subscribers first get
+#   the latest event of every kind so a page fills in immediately; so does
+#   a client whose Last-Event-ID is unknown here (from before a server
+#   restart, or older than the backlog), since it cannot be resumed.
+# - Idle streams get a comment line every KEEPALIVE_S so proxies keep the
+#   connection open.
+# - EventSender / EventReceiver carry events from other processes (the
+#   gate controller) to the web server as localhost UDP datagrams:
+#   fire-and-forget, so the controller never blocks on the web UI.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+BACKLOG = 256            # events kept for resuming subscribers
+KEEPALIVE_S = 15.0
+EVENT_HOST = "127.0.0.1"
+EVENT_PORT = 5055        # controller -> aqserver datagrams
+MAX_DATAGRAM = 4096
+
+KEEPALIVE = b": keepalive\n\n"
+
+
+def encode_event(event_id: int, kind: str, data: Any) -> bytes:
+    """One SSE block (data is sent as compact JSON on a single line)."""
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {kind}\ndata: {payload}\n\n".encode()
+
+
+class Broadcaster:
+    """Thread-safe SSE fan-out with a resumable backlog."""
+
+    def __init__(self, backlog: int = BACKLOG):
+        self._cond = threading.Condition()
+        self._events: Deque[Tuple[int, bytes]] = deque(maxlen=backlog)
+        self._last_by_kind: Dict[str, Tuple[int, bytes]] = {}
+        self._next_id = 1
+        self.subscribers = 0
+        self.published = 0
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+    def publish(self, kind: str, data: Any) -> int:
+        """Queue an event for every subscriber; returns its id."""
+        with self._cond:
+            event_id = self._next_id
+            block = encode_event(event_id, kind, data)
+            self._next_id += 1
+            self._events.append((event_id, block))
+            self._last_by_kind[kind] = (event_id, block)
+            self.published += 1
+            self._cond.notify_all()
+        return event_id
+
+    def _pending(self, cursor: int) -> Tuple[int, bytes]:
+        """Blocks with id >= cursor (call with the lock held)."""
+        if not self._events or cursor > self._events[-1][0]:
+            return cursor, b""
+        # Walk back from the newest; ids older than the backlog are lost.
+        blocks = []
+        for event_id, block in reversed(self._events):
+            if event_id < cursor:
+                break
+            blocks.append(block)
+        blocks.reverse()
+        return self._next_id, b"".join(blocks)
+
+    def _resumable(self, last_id: Optional[int]) -> bool:
+        """True if every event after last_id is still in the backlog
+        (call with the lock held)."""
+        if last_id is None or last_id >= self._next_id:
+            return False           # new client, or ids from before a restart
+        oldest = self._events[0][0] if self._events else self._next_id
+        return last_id + 1 >= oldest
+
+    def stream(self, last_id: Optional[int] = None,
+               keepalive_s: float = KEEPALIVE_S,
+               stop: Optional[threading.Event] = None) -> Iterator[bytes]:
+        """Yield SSE bytes for one subscriber until stop is set (or the
+        consumer goes away).
+
+        :param last_id: Last-Event-ID from a reconnecting client; None
+            for a new client, which first gets the latest of each kind.
+            An id that cannot be resumed is treated as None.
+        """
+        with self._cond:
+            self.subscribers += 1
+            if not self._resumable(last_id):
+                cursor = self._next_id
+                snapshot = sorted(self._last_by_kind.values())
+                initial = b"".join(b for _, b in snapshot)
+            else:
+                cursor = last_id + 1
+                initial = b""
+        try:
+            if initial:
+                yield initial
+            while stop is None or not stop.is_set():
+                with self._cond:
+                    if cursor >= self._next_id:
+                        self._cond.wait(keepalive_s)
+                    cursor, blocks = self._pending(cursor)
+                yield blocks or KEEPALIVE
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def wake_all(self) -> None:
+        """Wake idle subscribers (e.g. after setting their stop event)."""
+        with self._cond:
+            self._cond.notify_all()
+
+
+# ------------------------ cross-process events ----------------------- #
+
+class EventSender:
+    """Send events to an EventReceiver; never blocks or raises."""
+
+    def __init__(self, host: str = EVENT_HOST, port: int = EVENT_PORT):
+        self.addr = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self.dropped = 0
+
+    def send(self, kind: str, data: Any) -> None:
+        msg = json.dumps({"kind": kind, "data": data}).encode()
+        try:
+            self._sock.sendto(msg, self.addr)
+        except OSError:      # nobody listening, buffer full, ...
+            self.dropped += 1
+
+    def close(self) -> None:
+        self._sock.close()
+
+
+class EventReceiver:
+    """Thread that republishes received datagrams on a Broadcaster."""
+
+    def __init__(self, broadcaster: Broadcaster, host: str = EVENT_HOST,
+                 port: int = EVENT_PORT):
+        self.broadcaster = broadcaster
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.5)
+        self.addr = self._sock.getsockname()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="event-receiver", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sock.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                msg, _ = self._sock.recvfrom(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            try:
+                event = json.loads(msg)
+                self.broadcaster.publish(str(event["kind"]), event["data"])
+            except (ValueError, KeyError, TypeError):
+                print(f"event_stream: bad datagram {msg[:60]!r}")
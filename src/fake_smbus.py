@@ -0,0 +1,91 @@
+# fake_smbus.py
+# In-memory stand-in for smbus2.SMBus, for tests and benchmarks.
+#
+# Each address gets 256 byte registers (register devices such as the
+# MCP23017) plus a plain "port" byte for PCF8574-style devices that are
+# read/written without a register number. Block transfers auto-increment
+# the register like the MCP23017 in sequential (IOCON.SEQOP=0) mode.
+#
+# Every call counts as one bus transaction. With bus_hz set, calls also
+# sleep for their approximate wire time (9 bits per byte plus address and
+# start/stop) so throughput numbers look like a real 100/400 kHz bus.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+
+class FakeSMBus:
+    """smbus2.SMBus look-alike that records traffic.
+
+    :param bus_hz: Simulated I2C clock, or None for no wire time.
+    """
+
+    def __init__(self, bus_num: int = 1, bus_hz: Optional[int] = None):
+        self.bus_num = bus_num
+        self.bus_hz = bus_hz
+        self.regs: Dict[int, bytearray] = {}
+        self.port: Dict[int, int] = {}
+        self.transactions = 0
+        self.bytes = 0
+        self.calls: Counter = Counter()
+
+    # -- bookkeeping --------------------------------------------------- #
+
+    def _count(self, name: str, nbytes: int, reg_write: bool) -> None:
+        self.transactions += 1
+        self.calls[name] += 1
+        # address byte (+ register byte, + repeated-start address on reads)
+        total = nbytes + 1 + (1 if reg_write else 0)
+        if reg_write and name.startswith("read"):
+            total += 1
+        self.bytes += total
+        if self.bus_hz:
+            time.sleep(total * 9 / self.bus_hz)
+
+    def _dev(self, addr: int) -> bytearray:
+        if addr not in self.regs:
+            self.regs[addr] = bytearray(256)
+        return self.regs[addr]
+
+    def reset_counts(self) -> None:
+        self.transactions = 0
+        self.bytes = 0
+        self.calls.clear()
+
+    # -- smbus2 API ---------------------------------------------------- #
+
+    def read_byte(self, addr: int) -> int:
+        self._count("read_byte", 1, False)
+        return self.port.get(addr, 0xFF)
+
+    def write_byte(self, addr: int, value: int) -> None:
+        self._count("write_byte", 1, False)
+        self.port[addr] = value & 0xFF
+
+    def read_byte_data(self, addr: int, reg: int) -> int:
+        self._count("read_byte_data", 1, True)
+        return self._dev(addr)[reg]
+
+    def write_byte_data(self, addr: int, reg: int, value: int) -> None:
+        self._count("write_byte_data", 1, True)
+        self._dev(addr)[reg] = value & 0xFF
+
+    def read_i2c_block_data(self, addr: int, reg: int, length: int
+                            ) -> List[int]:
+        self._count("read_i2c_block_data", length, True)
+        dev = self._dev(addr)
+        return [dev[(reg + i) & 0xFF] for i in range(length)]
+
+    def write_i2c_block_data(self, addr: int, reg: int, data) -> None:
+        self._count("write_i2c_block_data", len(data), True)
+        dev = self._dev(addr)
+        for i, value in enumerate(data):
+            dev[(reg + i) & 0xFF] = value & 0xFF
+
+    def close(self) -> None:
+        pass
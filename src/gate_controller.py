@@ -0,0 +1,556 @@
+# gate_controller.py
+# Blast gates and impeller for several machines at once.
+#
+# Each machine maps an ADS1115 channel to a Distributor motor and a pair
+# of limit pins (GateConfig, overridable from gates.json). Machine edges
+# come from power_state classifiers fed by adc_scheduler, and every gate
+# move is its own motion_service task, so three machines starting
+# together open their gates in parallel.
+#
+# Gate states: closed -> [preopen ->] running -> flushing -> closed.
+#
+# - A machine ON opens its gate; the impeller SSR is switched on
+#   impeller_lead_s after the first gate starts opening, so the collector
+#   never pulls against an all-closed system.
+# - A machine OFF leaves its gate open ("flushing"). When no machine is
+#   running, the impeller keeps going for spin_down_s to clear the ducts,
+#   then turns off, and only then are the flushing gates closed. A
+#   machine restarting during spin-down just cancels the timer.
+# - Pre-open: an OnsetDetector on the raw samples sees the start-up
+#   current rise and opens the gate (and starts the impeller) before the
+#   classifier confirms ON. If ON does not follow within
+#   preopen_confirm_s, the start is backed out: the gate closes with the
+#   impeller off right away, or joins the flushing gates if other
+#   machines still need the collector.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from adc_scheduler import AdcScheduler, ChannelConfig
+from ads_sampler import Ads1115Backend
+from distributor import Distributor
+from event_stream import EventSender
+from gate_position import PositionTracker
+from i2c_arbiter import ADC, SAFETY, BusArbiter
+from input_bank import InputBank
+from motion_profile import step_intervals
+from motion_service import MotionService, MoveResult
+from motion_supervisor import MotionSupervisor
+from power_state import (
+    MIN_LEVEL_V,
+    OnsetDetector,
+    PowerClassifier,
+    PowerEdge,
+)
+from step_scheduler import StepScheduler
+from ts_store import GATE_EVENTS, TimeSeriesStore
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
+
+CONFIG_PATH = "gates.json"
+SPIN_DOWN_S = 30.0           # impeller run-on after the last machine stops
+IMPELLER_LEAD_S = 0.25       # first gate moving -> impeller on
+PREOPEN_CONFIRM_S = 2.0      # onset must be confirmed ON within this
+
+# Learned travel per gate (motion_supervisor); None = don't persist
+TRAVEL_STATE_PATH: Optional[str] = "gate_travel.json"
+# Counted gate positions (gate_position); None = don't persist
+POSITION_STATE_PATH: Optional[str] = "gate_positions.json"
+
+# Ramp profile shared by all gates (see motion_profile.py)
+GATE_TRAVEL_STEPS = 800
+GATE_MAX_SPEED = 1200.0      # steps/s cruise
+GATE_ACCEL = 4000.0          # steps/s^2
+GATE_START_SPEED = 400.0     # steps/s
+
+
+@dataclass(frozen=True)
+class GateConfig:
+    """One machine and its gate."""
+
+    machine: str
+    adc_channel: int
+    motor: int                 # Distributor.MOTOR_MAP id
+    pin_open: int              # active-low limit, flat input bit
+    pin_closed: int
+    dir_open: int = 0          # cw
+    dir_close: int = 1         # ccw
+    rate_hz: float = 160.0     # current-sense sample rate
+    min_delta_v: float = 0.30  # smallest ON step above idle (window RMS)
+    # In-window variation below which the channel counts as a flat-line
+    # fault. The sensors are DC-output and sit on one ADS1115 code (125 µV
+    # at gain 1) at idle, so 0 (no check); AC-output sensors can use a
+    # few LSB, e.g. 0.0005.
+    flat_v: float = 0.0
+    # Idle level below which the sensor counts as dead; a working
+    # DC-output sensor idles at its live zero, above this.
+    min_level_v: float = MIN_LEVEL_V
+
+    def classifier(self) -> PowerClassifier:
+        """ON/OFF classifier with this channel's thresholds."""
+        return PowerClassifier(self.machine, min_delta_v=self.min_delta_v,
+                               flat_v=self.flat_v,
+                               min_level_v=self.min_level_v)
+
+
+# Limits wired like gate 1 (OPEN = 34, CLOSED = 33 on J1)
+DEFAULT_GATES: Tuple[GateConfig, ...] = (
+    GateConfig("tablesaw", 0, 1, 34, 33, rate_hz=400.0),
+    GateConfig("lathe", 1, 2, 37, 36),
+    GateConfig("drill press", 2, 3, 24, 39),
+)
+
+
+@dataclass
+class ControllerConfig:
+    gates: Tuple[GateConfig, ...] = DEFAULT_GATES
+    impeller_pin: Optional[int] = None   # BCM pin to the SSR; None = log
+    spin_down_s: float = SPIN_DOWN_S
+    impeller_lead_s: float = IMPELLER_LEAD_S
+    preopen: bool = True
+    preopen_confirm_s: float = PREOPEN_CONFIRM_S
+
+
+def load_config(path: Optional[str] = CONFIG_PATH) -> ControllerConfig:
+    """Read gates.json if present, e.g.
+
+    {"impeller_pin": 17, "spin_down_s": 20,
+     "gates": [{"machine": "tablesaw", "adc_channel": 0, "motor": 1,
+                "pin_open": 34, "pin_closed": 33, "flat_v": 0}]}
+    """
+    if path is None or not os.path.exists(path):
+        return ControllerConfig()
+    with open(path) as f:
+        raw = json.load(f)
+    gates = tuple(GateConfig(**g) for g in raw.pop("gates", ()))
+    return ControllerConfig(gates=gates or DEFAULT_GATES, **raw)
+
+
+def channel_configs(config: ControllerConfig) -> List[ChannelConfig]:
+    """adc_scheduler channels for the configured machines."""
+    return [ChannelConfig(g.adc_channel, g.machine, g.rate_hz)
+            for g in config.gates]
+
+
+class Impeller:
+    """Dust collector impeller behind a solid-state relay.
+
+    :param pin: BCM pin driving the SSR input (HIGH = on), or None.
+    :param write: write(on) override (tests, other outputs).
+    """
+
+    def __init__(self, pin: Optional[int] = None,
+                 write: Optional[Callable[[bool], None]] = None):
+        if write is None and pin is not None:
+            if GPIO is None:
+                raise RuntimeError("RPi.GPIO is not available on this host")
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(pin, GPIO.OUT, initial=GPIO.LOW)
+            write = lambda on: GPIO.output(pin, bool(on))  # noqa: E731
+        self._write = write
+        self.on = False
+        self.switches = 0
+
+    def set(self, on: bool) -> None:
+        if on == self.on:
+            return
+        self.on = on
+        self.switches += 1
+        if self._write is not None:
+            self._write(on)
+
+
+class Gate:
+    """Runtime state of one machine's gate."""
+
+    def __init__(self, config: GateConfig):
+        self.config = config
+        self.state = "closed"      # closed, preopen, running, flushing
+        self.last_result: Optional[MoveResult] = None
+        self.classifier: Optional[PowerClassifier] = None
+        self.onset: Optional[OnsetDetector] = None
+        self._confirm: Optional[asyncio.TimerHandle] = None
+
+
+Event = Callable[[str, dict], None]
+
+
+class GateController:
+    """Sequences gates and impeller from machine power edges.
+
+    All methods except post() run on the asyncio loop.
+
+    :param svc: MotionService moving the gates.
+    :param read_inputs: Returns the 40-bit input word (limits).
+    :param intervals: Step timing table for gate moves.
+    :param on_event: on_event(kind, data) for "gate", "impeller" and
+        "machine" events (dashboard, store, console).
+    """
+
+    def __init__(self, svc: MotionService, read_inputs: Callable[[], int],
+                 config: Optional[ControllerConfig] = None,
+                 impeller: Optional[Impeller] = None,
+                 intervals: Optional[Sequence[float]] = None,
+                 on_event: Optional[Event] = None):
+        self.svc = svc
+        self._read_inputs = read_inputs
+        self.config = config or ControllerConfig()
+        self.impeller = impeller or Impeller()
+        self.intervals = intervals
+        self._on_event = on_event
+        self.gates: Dict[str, Gate] = {
+            g.machine: Gate(g) for g in self.config.gates
+        }
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lead: Optional[asyncio.TimerHandle] = None
+        self._spin_down: Optional[asyncio.TimerHandle] = None
+        self._tasks: List[asyncio.Task] = []
+        self.false_starts = 0
+
+    # ----------------------------- inputs ----------------------------- #
+
+    def bind(self) -> None:
+        """Remember the running loop (call before post() is used)."""
+        self._loop = asyncio.get_running_loop()
+
+    def post(self, edge: PowerEdge) -> None:
+        """Hand an edge to the loop; safe from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.handle, edge)
+
+    def handle(self, edge: PowerEdge) -> None:
+        gate = self.gates.get(edge.name)
+        if gate is None:
+            return
+        if edge.kind == "on":
+            self.machine_on(edge.name)
+        elif edge.kind == "off":
+            self.machine_off(edge.name)
+        elif edge.kind == "onset":
+            self.onset(edge.name)
+        self._emit("machine", {"machine": edge.name, "edge": edge.kind,
+                               "state": gate.state,
+                               "volts": round(edge.rms, 3),
+                               "detail": edge.detail})
+
+    def attach(self, scheduler: AdcScheduler) -> None:
+        """Classify the scheduler's channels and post their edges.
+
+        Classifiers run in the scheduler thread; only edges cross over.
+        """
+        for gate in self.gates.values():
+            c = gate.config
+            gate.classifier = c.classifier()
+            gate.onset = OnsetDetector(c.machine, rate_hz=c.rate_hz,
+                                       min_rise_v=c.min_delta_v / 2)
+
+        def on_window(name, stats) -> None:
+            gate = self.gates.get(name)
+            if gate is None:
+                return
+            for edge in gate.classifier.feed(stats):
+                if edge.kind == "off":
+                    gate.onset.reset()
+                self.post(edge)
+
+        def on_sample(name, t, volts) -> None:
+            gate = self.gates.get(name)
+            if gate is None or gate.classifier.on:
+                return
+            edge = gate.onset.feed(t, volts)
+            if edge is not None and self.config.preopen:
+                self.post(edge)
+
+        scheduler.add_listener(on_window)
+        scheduler.add_sample_listener(on_sample)
+
+    # ----------------------------- states ----------------------------- #
+
+    def machine_on(self, name: str) -> None:
+        gate = self.gates[name]
+        prev = gate.state
+        gate.state = "running"
+        self._cancel_confirm(gate)
+        if prev == "closed":
+            self._move(gate, True)
+        self._update_impeller()
+
+    def machine_off(self, name: str) -> None:
+        gate = self.gates[name]
+        if gate.state in ("running", "preopen"):
+            self._cancel_confirm(gate)
+            gate.state = "flushing"
+        self._update_impeller()
+
+    def onset(self, name: str) -> None:
+        """Start-up rise seen: open early, pending confirmation."""
+        gate = self.gates[name]
+        if not self.config.preopen or gate.state != "closed":
+            return
+        gate.state = "preopen"
+        self._move(gate, True)
+        gate._confirm = asyncio.get_running_loop().call_later(
+            self.config.preopen_confirm_s, self._false_start, name
+        )
+        self._update_impeller()
+
+    def _false_start(self, name: str) -> None:
+        gate = self.gates[name]
+        gate._confirm = None
+        if gate.state != "preopen":
+            return
+        self.false_starts += 1
+        others = any(g.state != "closed" for g in self.gates.values()
+                     if g is not gate)
+        if others:
+            gate.state = "flushing"    # closes with the others
+        else:
+            gate.state = "closed"
+            self._set_impeller(False)   # nothing to flush yet
+            self._move(gate, False)
+        self._emit("machine", {"machine": name, "edge": "false_start",
+                               "state": gate.state, "volts": 0.0,
+                               "detail": ""})
+        self._update_impeller()
+
+    def _cancel_confirm(self, gate: Gate) -> None:
+        if gate._confirm is not None:
+            gate._confirm.cancel()
+            gate._confirm = None
+
+    # ---------------------------- impeller ---------------------------- #
+
+    def _update_impeller(self) -> None:
+        loop = asyncio.get_running_loop()
+        states = [g.state for g in self.gates.values()]
+        if "running" in states or "preopen" in states:
+            if self._spin_down is not None:
+                self._spin_down.cancel()
+                self._spin_down = None
+            if not self.impeller.on and self._lead is None:
+                self._lead = loop.call_later(self.config.impeller_lead_s,
+                                             self._impeller_on)
+        elif "flushing" in states:
+            if not self.impeller.on:
+                # Stopped before the collector even started
+                self._impeller_off()
+            elif self._spin_down is None:
+                self._spin_down = loop.call_later(self.config.spin_down_s,
+                                                  self._impeller_off)
+        elif self._lead is not None:
+            self._lead.cancel()
+            self._lead = None
+
+    def _impeller_on(self) -> None:
+        self._lead = None
+        self._set_impeller(True)
+
+    def _impeller_off(self) -> None:
+        """Collector off, then close every flushing gate."""
+        self._spin_down = None
+        self._set_impeller(False)
+        for gate in self.gates.values():
+            if gate.state == "flushing":
+                gate.state = "closed"
+                self._move(gate, False)
+
+    def _set_impeller(self, on: bool) -> None:
+        if not on and self._lead is not None:
+            self._lead.cancel()
+            self._lead = None
+        if on != self.impeller.on:
+            self.impeller.set(on)
+            self._emit("impeller", {"on": on})
+
+    # ------------------------------ gates ----------------------------- #
+
+    def resume(self) -> None:
+        """Start-up: close every gate that is not on its closed limit.
+
+        Gates found closed just re-reference their step count (no homing
+        move); with a PositionTracker the others keep their saved
+        position while they close.
+        """
+        positions = self.svc.positions
+        word = self._read_inputs()
+        for gate in self.gates.values():
+            c = gate.config
+            if (word >> c.pin_closed) & 1:
+                self._move(gate, opening=False)
+            elif positions is not None:
+                positions.closed(c.motor)
+
+    def _move(self, gate: Gate, opening: bool) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._run_move(gate, opening)
+        )
+        self._tasks.append(task)
+        task.add_done_callback(self._tasks.remove)
+
+    async def _run_move(self, gate: Gate, opening: bool) -> None:
+        """Move one gate to a limit; a newer move on the same motor
+        cancels this one (start_move does that)."""
+        c = gate.config
+        if opening:
+            target, other, direction = c.pin_open, c.pin_closed, c.dir_open
+        else:
+            target, other, direction = c.pin_closed, c.pin_open, c.dir_close
+        if not (self._read_inputs() >> target) & 1:
+            # Already there: stop any move, but still report the state
+            # so the dashboard and gate log don't keep the last one
+            self.svc.cancel(c.motor)
+            data = {"gate": c.motor, "machine": c.machine,
+                    "state": "open" if opening else "closed",
+                    "steps": 0, "elapsed_s": 0.0}
+            if self.svc.positions is not None:
+                data["fraction_open"] = self.svc.positions.fraction_open(
+                    c.motor)
+            self._emit("gate", data)
+            return
+        self._emit("gate", {"gate": c.motor, "machine": c.machine,
+                            "state": "opening" if opening else "closing",
+                            "steps": 0, "elapsed_s": 0.0})
+        move = self.svc.start_move(c.motor, direction, target, other,
+                                   self.intervals)
+        result = await move
+        gate.last_result = result
+        if result.reason == "limit":
+            state = "open" if opening else "closed"
+        else:
+            state = result.reason
+        data = {"gate": c.motor, "machine": c.machine, "state": state,
+                "steps": result.steps,
+                "elapsed_s": round(result.elapsed_s, 3)}
+        if self.svc.positions is not None:
+            data["fraction_open"] = self.svc.positions.fraction_open(c.motor)
+        if result.timing is not None:
+            # Late steps are where a loaded gate motor stalls
+            data["late_steps"] = result.timing.late
+            data["worst_late_us"] = round(
+                result.timing.histogram.worst_s * 1e6)
+        self._emit("gate", data)
+
+    async def stop(self) -> None:
+        """Impeller off and every move stopped (drivers disabled)."""
+        for handle in (self._lead, self._spin_down):
+            if handle is not None:
+                handle.cancel()
+        self._lead = self._spin_down = None
+        for gate in self.gates.values():
+            self._cancel_confirm(gate)
+        self._set_impeller(False)
+        await self.svc.stop_all()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _emit(self, kind: str, data: dict) -> None:
+        if self._on_event is not None:
+            self._on_event(kind, data)
+
+
+# ------------------------------- main -------------------------------- #
+
+async def _run(controller: GateController, scheduler: AdcScheduler,
+               inputs: InputBank) -> None:
+    controller.bind()
+    controller.resume()
+
+    def _on_inputs(snap, changed: int) -> None:
+        # A limit edge wakes a sleeping move instead of waiting for a step
+        if changed:
+            controller.svc.notify_inputs()
+
+    inputs.add_listener(_on_inputs)
+    controller.attach(scheduler)
+    scheduler.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        scheduler.stop()
+        await controller.stop()
+
+
+def main() -> None:
+    config = load_config()
+    dist = Distributor()
+    atexit.register(dist.close)
+    dist.reset()
+    # One owner for I2C bus 1: limit inputs before ADC reads
+    i2c = BusArbiter()
+    inputs = InputBank(bus=i2c.client("inputs", SAFETY))
+    inputs.start()
+    steps = StepScheduler(dist)
+    steps.start()
+    positions = PositionTracker(
+        POSITION_STATE_PATH, {g.motor: g.dir_open for g in config.gates}
+    )
+    svc = MotionService(dist, inputs.word,
+                        MotionSupervisor(state_path=TRAVEL_STATE_PATH),
+                        steps, positions)
+    scheduler = AdcScheduler(Ads1115Backend(i2c.client("ads1115", ADC),
+                                            gain=1),
+                             channel_configs(config))
+    sender = EventSender()
+    store = TimeSeriesStore()
+    atexit.register(store.close)
+
+    def on_event(kind: str, data: dict) -> None:
+        print(f"[{kind}] {data}")
+        if kind == "machine":
+            # flushing: machine already off, gate closes after the flush
+            on = data["state"] in ("running", "preopen")
+            sender.send("current", {"machine": data["machine"], "on": on,
+                                    "volts": data["volts"]})
+        else:
+            sender.send(kind, data)
+        if kind == "gate" and data["state"] in GATE_EVENTS:
+            store.append("gate", (time.time(), data["gate"],
+                                  GATE_EVENTS.index(data["state"]),
+                                  data["steps"], data["elapsed_s"]))
+
+    controller = GateController(
+        svc, inputs.word, config, Impeller(config.impeller_pin),
+        step_intervals(GATE_TRAVEL_STEPS, GATE_MAX_SPEED, GATE_ACCEL,
+                       GATE_START_SPEED),
+        on_event,
+    )
+    print("Gate controller: "
+          + ", ".join(f"{g.machine} (ch{g.adc_channel} -> motor {g.motor})"
+                      for g in config.gates)
+          + f"; spin-down {config.spin_down_s:g} s.")
+    try:
+        asyncio.run(_run(controller, scheduler, inputs))
+    except KeyboardInterrupt:
+        print("\nInterrupted.")
+    finally:
+        mode = steps.mode
+        stopped = steps.stop()
+        print(f"Step timing ({mode}): "
+              f"{steps.histogram.format() or 'no steps'} µs")
+        if not stopped:
+            # Still stepping: the Distributor is not ours to touch
+            print("Step thread did not stop; drivers left to it.")
+        else:
+            # Disable all motors on exit (one register update)
+            try:
+                dist.disable_all()
+            except Exception:
+                pass
+        inputs.stop()
+        print(i2c.format_report())
+        print("Stopped. Impeller off, drivers disabled.")
+
+
+if __name__ == "__main__":
+    main()
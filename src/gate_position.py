@@ -0,0 +1,158 @@
+# gate_position.py
+# Gate position by step counting.
+#
+# Limit switches only say "open" or "closed". PositionTracker counts the
+# net steps of every move per motor, referenced to the closed limit, so
+# a gate between its limits still has a position and a fraction open:
+#
+# - Reaching the closed limit zeroes the count; reaching the open limit
+#   after a counted travel learns the gate's travel (closed -> open).
+# - A move that ends in a fault (timeout, both limits, step cap) may
+#   have lost steps, so the position becomes unknown until the next
+#   limit.
+# - The positions go to a small JSON file when a move starts and ends.
+#   A move still marked as running on load was interrupted (crash, power
+#   cut), so that gate comes back unknown; every other gate resumes from
+#   its saved count without re-homing.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+OPEN_DIRECTION = 1           # DIR level that opens, unless set per motor
+LOST_REASONS = ("timeout", "both_limits", "max_steps", "error")
+
+
+@dataclass
+class GatePosition:
+    """Where one gate is, in steps from its closed limit."""
+
+    steps: int = 0
+    travel: Optional[int] = None   # closed -> open, once measured
+    known: bool = False            # count is referenced to a limit
+    moving: bool = False
+
+    @property
+    def fraction_open(self) -> Optional[float]:
+        """0.0 closed .. 1.0 open, or None if not known yet."""
+        if not self.known or not self.travel:
+            return None
+        return min(max(self.steps / self.travel, 0.0), 1.0)
+
+
+class PositionTracker:
+    """Net step count, travel and fraction open per motor.
+
+    Moves report begin(), progress() as steps go out, and end().
+
+    :param state_path: Optional JSON file the positions persist to.
+    :param open_dirs: {motor: DIR level that opens}; default
+        OPEN_DIRECTION.
+    """
+
+    def __init__(self, state_path: Optional[str] = None,
+                 open_dirs: Optional[Dict[int, int]] = None):
+        self.state_path = state_path
+        self.open_dirs: Dict[int, int] = dict(open_dirs or {})
+        self.positions: Dict[int, GatePosition] = {}
+        self._moves: Dict[int, Tuple[int, int]] = {}   # start, sign
+        if state_path and os.path.exists(state_path):
+            self.load()
+
+    def __getitem__(self, motor: int) -> GatePosition:
+        return self.positions.setdefault(motor, GatePosition())
+
+    def fraction_open(self, motor: int) -> Optional[float]:
+        return self[motor].fraction_open
+
+    # ---------------------------------------------------------------- #
+
+    def begin(self, motor: int, direction: int) -> None:
+        """A move on motor starts stepping in direction."""
+        pos = self[motor]
+        opening = direction == self.open_dirs.get(motor, OPEN_DIRECTION)
+        self._moves[motor] = (pos.steps, 1 if opening else -1)
+        pos.moving = True
+        self._save()
+
+    def progress(self, motor: int, steps: int) -> None:
+        """steps have gone out since begin(); cheap, no file I/O."""
+        move = self._moves.get(motor)
+        if move is not None:
+            self[motor].steps = move[0] + move[1] * steps
+
+    def end(self, motor: int, steps: Optional[int], reason: str) -> None:
+        """The move is over after steps (None: as last reported).
+
+        A "limit" end references the count to that limit.
+        """
+        if steps is not None:
+            self.progress(motor, steps)
+        move = self._moves.pop(motor, None)
+        pos = self[motor]
+        pos.moving = False
+        if reason == "limit" and move is not None:
+            if move[1] < 0:
+                pos.steps = 0
+                pos.known = True
+            elif pos.known:
+                pos.travel = pos.steps
+            elif pos.travel:
+                pos.steps = pos.travel
+                pos.known = True
+        elif reason in LOST_REASONS:
+            pos.known = False
+        self._save()
+
+    def closed(self, motor: int) -> None:
+        """The closed limit reads active with no move running."""
+        pos = self[motor]
+        if not pos.known or pos.steps != 0:
+            pos.steps = 0
+            pos.known = True
+            self._save()
+
+    def steps_to(self, motor: int, fraction: float
+                 ) -> Optional[Tuple[int, int]]:
+        """(direction, steps) that take motor to fraction open.
+
+        :return: None while the position or travel is not known.
+        """
+        pos = self[motor]
+        if pos.fraction_open is None:
+            return None
+        target = round(min(max(fraction, 0.0), 1.0) * pos.travel)
+        open_dir = self.open_dirs.get(motor, OPEN_DIRECTION)
+        delta = target - pos.steps
+        return (open_dir if delta >= 0 else 1 - open_dir), abs(delta)
+
+    # ---------------------------------------------------------------- #
+
+    def _save(self) -> None:
+        if self.state_path:
+            self.save()
+
+    def save(self) -> None:
+        data = {str(m): asdict(p) for m, p in self.positions.items()}
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.state_path)
+
+    def load(self) -> None:
+        for motor, pos in load_positions(self.state_path).items():
+            if pos.moving:             # interrupted mid-move
+                pos.known = pos.moving = False
+            self.positions[motor] = pos
+
+
+def load_positions(path: str) -> Dict[int, GatePosition]:
+    """Read a state file as saved, e.g. from a display process."""
+    with open(path) as f:
+        data = json.load(f)
+    return {int(m): GatePosition(**item) for m, item in data.items()}
@@ -0,0 +1,180 @@
+import time
+from abc import ABC, abstractmethod
+
+from distributor import DEFAULT_TICK_S
+
+
+def _sleep_until(deadline):
+    """Sleep until time.perf_counter() reaches deadline."""
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+class StepBackend(ABC):
+    """How a StepperActuator8825 drives its DRV8825's EN/DIR/STEP lines.
+
+    step_batch() issues a run of steps from a timing table in one call,
+    so fast backends can precompute and stream them. max_step_rate_hz is
+    the fastest step rate the backend can sustain; actuators clamp their
+    speed to it.
+    """
+
+    max_step_rate_hz = 500.0
+
+    @abstractmethod
+    def enable(self):
+        """Enable the driver (coils energised)."""
+
+    @abstractmethod
+    def disable(self):
+        """Disable the driver (no holding torque)."""
+
+    @abstractmethod
+    def set_direction(self, direction):
+        """Set DIR (0 or 1)."""
+
+    @abstractmethod
+    def step_batch(self, intervals):
+        """
+        Issue len(intervals) steps.
+
+        Step k goes out sum(intervals[:k]) seconds after the call, and the
+        call returns sum(intervals) seconds after it started, ready for
+        the next batch.
+
+        :param intervals: Seconds from each step to the next.
+        :return: Number of steps issued.
+        """
+
+    def close(self):
+        pass
+
+
+class Mcp23017StepBackend(StepBackend):
+    """STEP/DIR/EN on MCP23017 pins via digitalio (one I2C write per edge).
+
+    Every edge is an I2C transaction, which caps the step rate well below
+    what the gate needs; see DistributorStepBackend.
+    """
+
+    max_step_rate_hz = 500.0
+
+    def __init__(self, mcp, dir_pin, step_pin, en_pin):
+        """
+        :param mcp: MCP23017 instance.
+        :param dir_pin: MCP pin for DIR.
+        :param step_pin: MCP pin for STEP.
+        :param en_pin: MCP pin for EN (active LOW).
+        """
+        self.mcp = mcp
+        self.dir_pin = mcp.get_pin(dir_pin)
+        self.step_pin = mcp.get_pin(step_pin)
+        self.en_pin = mcp.get_pin(en_pin)
+        self.dir_pin.direction = True
+        self.step_pin.direction = True
+        self.en_pin.direction = True
+
+    def enable(self):
+        self.en_pin.value = False  # active LOW
+
+    def disable(self):
+        self.en_pin.value = True
+
+    def set_direction(self, direction):
+        self.dir_pin.value = direction
+
+    def step_batch(self, intervals):
+        t = time.perf_counter()
+        for interval in intervals:
+            _sleep_until(t)
+            self.step_pin.value = True
+            self.step_pin.value = False
+            t += interval
+        _sleep_until(t)
+        return len(intervals)
+
+
+class DistributorStepBackend(StepBackend):
+    """One motor of the SPI shift-register Distributor.
+
+    Batches are compiled into a Distributor waveform and streamed out, so
+    the step rate is limited by the waveform tick, not the bus.
+    """
+
+    def __init__(self, distributor, motor):
+        """
+        :param distributor: distributor.Distributor instance.
+        :param motor: Motor ID in Distributor.MOTOR_MAP.
+        """
+        if motor not in distributor.MOTOR_MAP:
+            raise ValueError(f"Invalid motor ID: {motor}")
+        self.dist = distributor
+        self.motor = motor
+
+    @property
+    def max_step_rate_hz(self):
+        # One tick high, at least one tick low per step
+        return 1.0 / (2 * DEFAULT_TICK_S)
+
+    def enable(self):
+        self.dist.set_enable(self.motor, True)
+
+    def disable(self):
+        self.dist.set_enable(self.motor, False)
+
+    def set_direction(self, direction):
+        self.dist.set_dir(self.motor, direction)
+
+    def step_batch(self, intervals):
+        if not intervals:
+            return 0
+        t0 = time.perf_counter()
+        wave = self.dist.build_waveform(profiles={self.motor: intervals})
+        self.dist.play(wave)
+        _sleep_until(t0 + sum(intervals))
+        return len(intervals)
+
+
+class SimulatedStepBackend(StepBackend):
+    """Counts steps instead of moving anything.
+
+    :param max_step_rate_hz: Rate limit to report.
+    :param realtime: Sleep through the step timing like real hardware.
+    :param on_step: Optional callback(position) after every step, e.g.
+        to drive simulated limit switches.
+    """
+
+    def __init__(self, max_step_rate_hz=5000.0, realtime=False,
+                 on_step=None):
+        self.max_step_rate_hz = max_step_rate_hz
+        self.realtime = realtime
+        self.on_step = on_step
+        self.enabled = False
+        self.direction = 0
+        self.position = 0      # net steps, direction 1 counts up
+        self.steps_issued = 0
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def set_direction(self, direction):
+        self.direction = 1 if direction else 0
+
+    def step_batch(self, intervals):
+        t = time.perf_counter()
+        for interval in intervals:
+            if self.realtime:
+                _sleep_until(t)
+            if self.enabled:
+                self.position += 1 if self.direction else -1
+            self.steps_issued += 1
+            if self.on_step is not None:
+                self.on_step(self.position)
+            t += interval
+        if self.realtime:
+            _sleep_until(t)
+        return len(intervals)
@@ -1,11 +1,23 @@
-import time
-
-from src.actuator import Actuator
+from actuator import Actuator
+from hardware.step_backends import Mcp23017StepBackend
+from motion_profile import step_intervals
+from motion_supervisor import (
+    BUDGET_MARGIN,
+    DEADLINE_SLACK_S,
+    MotionFault,
+    MotionSupervisor,
+)
 
 class StepperActuator8825(Actuator):
-    """Stepper actuator using DRV8825 or TMC2209 via MCP23017.
+    """Stepper actuator using DRV8825 or TMC2209.
+
+    Includes limit switch integration and homing behavior. EN/DIR/STEP
+    go through a pluggable StepBackend (see step_backends.py): MCP23017
+    pins by default, or the SPI Distributor, or a simulation.
 
-    Includes limit switch integration and homing behavior.
+    Every move, homing included, is bounded by a MotionSupervisor step
+    budget and deadline; a gate that does not reach its limit raises
+    MotionFault instead of stepping forever.
 
     Note:
         The driver’s microstepping mode is configured via physical DIP
@@ -30,13 +42,20 @@ class StepperActuator8825(Actuator):
         switch_controller,
         steps_per_action=900,
         delay=0.002,
+        max_speed=None,
+        accel=None,
+        profile_shape="trapezoid",
+        backend=None,
+        batch_steps=1,
+        supervisor=None,
+        tracker=None,
     ):
         """
         Initialize a stepper actuator.
 
         :param id: Unique actuator ID.
         :param name: Descriptive name for the actuator.
-        :param mcp: MCP23017 instance.
+        :param mcp: MCP23017 instance (unused if backend is given).
         :param dir_pin: MCP pin for DIR.
         :param step_pin: MCP pin for STEP.
         :param en_pin: MCP pin for EN (active LOW).
@@ -45,76 +64,183 @@ class StepperActuator8825(Actuator):
         :param switch_controller: SwitchController instance.
         :param steps_per_action: Max steps to take if limit not hit.
         :param delay: Delay between steps (in seconds).
+        :param max_speed: Cruise speed (steps/s) for ramped moves. If None,
+            open/close step at the fixed `delay` rate.
+        :param accel: Ramp acceleration (steps/s^2); required with
+            max_speed.
+        :param profile_shape: "trapezoid" or "scurve".
+        :param backend: StepBackend; defaults to MCP23017 pins.
+        :param batch_steps: Steps handed to the backend between limit
+            switch checks.
+        :param supervisor: MotionSupervisor to learn travel and report
+            faults to; a private one is created if None.
+        :param tracker: Optional gate_position.PositionTracker counting
+            this actuator's steps (keyed by id; direction 1 opens).
         """
         super().__init__(id, name)
         self.mcp = mcp
-        self.dir_pin = self.mcp.get_pin(dir_pin)
-        self.step_pin = self.mcp.get_pin(step_pin)
-        self.en_pin = self.mcp.get_pin(en_pin)
+        if backend is None:
+            backend = Mcp23017StepBackend(mcp, dir_pin, step_pin, en_pin)
+        self.backend = backend
+        self.batch_steps = max(1, batch_steps)
+        self.supervisor = supervisor or MotionSupervisor()
+        self.tracker = tracker
         self.switch_controller = switch_controller
         self.limit_switch_open_id = limit_switch_open_id
         self.limit_switch_closed_id = limit_switch_closed_id
         self.steps_per_action = steps_per_action
         self.delay = delay
+        self.max_speed = max_speed
+        self.accel = accel
+        self.profile_shape = profile_shape
         self.position = "unknown"
 
-        self.dir_pin.direction = True
-        self.step_pin.direction = True
-        self.en_pin.direction = True
         self.disable()
         self.home()
 
+    @property
+    def fraction_open(self):
+        """Counted position, 0.0 closed .. 1.0 open; None if unknown."""
+        if self.tracker is None:
+            return None
+        return self.tracker.fraction_open(self.id)
+
+    @property
+    def max_step_rate_hz(self):
+        """Fastest step rate the backend supports."""
+        return self.backend.max_step_rate_hz
+
     def enable(self):
         """Enable stepper driver (EN active LOW)."""
-        self.en_pin.value = False
+        self.backend.enable()
 
     def disable(self):
         """Disable stepper driver."""
-        self.en_pin.value = True
+        self.backend.disable()
+
+    def move(self, direction, target_switch_id, other_switch_id=None):
+        """Move in direction until limit switch is hit.
 
-    def move(self, direction, target_switch_id):
-        """Move in direction until limit switch is hit or max steps."""
-        self.dir_pin.value = direction
+        :raises MotionFault: If the limit is not reached within the step
+            budget (at most steps_per_action) or the deadline.
+        """
+        intervals = self._intervals()
+        full_travel = other_switch_id is not None and (
+            self.switch_controller.read_switch(other_switch_id)
+        )
+        guard = self.supervisor.start(
+            self.id, direction, full_travel,
+            default_steps=self.steps_per_action,
+            default_deadline_s=self._default_deadline(sum(intervals)),
+        )
+        max_steps = min(guard.max_steps, self.steps_per_action)
+        self.backend.set_direction(direction)
         self.enable()
+        self._track_begin(direction)
         step_counter = 0
-
-        while step_counter < self.steps_per_action:
-            if self.switch_controller.read_switch(target_switch_id):
-                print(f"{self.name} limit switch {target_switch_id} hit.")
-                break
-
-            self.step_pin.value = True
-            time.sleep(self.delay)
-            self.step_pin.value = False
-            time.sleep(self.delay)
-            step_counter += 1
-
-        self.disable()
+        reason = "error"
+        try:
+            while not self.switch_controller.read_switch(target_switch_id):
+                if step_counter >= max_steps:
+                    raise MotionFault(guard.fail(
+                        "step_budget", step_counter,
+                        f"budget {max_steps} steps",
+                    ))
+                guard.check(step_counter)
+                end = min(step_counter + self.batch_steps, max_steps)
+                step_counter += self.backend.step_batch(
+                    intervals[step_counter:end]
+                )
+                self._track_progress(step_counter)
+            reason = "limit"
+        finally:
+            self.disable()
+            self._track_end(step_counter, reason)
+        print(f"{self.name} limit switch {target_switch_id} hit.")
+        guard.finish(step_counter)
+
+    def _intervals(self):
+        """Step timing table for one open/close move.
+
+        Ramped when max_speed/accel are set, otherwise a fixed
+        2 * delay per step as before. Either way no faster than the
+        backend's max_step_rate_hz.
+        """
+        min_interval = 1.0 / self.backend.max_step_rate_hz
+        if self.max_speed is None or self.accel is None:
+            interval = max(2 * self.delay, min_interval)
+            return (interval,) * self.steps_per_action
+        return step_intervals(
+            self.steps_per_action,
+            min(self.max_speed, self.backend.max_step_rate_hz),
+            self.accel,
+            shape=self.profile_shape,
+        )
+
+    @staticmethod
+    def _default_deadline(travel_s):
+        """Deadline for a move of travel_s before any travel is learned."""
+        return travel_s * BUDGET_MARGIN + DEADLINE_SLACK_S
 
     def open(self):
         """Move actuator to the open position."""
         print(f"{self.name} opening...")
-        self.move(direction=1, target_switch_id=self.limit_switch_open_id)
+        self.position = "unknown"
+        self.move(1, self.limit_switch_open_id, self.limit_switch_closed_id)
         self.position = "open"
 
     def close(self):
         """Move actuator to the closed position."""
         print(f"{self.name} closing...")
-        self.move(direction=0, target_switch_id=self.limit_switch_closed_id)
+        self.position = "unknown"
+        self.move(0, self.limit_switch_closed_id, self.limit_switch_open_id)
         self.position = "closed"
 
     def home(self):
-        """Home actuator to the closed position on startup."""
+        """Home actuator to the closed position on startup.
+
+        The gate may start anywhere, so homing allows the learned closing
+        budget (or twice steps_per_action before any travel is known).
+
+        :raises MotionFault: If the closed switch never reads true.
+        """
         print(f"{self.name} homing to 'closed' position...")
-        self.dir_pin.value = 0
+        interval = max(2 * self.delay, 1.0 / self.backend.max_step_rate_hz)
+        default_steps = 2 * self.steps_per_action
+        guard = self.supervisor.start(
+            self.id, 0, full_travel=False,
+            default_steps=default_steps,
+            default_deadline_s=self._default_deadline(
+                default_steps * interval
+            ),
+        )
+        self.backend.set_direction(0)
         self.enable()
-        while not self.switch_controller.read_switch(
-            self.limit_switch_closed_id
-        ):
-            self.step_pin.value = True
-            time.sleep(self.delay)
-            self.step_pin.value = False
-            time.sleep(self.delay)
-        self.disable()
+        self._track_begin(0)
+        steps = 0
+        reason = "error"
+        try:
+            while not self.switch_controller.read_switch(
+                self.limit_switch_closed_id
+            ):
+                guard.check(steps)
+                steps += self.backend.step_batch((interval,))
+                self._track_progress(steps)
+            reason = "limit"
+        finally:
+            self.disable()
+            self._track_end(steps, reason)
         self.position = "closed"
         print(f"{self.name} homed successfully to CLOSED position.")
+
+    def _track_begin(self, direction):
+        if self.tracker is not None:
+            self.tracker.begin(self.id, direction)
+
+    def _track_progress(self, steps):
+        if self.tracker is not None:
+            self.tracker.progress(self.id, steps)
+
+    def _track_end(self, steps, reason):
+        if self.tracker is not None:
+            self.tracker.end(self.id, steps, reason)
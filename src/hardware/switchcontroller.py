@@ -1,34 +1,65 @@
-import smbus2
 import time
 
+try:
+    import smbus2
+except ImportError:  # not on a Pi: pass bus= (e.g. FakeSMBus) instead
+    smbus2 = None
+
+# MCP23017 registers (IOCON.BANK = 0: A/B pairs are adjacent, so one
+# sequential block transfer covers both ports)
+IODIRA = 0x00
+GPINTENA = 0x04
+INTCONA = 0x08
+IOCON = 0x0A
+GPPUA = 0x0C
+GPIOA = 0x12
+
 
 class SwitchController:
     """Class to handle 16 switch inputs using MCP23017
     with efficient XOR-based change detection.
+
+    Debounce modes:
+        "timed": each sample is time-stamped; a bit's new level is
+            accepted once it has held for debounce_time. Never sleeps.
+        "sleep": legacy behaviour; on any change, sleep debounce_time
+            and re-read.
     """
 
-    def __init__(self, address=0x20, bus_num=1, debounce_time=0.02):
+    DEBOUNCE_MODES = ("timed", "sleep")
+
+    def __init__(self, address=0x20, bus_num=1, debounce_time=0.02,
+                 debounce_mode="timed", bus=None):
         """
         Initialize the MCP23017 for switch input.
 
         :param address: I2C address of the MCP23017 (default: 0x20)
         :param bus_num: I2C bus number (default: 1)
         :param debounce_time: Debounce delay in seconds (default: 0.02s)
+        :param debounce_mode: "timed" (default) or "sleep"
+        :param bus: Existing SMBus-like handle (default: open bus_num)
         """
+        if debounce_mode not in self.DEBOUNCE_MODES:
+            raise ValueError(f"Unknown debounce mode: {debounce_mode}")
         self.address = address
-        self.bus = smbus2.SMBus(bus_num)
+        self.bus = bus if bus is not None else smbus2.SMBus(bus_num)
         self.debounce_time = debounce_time
+        self.debounce_mode = debounce_mode
+
+        # Shadow of the configuration registers we have written, so
+        # repeated configuration costs no bus traffic.
+        self._regs = {}
 
-        # Configure all pins as inputs (IODIR = 0xFF)
-        self.bus.write_byte_data(self.address, 0x00, 0xFF)  # IODIRA (Port A)
-        self.bus.write_byte_data(self.address, 0x01, 0xFF)  # IODIRB (Port B)
+        # Configure all pins as inputs (IODIR = 0xFF) with pull-ups
+        self._write_pair(IODIRA, 0xFFFF)
+        self._write_pair(GPPUA, 0xFFFF)
 
-        # Enable pull-up resistors for both ports (GPPU = 0xFF)
-        self.bus.write_byte_data(self.address, 0x0C, 0xFF)  # GPPUA (Port A)
-        self.bus.write_byte_data(self.address, 0x0D, 0xFF)  # GPPUB (Port B)
+        # Store last stable switch states (primed from the first sample)
+        self.last_states = self._read_raw_states()
 
-        # Store last stable switch states (initialized to all unpressed)
-        self.last_states = 0xFFFF  # All 16 bits high (pull-ups active)
+        # "timed" mode: last raw sample and when each bit last changed
+        self._raw = self.last_states
+        self._changed_at = [time.monotonic()] * 16
 
     def _read_raw_states(self):
         """
@@ -36,20 +67,90 @@ class SwitchController:
 
         :return: 16-bit integer where each bit represents a switch state.
         """
-        value_a = self.bus.read_byte_data(self.address, 0x12)  # GPIOA
-        value_b = self.bus.read_byte_data(self.address, 0x13)  # GPIOB
+        # GPIOA, GPIOB in one sequential read
+        value_a, value_b = self.bus.read_i2c_block_data(
+            self.address, GPIOA, 2
+        )
         return (value_b << 8) | value_a  # Combine ports
 
-    def read_switch(self, switch_id):
+    def _write_pair(self, reg_a, value):
         """
-        Reads switch n, debounces if needed, and returns its stable state.
+        Write a 16-bit A/B register pair in one transaction, if changed.
 
-        :param switch_id: Switch ID (0-15)
-        :return: True if the switch is pressed, False otherwise.
+        :param reg_a: Port A register address (port B is reg_a + 1).
+        :param value: 16-bit value, port A in the low byte.
         """
-        if not 0 <= switch_id < 16:
-            raise ValueError("Switch ID must be between 0 and 15")
+        if self._regs.get(reg_a) == value:
+            return
+        self.bus.write_i2c_block_data(
+            self.address, reg_a, [value & 0xFF, (value >> 8) & 0xFF]
+        )
+        self._regs[reg_a] = value
+
+    def _write_reg(self, reg, value):
+        """Write one 8-bit register, if changed."""
+        if self._regs.get(reg) == value:
+            return
+        self.bus.write_byte_data(self.address, reg, value)
+        self._regs[reg] = value
+
+    def enable_interrupts(self):
+        """Drive INTA/INTB low whenever any switch input changes.
+
+        IOCON.MIRROR ties INTA and INTB together and IOCON.ODR makes them
+        open-drain, so one pulled-up GPIO line (shareable with other
+        expanders) covers all 16 switches. Reading GPIO clears it.
+        """
+        self._write_reg(IOCON, 0x44)         # MIRROR | ODR, BANK = 0
+        self._write_pair(INTCONA, 0x0000)    # compare to previous value
+        self._write_pair(GPINTENA, 0xFFFF)   # all pins
+        self._read_raw_states()  # clear anything already pending
+
+    def wait_for_change(self, interrupt, timeout):
+        """
+        Block until the INT line fires (or timeout), then sample once.
+
+        :param interrupt: InterruptSource (e.g. GpioInterrupt) on the INT
+            line.
+        :param timeout: Seconds to wait before sampling anyway.
+        :return: Raw 16-bit switch state.
+        """
+        interrupt.wait(timeout)
+        return self._read_raw_states()
 
+    def read_all(self):
+        """
+        Sample both ports once and return the debounced switch word.
+
+        :return: 16-bit stable state, one bit per switch (Active LOW).
+        """
+        if self.debounce_mode == "sleep":
+            return self._read_all_sleep()
+
+        raw = self._read_raw_states()
+        now = time.monotonic()
+
+        # Time-stamp bits whose raw level changed since the last sample
+        changed = raw ^ self._raw
+        self._raw = raw
+        while changed:
+            bit = changed & -changed
+            self._changed_at[bit.bit_length() - 1] = now
+            changed ^= bit
+
+        # Accept bits that differ from stable and have held long enough
+        pending = raw ^ self.last_states
+        while pending:
+            bit = pending & -pending
+            held = now - self._changed_at[bit.bit_length() - 1]
+            if held >= self.debounce_time:
+                self.last_states ^= bit
+            pending ^= bit
+
+        return self.last_states
+
+    def _read_all_sleep(self):
+        """Legacy debounce: block debounce_time on any change."""
         # Read all switch states
         new_states = self._read_raw_states()
 
@@ -62,17 +163,44 @@ class SwitchController:
             if debounced_states == new_states:
                 self.last_states = debounced_states
 
+        return self.last_states
+
+    def read_switch(self, switch_id):
+        """
+        Reads switch n, debounces if needed, and returns its stable state.
+
+        :param switch_id: Switch ID (0-15)
+        :return: True if the switch is pressed, False otherwise.
+        """
+        if not 0 <= switch_id < 16:
+            raise ValueError("Switch ID must be between 0 and 15")
+
         # Return the stable state of the requested switch (Active LOW)
-        return not bool(self.last_states & (1 << switch_id))
+        return not bool(self.read_all() & (1 << switch_id))
+
 
+# BCM pin wired to INTA/INTB, or None to poll
+SWITCH_INT_PIN = None
 
 # Example usage
 if __name__ == "__main__":
     switches = SwitchController()
 
+    if SWITCH_INT_PIN is not None:
+        from input_interrupt import GpioInterrupt
+
+        irq = GpioInterrupt({SWITCH_INT_PIN: (0,)})
+        switches.enable_interrupts()
+        while True:
+            # Sleeps until a switch changes; 1 s fallback poll
+            states = switches.wait_for_change(irq, 1.0)
+            pressed = [i for i in range(16) if not states & (1 << i)]
+            print(f"Pressed: {pressed}")
+
     while True:
+        states = switches.read_all()  # One sample covers all 16 switches
         for i in range(16):
-            if switches.read_switch(i):  # Call read_switch() for each switch
+            if not states & (1 << i):
                 print(f"Switch {i} is pressed")
 
         time.sleep(0.1)  # Small delay to avoid excessive polling
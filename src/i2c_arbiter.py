@@ -0,0 +1,287 @@
+# i2c_arbiter.py
+# One owner for I2C bus 1, with transactions granted in priority order.
+#
+# The input expanders, the ADS1115, the LED expander, the OLEDs and the
+# LCDs used to open /dev/i2c-1 independently, so a display refresh could
+# hold up a limit-switch read. BusArbiter owns the single SMBus handle;
+# every device gets an ArbitratedBus client with a priority instead:
+#
+#   SAFETY (limit switches, inputs) > ADC > LEDS > DISPLAY
+#
+# - Each smbus2 call on a client is one bus transaction. When the bus is
+#   busy, waiting transactions are granted highest priority first (FIFO
+#   within a priority), so a queue of display writes never delays a
+#   safety read by more than the transaction already on the wire.
+# - client.transaction() holds the bus for several calls that must not
+#   be split (e.g. TCA9548A mux select + display write).
+# - Calls run on the caller's thread; an uncontended transaction costs
+#   one lock acquire, no thread hand-off.
+# - Per client: transactions, bus busy time (utilization) and queue
+#   latency (wait from request to grant: mean, p99, max).
+# - Arbitration is per process. Devices in another process (e.g. a
+#   standalone display script) reach the bus through the kernel, which
+#   serialises transfers but knows nothing of these priorities.
+# - BusioAdapter gives busio.I2C-style users (adafruit SSD1306 and
+#   friends) a client too, via smbus2 i2c_rdwr messages.
+#
+#   arbiter = BusArbiter()                      # opens /dev/i2c-1
+#   inputs = InputBank(bus=arbiter.client("inputs", SAFETY))
+#   ads = Ads1115Backend(bus=arbiter.client("ads1115", ADC))
+#   ...
+#   print(arbiter.format_report())
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+try:
+    from smbus2 import SMBus, i2c_msg
+except ImportError:  # not on a Pi: pass bus= (e.g. FakeSMBus) instead
+    SMBus = None
+    i2c_msg = None
+
+SAFETY = 0
+ADC = 1
+LEDS = 2
+DISPLAY = 3
+PRIORITY_NAMES = {SAFETY: "safety", ADC: "adc", LEDS: "leds",
+                  DISPLAY: "display"}
+WAITS_KEPT = 1000            # recent queue latencies per client, for p99
+
+# smbus2 calls a client forwards, each as one transaction
+SMBUS_CALLS = (
+    "read_byte", "write_byte", "read_byte_data", "write_byte_data",
+    "read_word_data", "write_word_data", "read_i2c_block_data",
+    "write_i2c_block_data", "write_quick", "i2c_rdwr",
+)
+
+
+class ClientReport(NamedTuple):
+    name: str
+    priority: int
+    transactions: int
+    utilization: float      # share of wall time this client held the bus
+    wait_mean_ms: float
+    wait_p99_ms: float
+    wait_max_ms: float
+
+
+class _ClientStats:
+    def __init__(self):
+        self.transactions = 0
+        self.busy_s = 0.0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        self.waits: Deque[float] = deque(maxlen=WAITS_KEPT)
+
+
+class BusArbiter:
+    """Owns one SMBus handle and grants it by priority.
+
+    :param bus: SMBus-like handle to own (smbus2.SMBus(bus_num) by
+        default).
+    """
+
+    def __init__(self, bus=None, bus_num: int = 1):
+        if bus is None:
+            if SMBus is None:
+                raise RuntimeError("smbus2 is not available on this host")
+            bus = SMBus(bus_num)
+        self.bus = bus
+        self._cond = threading.Condition()
+        self._waiting: List[tuple] = []     # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._owner: Optional[int] = None   # thread ident holding the bus
+        self._depth = 0
+        self._stats: Dict[str, _ClientStats] = {}
+        self._priorities: Dict[str, int] = {}
+        self._t0 = time.perf_counter()
+
+    def client(self, name: str, priority: int) -> "ArbitratedBus":
+        """SMBus-like handle for one device (or group of devices)."""
+        self._stats.setdefault(name, _ClientStats())
+        self._priorities[name] = priority
+        return ArbitratedBus(self, name, priority)
+
+    # ---------------------------------------------------------------- #
+
+    @contextmanager
+    def hold(self, name: str, priority: int):
+        """Hold the bus; re-entrant on the thread that holds it."""
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                nested = True
+            else:
+                nested = False
+                t_req = time.perf_counter()
+                entry = (priority, next(self._seq))
+                heapq.heappush(self._waiting, entry)
+                while self._owner is not None or self._waiting[0] != entry:
+                    self._cond.wait()
+                heapq.heappop(self._waiting)
+                self._owner = me
+                self._depth = 1
+                t_grant = time.perf_counter()
+        try:
+            yield self.bus
+        finally:
+            if not nested:
+                busy = time.perf_counter() - t_grant
+            with self._cond:
+                self._depth -= 1
+                if not self._depth:
+                    self._owner = None
+                    self._cond.notify_all()
+            if not nested:
+                self._account(name, t_grant - t_req, busy)
+
+    def _account(self, name: str, wait_s: float, busy_s: float) -> None:
+        stats = self._stats[name]
+        stats.transactions += 1
+        stats.busy_s += busy_s
+        stats.wait_total_s += wait_s
+        stats.waits.append(wait_s)
+        if wait_s > stats.wait_max_s:
+            stats.wait_max_s = wait_s
+
+    # ---------------------------------------------------------------- #
+
+    def report(self) -> List[ClientReport]:
+        """Per-client statistics since creation or reset_stats()."""
+        elapsed = max(time.perf_counter() - self._t0, 1e-9)
+        out = []
+        for name, s in self._stats.items():
+            n = s.transactions
+            waits = np.fromiter(s.waits, float) if s.waits else None
+            out.append(ClientReport(
+                name, self._priorities[name], n, s.busy_s / elapsed,
+                s.wait_total_s / n * 1e3 if n else 0.0,
+                float(np.percentile(waits, 99)) * 1e3
+                if waits is not None else 0.0,
+                s.wait_max_s * 1e3,
+            ))
+        return sorted(out, key=lambda r: (r.priority, r.name))
+
+    def format_report(self) -> str:
+        lines = [f"{'client':12s} {'prio':8s} {'xfers':>7s} {'util':>6s} "
+                 f"{'wait ms':>8s} {'p99':>7s} {'max':>7s}"]
+        for r in self.report():
+            prio = str(PRIORITY_NAMES.get(r.priority, r.priority))
+            lines.append(
+                f"{r.name:12s} {prio:8s} {r.transactions:7d} "
+                f"{r.utilization:6.1%} "
+                f"{r.wait_mean_ms:8.3f} {r.wait_p99_ms:7.3f} "
+                f"{r.wait_max_ms:7.2f}"
+            )
+        return "\n".join(lines)
+
+    def reset_stats(self) -> None:
+        for name in self._stats:
+            self._stats[name] = _ClientStats()
+        self._t0 = time.perf_counter()
+
+    def close(self) -> None:
+        """Close the bus once no transaction holds it."""
+        with self._cond:
+            while self._owner is not None:
+                self._cond.wait()
+            self.bus.close()
+
+
+def _forward(call: str):
+    def method(self, *args, **kwargs):
+        with self._arbiter.hold(self.name, self.priority) as bus:
+            return getattr(bus, call)(*args, **kwargs)
+
+    method.__name__ = call
+    method.__doc__ = f"smbus2 {call}() as one arbitrated transaction."
+    return method
+
+
+class ArbitratedBus:
+    """SMBus stand-in that runs every call through a BusArbiter.
+
+    Pass it wherever a bus= handle is accepted (PCF8574_in, InputBank,
+    SwitchController, Ads1115Backend, ...). close() is a no-op: the
+    arbiter owns the real handle.
+    """
+
+    def __init__(self, arbiter: BusArbiter, name: str, priority: int):
+        self._arbiter = arbiter
+        self.name = name
+        self.priority = priority
+
+    def transaction(self):
+        """Hold the bus across several calls (``with`` block)."""
+        return self._arbiter.hold(self.name, self.priority)
+
+    def close(self) -> None:
+        pass
+
+
+for _call in SMBUS_CALLS:
+    setattr(ArbitratedBus, _call, _forward(_call))
+
+
+class BusioAdapter:
+    """busio.I2C look-alike on an ArbitratedBus (for adafruit drivers).
+
+    Locking is per transaction in the arbiter, so try_lock() always
+    succeeds; write-then-read goes out as one repeated-start message
+    pair.
+    """
+
+    def __init__(self, client: ArbitratedBus):
+        if i2c_msg is None:
+            raise RuntimeError("smbus2 is not available on this host")
+        self.client = client
+
+    def try_lock(self) -> bool:
+        return True
+
+    def unlock(self) -> None:
+        pass
+
+    def writeto(self, address, buffer, *, start=0, end=None) -> None:
+        self.client.i2c_rdwr(i2c_msg.write(address,
+                                           bytes(buffer[start:end])))
+
+    def readfrom_into(self, address, buffer, *, start=0, end=None) -> None:
+        end = len(buffer) if end is None else end
+        msg = i2c_msg.read(address, end - start)
+        self.client.i2c_rdwr(msg)
+        buffer[start:end] = bytes(msg)
+
+    def writeto_then_readfrom(self, address, buffer_out, buffer_in, *,
+                              out_start=0, out_end=None, in_start=0,
+                              in_end=None) -> None:
+        in_end = len(buffer_in) if in_end is None else in_end
+        write = i2c_msg.write(address, bytes(buffer_out[out_start:out_end]))
+        read = i2c_msg.read(address, in_end - in_start)
+        self.client.i2c_rdwr(write, read)
+        buffer_in[in_start:in_end] = bytes(read)
+
+    def scan(self) -> List[int]:
+        found = []
+        for address in range(0x08, 0x78):
+            try:
+                self.client.read_byte(address)
+            except OSError:
+                continue
+            found.append(address)
+        return found
+
+    def deinit(self) -> None:
+        pass
@@ -0,0 +1,275 @@
+# input_bank.py
+# One owner for the five PCF8574 input expanders (0x20..0x24).
+#
+# A single sampler reads all five chips at a fixed rate into a
+# timestamped 40-bit snapshot. Limit switches, buttons and debouncers read
+# that snapshot instead of touching the bus themselves, so the inputs cost
+# five read_byte transactions per sample period no matter how many
+# consumers there are.
+#
+# - Flat pin index = chip * 8 + bit (chip 0 = 0x20), active-low.
+# - All chips share one SMBus handle.
+# - Listeners are called from the sampler thread whenever the word
+#   changes (e.g. MotionService.notify_inputs).
+# - With a bank_debouncer.BankDebouncer every snapshot also carries the
+#   debounced word and rising/falling edge masks for all 40 pins.
+# - A chip whose read fails keeps its last good bits, flagged in the
+#   snapshot's stale mask until it reads again, so limit-switch users can
+#   refuse to act on them.
+# - With an interrupt source (input_interrupt.py) the sampler sleeps until
+#   an INT line fires and reads only the chip(s) on that line, with a
+#   slow full poll as a fallback for missed edges.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import (
+    Callable, Iterable, List, NamedTuple, Optional, Sequence,
+)
+
+from pcf8574_in import SMBus, PCF8574_in
+
+BASE_ADDRESS = 0x20
+NUM_CHIPS = 5
+NUM_PINS = NUM_CHIPS * 8
+ALL_HIGH = (1 << NUM_PINS) - 1   # idle: pull-ups, nothing asserted
+SAMPLE_PERIOD_S = 0.005          # 200 Hz
+FALLBACK_PERIOD_S = 0.25         # full re-read when interrupts are quiet
+MAX_REREADS = 3                  # per wake-up while an INT line stays low
+
+
+class InputSnapshot(NamedTuple):
+    """One sample of all 40 inputs."""
+
+    t: float      # time.monotonic() when the sample was taken
+    word: int     # raw 40-bit word, 1 = high (idle), 0 = low (asserted)
+    seq: int      # sample counter
+    stable: int = ALL_HIGH  # debounced word (== word without a debouncer)
+    rose: int = 0           # pins whose stable level just went high
+    fell: int = 0           # pins whose stable level just went low
+    stale: int = 0          # pins of chips whose last read failed
+
+    def is_low(self, pin: int) -> bool:
+        """True if flat pin is asserted (LOW)."""
+        return ((self.word >> pin) & 1) == 0
+
+    def is_stale(self, pin: int) -> bool:
+        """True if flat pin holds bits from before a failed read."""
+        return ((self.stale >> pin) & 1) == 1
+
+    def stable_low(self, pin: int) -> bool:
+        """True if flat pin is debounced-asserted (LOW)."""
+        return ((self.stable >> pin) & 1) == 0
+
+
+Listener = Callable[[InputSnapshot, int], None]
+
+
+class InputBank:
+    """Samples the input expanders and publishes 40-bit snapshots.
+
+    :param devices: Objects with read_all() -> int, lowest chip first.
+        Defaults to PCF8574_in at 0x20..0x24 on one shared SMBus.
+    :param bus: SMBus-like handle for the default chips, e.g. an
+        i2c_arbiter client (default: open bus_num).
+    :param period_s: Sampling period for the background thread.
+    :param interrupt: Optional input_interrupt.InterruptSource (e.g.
+        GpioInterrupt); switches the thread to edge-triggered mode.
+    :param fallback_period_s: Full poll period in edge-triggered mode.
+    :param debouncer: Optional BankDebouncer, built for period_s. In
+        edge-triggered mode the bank polls at period_s after a wake-up
+        until the debouncer has settled.
+    """
+
+    def __init__(self, devices: Optional[Sequence] = None,
+                 period_s: float = SAMPLE_PERIOD_S, bus_num: int = 1,
+                 interrupt=None,
+                 fallback_period_s: float = FALLBACK_PERIOD_S,
+                 debouncer=None, bus=None):
+        if devices is None:
+            if bus is None:
+                bus = SMBus(bus_num)
+            devices = [
+                PCF8574_in(address=BASE_ADDRESS + i, bus=bus)
+                for i in range(NUM_CHIPS)
+            ]
+        self._devs = list(devices)
+        self.period_s = period_s
+        self.interrupt = interrupt
+        self.fallback_period_s = fallback_period_s
+        self.debouncer = debouncer
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.reads = 0      # bus transactions issued
+        self.wakeups = 0    # interrupt wake-ups in edge-triggered mode
+        self._snap = InputSnapshot(0.0, ALL_HIGH, 0)
+        snap = self.sample()
+        if debouncer is not None:
+            debouncer.force(snap.word)
+            self._snap = snap._replace(stable=snap.word, rose=0, fell=0)
+
+    # ---------------------------------------------------------------- #
+
+    @property
+    def snapshot(self) -> InputSnapshot:
+        """Latest snapshot (never touches the bus)."""
+        return self._snap
+
+    def read(self) -> InputSnapshot:
+        """Latest snapshot; samples now if the sampler is not running."""
+        if self.running:
+            return self._snap
+        return self.sample()
+
+    def word(self) -> int:
+        return self.read().word
+
+    def is_low(self, pin: int) -> bool:
+        return self.read().is_low(pin)
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call listener(snapshot, changed_mask) whenever inputs change."""
+        self._listeners.append(listener)
+
+    # ---------------------------------------------------------------- #
+
+    def sample(self, chips: Optional[Iterable[int]] = None
+               ) -> InputSnapshot:
+        """Read chips (default: all) and publish a new snapshot.
+
+        Chips not read keep their bits from the previous snapshot, and so
+        does a chip whose read fails: its pins are marked stale, the
+        other chips are still published, then the first OSError is
+        raised.
+        """
+        with self._lock:
+            if chips is None:
+                chips = range(len(self._devs))
+            word = self._snap.word
+            stale = self._snap.stale
+            error: Optional[OSError] = None
+            for i in chips:
+                self.reads += 1
+                mask = 0xFF << (8 * i)
+                try:
+                    byte = self._devs[i].read_all() & 0xFF
+                except OSError as exc:
+                    error = error or exc
+                    stale |= mask
+                    continue
+                word = (word & ~mask) | (byte << (8 * i))
+                stale &= ~mask
+            snap = self._publish(word, stale)
+        if error is not None:
+            raise error
+        return snap
+
+    def _publish(self, word: int, stale: int) -> InputSnapshot:
+        prev = self._snap
+        if self.debouncer is not None:
+            stable, rose, fell = self.debouncer.update(word)
+        else:
+            stable, rose, fell = word, 0, 0
+        snap = InputSnapshot(
+            time.monotonic(), word, prev.seq + 1, stable, rose, fell, stale
+        )
+        self._snap = snap
+        changed = (word ^ prev.word) | rose | fell | (stale ^ prev.stale)
+        if changed and prev.seq:
+            for listener in self._listeners:
+                listener(snap, changed)
+        return snap
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background sampler thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="input-bank", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.interrupt is not None:
+            self.interrupt.wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        if self.interrupt is not None:
+            self._run_interrupt()
+        else:
+            self._run_polled()
+
+    def _run_interrupt(self) -> None:
+        irq = self.interrupt
+        while not self._stop.is_set():
+            chips = irq.wait(self.fallback_period_s)
+            if self._stop.is_set():
+                break
+            try:
+                if not chips:
+                    self.sample()       # quiet: slow fallback poll
+                    continue
+                self.wakeups += 1
+                self.sample(sorted(chips))
+                # Another chip on a shared line may have asserted while we
+                # read; re-read (bounded, in case a line is stuck low).
+                for _ in range(MAX_REREADS):
+                    chips = irq.still_asserted()
+                    if not chips:
+                        break
+                    self.sample(sorted(chips))
+                self._poll_until_settled()
+            except OSError as exc:
+                print(f"input_bank: read failed: {exc}")
+
+    def _poll_until_settled(self) -> None:
+        """Debouncing needs evenly spaced samples; poll while it runs."""
+        db = self.debouncer
+        while db is not None and not db.settled:
+            if self._stop.wait(self.period_s):
+                return
+            self.sample()
+
+    def _run_polled(self) -> None:
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except OSError as exc:  # I2C glitch: keep last good snapshot
+                print(f"input_bank: read failed: {exc}")
+            next_t += self.period_s
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_t = time.monotonic()
+
+
+if __name__ == "__main__":
+    bank = InputBank()
+    bank.add_listener(
+        lambda snap, changed: print(
+            f"{snap.t:.3f} changed={changed:010x} "
+            f"low={[i for i in range(NUM_PINS) if snap.is_low(i)]}"
+        )
+    )
+    bank.start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        bank.stop()
@@ -0,0 +1,112 @@
+# input_interrupt.py
+# Interrupt sources that tell input_bank.InputBank when to sample.
+#
+# The PCF8574 (and MCP23017) pull their open-drain INT output low when an
+# input changes, and release it when the chip is read. Instead of polling
+# the expanders at a fixed rate, the sampler blocks on one of these and
+# only reads the chip(s) that may have changed.
+#
+# - InterruptSource: the common part; trigger() records which chips
+#   changed and wakes wait().
+# - GpioInterrupt: real INT lines on Pi GPIO pins (RPi.GPIO edge detect).
+#   Several chips may share one wired-OR line; they are all read then.
+# - SimulatedInterrupt: trigger() from a test or benchmark thread.
+#
+# Every source keeps the latest TRIGGERS_KEPT trigger timestamps for
+# wake-up latency measurements; wake() unblocks wait() without counting
+# as a trigger (e.g. to stop the sampler).
+#
+# wait(timeout) returns the set of chip indices to read, or an empty set
+# if nothing happened before the timeout (the caller then falls back to a
+# slow full poll).
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, FrozenSet, Sequence, Set
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
+
+TRIGGERS_KEPT = 1000
+
+
+class InterruptSource:
+    """Chips flagged by trigger(), handed out by wait()."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: Set[int] = set()
+        # perf_counter() of the latest triggers
+        self.triggers: Deque[float] = deque(maxlen=TRIGGERS_KEPT)
+
+    def trigger(self, chips: Sequence[int]) -> None:
+        """Signal that the given chip indices have changed inputs."""
+        with self._cond:
+            self.triggers.append(time.perf_counter())
+            self._pending.update(chips)
+            self._cond.notify_all()
+
+    def wake(self) -> None:
+        """Return from wait() now, with no chips and no trigger."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, timeout: float) -> FrozenSet[int]:
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            chips = frozenset(self._pending)
+            self._pending.clear()
+            return chips
+
+    def still_asserted(self) -> FrozenSet[int]:
+        """Chips whose INT line is still low after they were read."""
+        return frozenset()
+
+    def close(self) -> None:
+        pass
+
+
+class SimulatedInterrupt(InterruptSource):
+    """Software INT line(s) for tests and benchmarks: call trigger()."""
+
+
+class GpioInterrupt(InterruptSource):
+    """INT lines wired to Pi GPIO inputs (BCM numbering).
+
+    :param lines: {gpio_pin: chip indices sharing that INT line}.
+    """
+
+    def __init__(self, lines: Dict[int, Sequence[int]]):
+        super().__init__()
+        if GPIO is None:
+            raise RuntimeError("RPi.GPIO is not available on this host")
+        self._lines = {pin: tuple(chips) for pin, chips in lines.items()}
+        GPIO.setmode(GPIO.BCM)
+        for pin in self._lines:
+            # INT is open-drain, active-low
+            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+            GPIO.add_event_detect(pin, GPIO.FALLING, callback=self._on_edge)
+
+    def _on_edge(self, pin: int) -> None:
+        self.trigger(self._lines[pin])
+
+    def still_asserted(self) -> FrozenSet[int]:
+        # A second chip on a wired-OR line can assert while the first is
+        # being read; the line then never goes high, so no new edge comes.
+        chips: Set[int] = set()
+        for pin, line_chips in self._lines.items():
+            if GPIO.input(pin) == GPIO.LOW:
+                chips.update(line_chips)
+        return frozenset(chips)
+
+    def close(self) -> None:
+        for pin in self._lines:
+            GPIO.remove_event_detect(pin)
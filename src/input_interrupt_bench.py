@@ -0,0 +1,89 @@
+# input_interrupt_bench.py
+# Polled vs interrupt-driven InputBank on simulated expanders.
+#
+# A driver thread flips a random input every CHANGE_PERIOD_S and (in
+# interrupt mode) fires a SimulatedInterrupt for that chip. Reports
+# change-to-snapshot latency, bus reads per second and CPU time.
+#
+# Usage: python input_interrupt_bench.py [seconds]
+
+import random
+import sys
+import threading
+import time
+
+from input_bank import NUM_CHIPS, InputBank
+from input_interrupt import SimulatedInterrupt
+
+RUN_S = 3.0
+CHANGE_PERIOD_S = 0.05
+READ_TIME_S = 0.0003    # ~one read_byte at 100 kHz
+
+
+class FakePcf:
+    def __init__(self):
+        self.value = 0xFF
+
+    def read_all(self):
+        time.sleep(READ_TIME_S)  # bus time, not CPU time
+        return self.value
+
+
+def run(mode, seconds):
+    devs = [FakePcf() for _ in range(NUM_CHIPS)]
+    irq = SimulatedInterrupt() if mode == "interrupt" else None
+    bank = InputBank(devs, interrupt=irq)
+
+    changed_at = {}
+    latencies = []
+
+    def on_change(snap, changed):
+        now = time.perf_counter()
+        for pin in list(changed_at):
+            if changed >> pin & 1:
+                latencies.append(now - changed_at.pop(pin))
+
+    bank.add_listener(on_change)
+    stop = threading.Event()
+
+    def driver():
+        while not stop.wait(CHANGE_PERIOD_S):
+            pin = random.randrange(NUM_CHIPS * 8)
+            chip, bit = divmod(pin, 8)
+            changed_at[pin] = time.perf_counter()
+            devs[chip].value ^= 1 << bit
+            if irq is not None:
+                irq.trigger((chip,))
+
+    reads0 = bank.reads
+    cpu0 = time.process_time()
+    bank.start()
+    t = threading.Thread(target=driver)
+    t.start()
+    time.sleep(seconds)
+    stop.set()
+    t.join()
+    bank.stop()
+    cpu = time.process_time() - cpu0
+    reads = bank.reads - reads0
+
+    latencies.sort()
+    if latencies:
+        p50 = latencies[len(latencies) // 2] * 1e3
+        p99 = latencies[int(len(latencies) * 0.99)] * 1e3
+    else:
+        p50 = p99 = float("nan")
+    print(
+        f"{mode:9s}: latency p50={p50:6.2f} ms p99={p99:6.2f} ms  "
+        f"reads/s={reads / seconds:7.0f}  cpu={cpu / seconds * 100:5.1f}%"
+    )
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else RUN_S
+    for mode in ("polled", "interrupt"):
+        run(mode, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# latch.py
+# Latch (74HC595 RCLK) strategies for distributor.Distributor.
+#
+# Every register update is one SPI transfer plus one latch pulse, and on a
+# Pi the pulse is the slow half: RPi.GPIO output calls plus the old
+# time.sleep(1e-6), which really sleeps for tens to hundreds of µs. The
+# 595 only needs a ~20 ns RCLK pulse, so the strategies here differ only
+# in how cheaply they can toggle one pin from Python:
+#
+# - "rpigpio": RPi.GPIO output calls, no sleep (the pulse is as wide as
+#   one call).
+# - "gpiod":   a libgpiod line request (/dev/gpiochipN); works on every
+#   Pi including the Pi 5, supports the v1 and v2 Python bindings.
+# - "gpiomem": direct GPSET0/GPCLR0 register writes through an mmap of
+#   /dev/gpiomem (BCM2835..BCM2711, i.e. Pi 1-4; not the Pi 5's RP1).
+# - "soft":    distributor.FakeLatch, for benches and tests off the Pi.
+#
+# Each latch measures its own latch-to-latch interval (JitterMeter), so
+# a benchmark or a live run can report rate and jitter for the strategy
+# actually in use:
+#
+#   dist = Distributor(latch=make_latch("gpiomem"))
+#   ...
+#   print(dist.latch.jitter.summary())
+#
+# latch_bench.py measures the achievable update rate per strategy.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import mmap
+import os
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from distributor import FakeLatch
+
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
+
+try:
+    import gpiod
+except ImportError:
+    gpiod = None
+
+LATCH_PIN = 25
+GPIOCHIP = "/dev/gpiochip0"
+CONSUMER = "distributor-latch"
+JITTER_KEEP = 100_000        # intervals kept for percentiles
+
+# BCM283x/2711 GPIO register word offsets (/dev/gpiomem maps the block)
+_GPFSEL0 = 0x00 // 4
+_GPSET0 = 0x1C // 4
+_GPCLR0 = 0x28 // 4
+
+
+class JitterSummary(NamedTuple):
+    n: int              # intervals measured
+    rate_hz: float      # latches per second (1 / mean interval)
+    mean_us: float
+    std_us: float       # jitter
+    min_us: float
+    p99_us: float
+    max_us: float
+
+
+class JitterMeter:
+    """Latch-to-latch intervals, kept in a fixed ring for percentiles."""
+
+    def __init__(self, keep: int = JITTER_KEEP):
+        self._buf = np.zeros(keep)
+        self._i = 0
+        self.count = 0
+        self._last: Optional[int] = None
+
+    def mark(self) -> None:
+        now = time.perf_counter_ns()
+        if self._last is not None:
+            self._buf[self._i] = now - self._last
+            self._i = (self._i + 1) % len(self._buf)
+            self.count += 1
+        self._last = now
+
+    def reset(self) -> None:
+        self._i = 0
+        self.count = 0
+        self._last = None
+
+    def summary(self) -> JitterSummary:
+        n = min(self.count, len(self._buf))
+        if not n:
+            return JitterSummary(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        us = self._buf[:n] / 1000.0
+        mean = float(us.mean())
+        return JitterSummary(
+            self.count, 1e6 / mean if mean else 0.0, mean, float(us.std()),
+            float(us.min()), float(np.percentile(us, 99)), float(us.max()),
+        )
+
+
+class RpiGpioLatch:
+    """RCLK through RPi.GPIO, without the sleep between the edges."""
+
+    name = "rpigpio"
+
+    def __init__(self, pin: int = LATCH_PIN):
+        if GPIO is None:
+            raise RuntimeError("RPi.GPIO is not available on this host")
+        self.pin = pin
+        self.jitter = JitterMeter()
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(pin, GPIO.OUT, initial=GPIO.LOW)
+        self._out = GPIO.output
+
+    def pulse(self) -> None:
+        self._out(self.pin, 1)
+        self._out(self.pin, 0)
+        self.jitter.mark()
+
+    def close(self) -> None:
+        GPIO.cleanup(self.pin)
+
+
+class GpiodLatch:
+    """RCLK through a libgpiod line request (v1 or v2 bindings)."""
+
+    name = "gpiod"
+
+    def __init__(self, pin: int = LATCH_PIN, chip: str = GPIOCHIP):
+        if gpiod is None:
+            raise RuntimeError("gpiod is not available on this host")
+        self.pin = pin
+        self.jitter = JitterMeter()
+        if hasattr(gpiod, "request_lines"):          # libgpiod 2.x
+            from gpiod.line import Direction, Value
+            self._req = gpiod.request_lines(
+                chip, consumer=CONSUMER,
+                config={pin: gpiod.LineSettings(
+                    direction=Direction.OUTPUT, output_value=Value.INACTIVE,
+                )},
+            )
+            set_value = self._req.set_value
+            hi, lo = Value.ACTIVE, Value.INACTIVE
+            self._high = lambda: set_value(pin, hi)
+            self._low = lambda: set_value(pin, lo)
+        else:                                        # libgpiod 1.x
+            self._chip = gpiod.Chip(chip)
+            self._req = self._chip.get_line(pin)
+            self._req.request(consumer=CONSUMER,
+                              type=gpiod.LINE_REQ_DIR_OUT, default_vals=[0])
+            set_value = self._req.set_value
+            self._high = lambda: set_value(1)
+            self._low = lambda: set_value(0)
+
+    def pulse(self) -> None:
+        self._high()
+        self._low()
+        self.jitter.mark()
+
+    def close(self) -> None:
+        self._req.release()
+
+
+class GpiomemLatch:
+    """RCLK by writing GPSET0/GPCLR0 through /dev/gpiomem (Pi 1-4)."""
+
+    name = "gpiomem"
+
+    def __init__(self, pin: int = LATCH_PIN, path: str = "/dev/gpiomem"):
+        if pin > 31:
+            raise ValueError("gpiomem latch supports GPIO 0-31")
+        self.pin = pin
+        self.jitter = JitterMeter()
+        self._fd = os.open(path, os.O_RDWR | os.O_SYNC)
+        self._mem = mmap.mmap(self._fd, 4096, mmap.MAP_SHARED,
+                              mmap.PROT_READ | mmap.PROT_WRITE)
+        self._regs = memoryview(self._mem).cast("I")
+        fsel = _GPFSEL0 + pin // 10
+        shift = (pin % 10) * 3
+        self._regs[_GPCLR0] = 1 << pin
+        self._regs[fsel] = (self._regs[fsel] & ~(7 << shift)) | (1 << shift)
+        self._mask = 1 << pin
+
+    def pulse(self) -> None:
+        regs = self._regs
+        regs[_GPSET0] = self._mask
+        regs[_GPCLR0] = self._mask
+        self.jitter.mark()
+
+    def close(self) -> None:
+        self._regs.release()
+        self._mem.close()
+        os.close(self._fd)
+
+
+class SoftLatch(FakeLatch):
+    """distributor.FakeLatch plus jitter measurement."""
+
+    name = "soft"
+
+    def __init__(self, spi=None, record: bool = False):
+        super().__init__(spi, record)
+        self.jitter = JitterMeter()
+
+    def pulse(self) -> None:
+        super().pulse()
+        self.jitter.mark()
+
+
+LATCHES = {
+    "rpigpio": RpiGpioLatch,
+    "gpiod": GpiodLatch,
+    "gpiomem": GpiomemLatch,
+    "soft": SoftLatch,
+}
+
+
+def make_latch(kind: str = "rpigpio", pin: int = LATCH_PIN, spi=None):
+    """Build a latch by name ("soft" takes the FakeSpi to latch from).
+
+    :raises RuntimeError: If the strategy's library is missing.
+    :raises OSError: If its device node cannot be opened.
+    """
+    if kind not in LATCHES:
+        raise ValueError(f"unknown latch {kind!r}; one of {list(LATCHES)}")
+    if kind == "soft":
+        return SoftLatch(spi)
+    return LATCHES[kind](pin)
@@ -0,0 +1,101 @@
+# latch_bench.py
+# Achievable 74HC595 update rate per latch strategy (latch.py).
+#
+# For every strategy that can be opened on this host, measures
+#
+# - latch only: back-to-back latch pulses, i.e. the RCLK ceiling;
+# - update:     xfer2 of both bytes + latch pulse, i.e. one
+#               Distributor.flush(), which bounds the step rate.
+#
+# Rates and jitter come from each latch's own JitterMeter. On a Pi the
+# SPI is the real spidev bus; elsewhere FakeSpi(wire_time=True) stands in
+# and only the "soft" strategy opens, so those numbers describe this
+# script's overhead, not the hardware.
+#
+# The words sent keep every DRV8825 disabled (EN high) and only toggle
+# the unused outputs (bits 0, 7, 8, 15), so it is safe to run with the
+# motors connected.
+#
+# Usage: python latch_bench.py [updates] [spi_speed_hz] [strategy ...]
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import sys
+import time
+
+from distributor import Distributor, FakeSpi, spidev
+from latch import LATCHES, JitterSummary, make_latch
+
+UPDATES = 20000
+SPI_SPEED_HZ = 1000000
+
+_EN = sum(1 << m["en"] for m in Distributor.MOTOR_MAP.values())
+_SPARE = (1 << 0) | (1 << 7) | (1 << 8) | (1 << 15)
+WORDS = (_EN, _EN | _SPARE)
+
+
+def _open_spi(speed_hz: int):
+    if spidev is None:
+        return FakeSpi(wire_time=True), "fake"
+    spi = spidev.SpiDev()
+    spi.open(0, 0)
+    spi.max_speed_hz = speed_hz
+    return spi, "spidev"
+
+
+def bench_latch(latch, spi, updates: int = UPDATES):
+    """Return (latch only, update) JitterSummary for one latch."""
+    latch.jitter.reset()
+    for _ in range(updates):
+        latch.pulse()
+    pulse_only = latch.jitter.summary()
+
+    frames = [[(w >> 8) & 0xFF, w & 0xFF] for w in WORDS]
+    xfer2 = spi.xfer2
+    latch.jitter.reset()
+    for i in range(updates):
+        xfer2(frames[i & 1])
+        latch.pulse()
+    return pulse_only, latch.jitter.summary()
+
+
+def _row(name: str, what: str, s: JitterSummary) -> str:
+    return (f"{name:8s} {what:10s} {s.rate_hz:10.0f} {s.mean_us:8.2f} "
+            f"{s.std_us:8.2f} {s.p99_us:8.2f} {s.max_us:9.1f}")
+
+
+def main(argv) -> None:
+    updates = int(argv[1]) if len(argv) > 1 else UPDATES
+    speed = int(argv[2]) if len(argv) > 2 else SPI_SPEED_HZ
+    kinds = argv[3:] or list(LATCHES)
+    spi, spi_name = _open_spi(speed)
+    if isinstance(spi, FakeSpi):
+        spi.max_speed_hz = speed
+
+    print(f"{updates} updates, SPI {spi_name} @ {speed / 1e6:g} MHz; "
+          "intervals in µs\n")
+    print(f"{'latch':8s} {'measure':10s} {'rate/s':>10s} {'mean':>8s} "
+          f"{'std':>8s} {'p99':>8s} {'max':>9s}")
+    try:
+        for kind in kinds:
+            try:
+                latch = make_latch(kind, spi=spi)
+            except (RuntimeError, OSError, ValueError) as e:
+                print(f"{kind:8s} skipped: {e}")
+                continue
+            try:
+                pulse_only, update = bench_latch(latch, spi, updates)
+            finally:
+                latch.close()
+            print(_row(kind, "latch only", pulse_only))
+            print(_row("", "update", update))
+    finally:
+        spi.close()
+
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    main(sys.argv)
+    print(f"\n{time.perf_counter() - t0:.1f} s")
@@ -26,5 +26,8 @@ class MCP23017_in:
         return self.pins[pin_number].value
 
     def read_all(self):
-        """Return all 16 input bits as a single integer (bitmask)."""
-        return sum((pin.value << i) for i, pin in enumerate(self.pins))
+        """Return all 16 input bits as a single integer (bitmask).
+
+        Reads GPIOA/GPIOB in one 16-bit transaction instead of one per pin.
+        """
+        return self.mcp.gpio
@@ -5,10 +5,8 @@ def main():
     mcp = MCP23017_in()
 
     while True:
-        active = []
-        for i in range(16):
-            if mcp.read_pin(i):
-                active.append(str(i))
+        bits = mcp.read_all()  # one bus transaction for all 16 pins
+        active = [str(i) for i in range(16) if bits & (1 << i)]
         if active:
             print("Pins HIGH:", ", ".join(active))
         else:
@@ -0,0 +1,140 @@
+# motion_profile.py
+# Ramped step timing tables for the gate steppers.
+#
+# A stepper can only start (and stop) cleanly below its pull-in speed, so
+# a fixed step interval has to be slow enough for a standing start. These
+# profiles accelerate from START_SPEED up to a cruise speed, then
+# decelerate back down, so a gate can cruise several times faster.
+#
+# Tables are cached per (steps, max_speed, accel, start_speed, shape):
+# gates travel the same distance every time, so each is built once.
+#
+# Used by:
+#   distributor.Distributor.build_waveform(profiles=...)
+#   hardware.stepperactuator8825.StepperActuator8825
+#   motor1_tablesaw_autogate_leds
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Callable, Tuple
+
+START_SPEED = 200.0    # steps/s a NEMA 17 can start at from rest
+SHAPES = ("trapezoid", "scurve")
+
+
+def _trapezoid_ramp(v0: float, vmax: float, accel: float
+                    ) -> Tuple[float, Callable[[float], float]]:
+    """Return (ramp_distance, time_at(x)) for constant acceleration."""
+    dist = (vmax * vmax - v0 * v0) / (2.0 * accel)
+
+    def time_at(x: float) -> float:
+        return (math.sqrt(v0 * v0 + 2.0 * accel * x) - v0) / accel
+
+    return dist, time_at
+
+
+def _scurve_ramp(v0: float, vmax: float, accel: float
+                 ) -> Tuple[float, Callable[[float], float]]:
+    """Return (ramp_distance, time_at(x)) for a smoothstep velocity ramp.
+
+    v(t) = v0 + dv * (3u^2 - 2u^3), u = t / T. Peak acceleration of the
+    smoothstep is 1.5x its mean, so T = 1.5 * dv / accel keeps the peak
+    at `accel`.
+    """
+    dv = vmax - v0
+    if dv <= 0:
+        return 0.0, lambda x: 0.0
+    ramp_t = 1.5 * dv / accel
+    dist = v0 * ramp_t + dv * ramp_t / 2.0
+
+    def pos(t: float) -> float:
+        u = t / ramp_t
+        return v0 * t + dv * ramp_t * (u ** 3 - u ** 4 / 2.0)
+
+    def time_at(x: float) -> float:
+        lo, hi = 0.0, ramp_t
+        for _ in range(40):  # bisection; pos() is monotonic
+            mid = (lo + hi) / 2.0
+            if pos(mid) < x:
+                lo = mid
+            else:
+                hi = mid
+        return (lo + hi) / 2.0
+
+    return dist, time_at
+
+
+@lru_cache(maxsize=64)
+def step_intervals(
+    steps: int,
+    max_speed: float,
+    accel: float,
+    start_speed: float = START_SPEED,
+    shape: str = "trapezoid",
+) -> Tuple[float, ...]:
+    """Build the step timing table for one move.
+
+    :param steps: Distance in steps.
+    :param max_speed: Cruise speed in steps/s.
+    :param accel: Acceleration in steps/s^2.
+    :param start_speed: Speed the ramp starts and ends at (steps/s).
+    :param shape: "trapezoid" (constant accel) or "scurve" (smooth accel).
+    :return: intervals[k] = seconds from step k to step k + 1.
+    """
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown profile shape: {shape}")
+    if steps <= 0:
+        return ()
+    if max_speed <= 0 or accel <= 0 or start_speed <= 0:
+        raise ValueError("Speeds and acceleration must be positive")
+
+    v0 = min(start_speed, max_speed)
+    ramp = _scurve_ramp if shape == "scurve" else _trapezoid_ramp
+    ramp_dist, ramp_time = ramp(v0, max_speed, accel)
+
+    if 2.0 * ramp_dist <= steps:
+        # Accelerate, cruise, decelerate.
+        ramp_t = ramp_time(ramp_dist)
+        total = 2.0 * ramp_t + (steps - 2.0 * ramp_dist) / max_speed
+
+        def time_at(x: float) -> float:
+            if x <= ramp_dist:
+                return ramp_time(x)
+            if x >= steps - ramp_dist:
+                return total - ramp_time(steps - x)
+            return ramp_t + (x - ramp_dist) / max_speed
+    else:
+        # Too short to reach max_speed: ramp to the midpoint and back.
+        half = steps / 2.0
+        peak_t = ramp_time(half)
+
+        def time_at(x: float) -> float:
+            if x <= half:
+                return ramp_time(x)
+            return 2.0 * peak_t - ramp_time(steps - x)
+
+    times = [time_at(k) for k in range(steps + 1)]
+    return tuple(times[k + 1] - times[k] for k in range(steps))
+
+
+def profile_duration(
+    steps: int,
+    max_speed: float,
+    accel: float,
+    start_speed: float = START_SPEED,
+    shape: str = "trapezoid",
+) -> float:
+    """Total time in seconds for a move built by step_intervals()."""
+    return sum(step_intervals(steps, max_speed, accel, start_speed, shape))
+
+
+if __name__ == "__main__":
+    for shape in SHAPES:
+        for max_speed in (START_SPEED, 800.0, 1600.0):
+            t = profile_duration(1000, max_speed, 4000.0, shape=shape)
+            print(f"{shape:9s} 1000 steps, cruise {max_speed:6.0f}/s: "
+                  f"{t:.3f} s")
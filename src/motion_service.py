@@ -0,0 +1,352 @@
+# motion_service.py
+# asyncio motion service on top of distributor.Distributor.
+#
+# Each gate move runs as its own cancellable task, so current sensing,
+# LEDs and the heartbeat keep running while a gate travels, and moves on
+# different motors overlap instead of queueing.
+#
+# - Limit switches are active-low flat pins from the 40-bit input word.
+# - Inputs are checked before every step, so a limit ends a move within
+#   one step period. notify_inputs() wakes sleeping moves early when an
+#   input source has seen an edge.
+# - Driver is enabled only while stepping (no holding torque), also when
+#   the move is cancelled.
+# - With a motion_supervisor.MotionSupervisor, every move gets a learned
+#   step budget and deadline; overruns end the move and raise a fault
+#   event instead of stepping forever into a jammed gate.
+# - With a step_scheduler.StepScheduler the steps go out from its timing
+#   thread; the task only awaits the result. Either way every move
+#   reports planned-vs-actual step lateness (MoveResult.timing).
+# - With a gate_position.PositionTracker every step is counted, so gates
+#   have a position between their limits, and start_move_to() can park
+#   a gate at a fraction open.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence
+
+from distributor import Distributor
+from gate_position import OPEN_DIRECTION, PositionTracker
+from motion_supervisor import MotionSupervisor
+from step_scheduler import MoveTiming, StepScheduler
+
+DIR_SETUP_S = 0.0005        # dir -> first step setup pause
+DEFAULT_INTERVAL_S = 0.0025  # 400 steps/s when no profile is given
+
+
+@dataclass
+class MoveResult:
+    """How a move ended.
+
+    reason is one of "limit", "both_limits", "max_steps", "timeout",
+    "target", "cancelled".
+    """
+
+    motor: int
+    reason: str
+    steps: int
+    elapsed_s: float
+    timing: Optional[MoveTiming] = None
+
+
+def _is_low(word: int, pin: int) -> bool:
+    return ((word >> pin) & 1) == 0
+
+
+class MotionService:
+    """Runs gate moves on a Distributor as asyncio tasks.
+
+    :param dist: Distributor driving the motors.
+    :param read_inputs: Returns the current 40-bit input word.
+    :param supervisor: Optional MotionSupervisor bounding every move.
+    :param scheduler: Optional running StepScheduler that times the
+        steps instead of the event loop.
+    :param positions: Optional PositionTracker counting every step.
+    """
+
+    def __init__(self, dist: Distributor, read_inputs: Callable[[], int],
+                 supervisor: Optional[MotionSupervisor] = None,
+                 scheduler: Optional[StepScheduler] = None,
+                 positions: Optional[PositionTracker] = None):
+        self._dist = dist
+        self._read_inputs = read_inputs
+        self.supervisor = supervisor
+        self.scheduler = scheduler
+        self.positions = positions
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ---------------------------------------------------------------- #
+
+    def notify_inputs(self) -> None:
+        """Wake all running moves to re-check limits now.
+
+        Safe to call from any thread (e.g. an input poller or GPIO
+        interrupt callback).
+        """
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._wake.set()
+        else:
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def start_move(
+        self,
+        motor: int,
+        direction: int,
+        limit_pin: int,
+        other_limit_pin: Optional[int] = None,
+        intervals: Optional[Sequence[float]] = None,
+        max_steps: Optional[int] = None,
+        target_steps: Optional[int] = None,
+    ) -> asyncio.Task:
+        """Start a move as a task, cancelling any move already on motor."""
+        self.cancel(motor)
+        task = asyncio.get_running_loop().create_task(
+            self.move_until(
+                motor, direction, limit_pin, other_limit_pin, intervals,
+                max_steps, target_steps,
+            ),
+            name=f"motor{motor}",
+        )
+        self._tasks[motor] = task
+        task.add_done_callback(lambda t: self._forget(motor, t))
+        return task
+
+    def start_move_to(
+        self,
+        motor: int,
+        fraction: float,
+        open_pin: int,
+        closed_pin: int,
+        intervals: Optional[Sequence[float]] = None,
+    ) -> Optional[asyncio.Task]:
+        """Start a move to fraction open by counted steps.
+
+        0.0 and 1.0 run to the limit (and re-reference the count).
+
+        :return: The move task, or None while the position is unknown
+            (no tracker, or the gate has not seen its limits yet).
+        """
+        plan = (self.positions.steps_to(motor, fraction)
+                if self.positions is not None else None)
+        if plan is None:
+            return None
+        direction, steps = plan
+        opening = direction == self.positions.open_dirs.get(
+            motor, OPEN_DIRECTION)
+        limit, other = ((open_pin, closed_pin) if opening
+                        else (closed_pin, open_pin))
+        target = steps if 0.0 < fraction < 1.0 else None
+        return self.start_move(motor, direction, limit, other, intervals,
+                               target_steps=target)
+
+    def cancel(self, motor: int) -> bool:
+        """Cancel the move running on motor, if any."""
+        task = self._tasks.get(motor)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    def busy(self, motor: int) -> bool:
+        task = self._tasks.get(motor)
+        return task is not None and not task.done()
+
+    async def stop_all(self) -> None:
+        """Cancel every running move and wait for drivers to disable."""
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------------------------------------------------------------- #
+
+    async def move_until(
+        self,
+        motor: int,
+        direction: int,
+        limit_pin: int,
+        other_limit_pin: Optional[int] = None,
+        intervals: Optional[Sequence[float]] = None,
+        max_steps: Optional[int] = None,
+        target_steps: Optional[int] = None,
+    ) -> MoveResult:
+        """Step motor in direction until limit_pin reads LOW.
+
+        :param intervals: Step timing table (motion_profile); the last
+            interval repeats once it runs out.
+        :param max_steps: Optional hard step cap. With a supervisor the
+            learned budget applies too, and reaching either is a fault.
+        :param target_steps: Stop after this many steps (reason
+            "target"), e.g. for a partly open gate; a normal end.
+        :return: MoveResult. A cancelled move returns reason "cancelled"
+            after disabling the driver.
+        """
+        self._loop = asyncio.get_running_loop()
+        if not intervals:
+            intervals = (DEFAULT_INTERVAL_S,)
+
+        guard = None
+        deadline = None
+        if self.supervisor is not None:
+            # Only a move that starts on the opposite limit measures the
+            # full travel distance.
+            full = other_limit_pin is not None and _is_low(
+                self._read_inputs(), other_limit_pin
+            )
+            guard = self.supervisor.start(motor, direction, full)
+            max_steps = min(max_steps or guard.max_steps, guard.max_steps)
+            deadline = guard.deadline
+
+        positions = self.positions
+        if positions is not None:
+            positions.begin(motor, direction)
+        result = None
+        try:
+            move = (self._scheduled_move if self.scheduler is not None
+                    else self._timed_move)
+            result = await move(
+                motor, direction, limit_pin, other_limit_pin, intervals,
+                max_steps, target_steps, guard, deadline,
+            )
+        finally:
+            if positions is not None:
+                if result is None:      # bus error: steps may be lost
+                    positions.end(motor, None, "error")
+                else:
+                    positions.end(motor, result.steps, result.reason)
+        return result
+
+    async def _timed_move(self, motor, direction, limit_pin,
+                          other_limit_pin, intervals, max_steps,
+                          target_steps, guard, deadline) -> MoveResult:
+        """move_until() with the steps timed on the event loop."""
+        last = len(intervals) - 1
+        positions = self.positions
+        dist = self._dist
+        timing = MoveTiming(motor)
+        t0 = time.monotonic()
+        steps = 0
+        with dist.transaction():    # EN + DIR in one register update
+            dist.set_enable(motor, True)
+            dist.set_dir(motor, direction)
+        try:
+            await asyncio.sleep(DIR_SETUP_S)
+            next_t = time.monotonic()
+            while True:
+                word = self._read_inputs()
+                if (
+                    other_limit_pin is not None
+                    and _is_low(word, limit_pin)
+                    and _is_low(word, other_limit_pin)
+                ):
+                    if guard is not None:
+                        guard.fail("both_limits", steps)
+                    return self._result(motor, "both_limits", steps, t0,
+                                        timing)
+                if _is_low(word, limit_pin):
+                    if guard is not None:
+                        guard.finish(steps)
+                    return self._result(motor, "limit", steps, t0, timing)
+
+                if target_steps is not None and steps >= target_steps:
+                    return self._result(motor, "target", steps, t0, timing)
+
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    guard.fail("timeout", steps)
+                    return self._result(motor, "timeout", steps, t0, timing)
+                if now >= next_t:
+                    if max_steps is not None and steps >= max_steps:
+                        if guard is not None:
+                            guard.fail("step_budget", steps)
+                        return self._result(motor, "max_steps", steps, t0,
+                                            timing)
+                    dist.step(motor)
+                    interval = intervals[min(steps, last)]
+                    steps += 1
+                    if positions is not None:
+                        positions.progress(motor, steps)
+                    # More than a step behind: allow one catch-up step,
+                    # then slip the schedule rather than bunch steps.
+                    next_t = timing.advance(next_t, now, interval)
+
+                self._wake.clear()
+                delay = next_t - time.monotonic()
+                if deadline is not None:
+                    delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    await asyncio.sleep(0)
+                    continue
+                try:
+                    # An input edge wakes us early to re-check limits.
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            return self._result(motor, "cancelled", steps, t0, timing)
+        finally:
+            dist.set_enable(motor, False)
+
+    async def _scheduled_move(self, motor, direction, limit_pin,
+                              other_limit_pin, intervals, max_steps,
+                              target_steps, guard, deadline) -> MoveResult:
+        """move_until() with the steps timed by the StepScheduler."""
+        positions = self.positions
+
+        def check(steps: int) -> Optional[str]:
+            # Runs on the step thread before every step.
+            if positions is not None:
+                positions.progress(motor, steps)
+            word = self._read_inputs()
+            if other_limit_pin is not None and _is_low(word, limit_pin) \
+                    and _is_low(word, other_limit_pin):
+                return "both_limits"
+            if _is_low(word, limit_pin):
+                return "limit"
+            if target_steps is not None and steps >= target_steps:
+                return "target"
+            if deadline is not None and time.monotonic() >= deadline:
+                return "timeout"
+            if max_steps is not None and steps >= max_steps:
+                return "max_steps"
+            return None
+
+        move = self.scheduler.submit(motor, direction, intervals, check)
+        done = asyncio.wrap_future(move.future)
+        try:
+            await asyncio.shield(done)
+        except asyncio.CancelledError:
+            self.scheduler.cancel(move)
+            await done
+        if guard is not None:
+            if move.reason == "limit":
+                guard.finish(move.steps)
+            elif move.reason == "max_steps":
+                guard.fail("step_budget", move.steps)
+            elif move.reason not in ("cancelled", "target"):
+                guard.fail(move.reason, move.steps)
+        return MoveResult(motor, move.reason, move.steps, move.elapsed_s,
+                          move.timing)
+
+    def _result(self, motor: int, reason: str, steps: int, t0: float,
+                timing: Optional[MoveTiming] = None) -> MoveResult:
+        return MoveResult(motor, reason, steps, time.monotonic() - t0,
+                          timing)
+
+    def _forget(self, motor: int, task: asyncio.Task) -> None:
+        if self._tasks.get(motor) is task:
+            del self._tasks[motor]
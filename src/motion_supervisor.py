@@ -0,0 +1,263 @@
+# motion_supervisor.py
+# Step budgets, deadlines and fault events for gate moves.
+#
+# A jammed gate or a dead limit switch must not hang the controller (and
+# with it every other machine's dust collection). Every move is started
+# through a MotionSupervisor, which hands out a MoveGuard with:
+#
+# - a step budget and a wall-clock deadline, learned from recent
+#   full-travel moves (limit to limit) of the same gate and direction,
+#   with defaults until there is history;
+# - fault events ("step_budget", "timeout", "both_limits") when a move
+#   overruns, and "drift" warnings when recent moves need clearly more
+#   steps or time than the gate's baseline (e.g. a gate getting stiffer
+#   and starting to lose steps) before it actually stalls. A drift is
+#   reported once, and again only after travel has come back within
+#   tolerance and drifted anew.
+#
+# Travel history can be persisted to a small JSON file; an unreadable
+# one is reported and ignored, so the gate relearns its travel.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_STEPS = 2000     # budget before any travel has been recorded
+DEFAULT_DEADLINE_S = 5.0     # design target is ~2 s open/close
+BUDGET_MARGIN = 1.5          # learned budget = worst recent travel * this
+DEADLINE_SLACK_S = 0.5       # plus this, for scheduling jitter
+HISTORY = 20                 # full-travel moves kept per gate/direction
+BASELINE_MOVES = 5           # first N moves define the baseline
+DRIFT_RATIO = 0.15           # warn when recent mean exceeds baseline +15%
+
+
+@dataclass
+class FaultEvent:
+    """A supervised move went wrong (or is starting to)."""
+
+    kind: str            # step_budget | timeout | both_limits | drift
+    gate: int
+    direction: int
+    steps: int
+    elapsed_s: float
+    detail: str = ""
+    t: float = field(default_factory=time.time)
+
+    def __str__(self) -> str:
+        return (f"[{self.kind}] gate {self.gate} dir {self.direction}: "
+                f"{self.steps} steps, {self.elapsed_s:.2f} s. {self.detail}")
+
+
+class MotionFault(Exception):
+    """Raised by blocking movers when a supervised move overruns."""
+
+    def __init__(self, event: FaultEvent):
+        super().__init__(str(event))
+        self.event = event
+
+
+@dataclass
+class TravelRecord:
+    """Full-travel history for one gate and direction."""
+
+    baseline_steps: float = 0.0
+    baseline_s: float = 0.0
+    baseline_n: int = 0
+    drifting: bool = False         # drift reported, not yet recovered
+    recent: Deque[Tuple[int, float]] = field(
+        default_factory=lambda: deque(maxlen=HISTORY)
+    )
+
+    def add(self, steps: int, elapsed_s: float) -> None:
+        if self.baseline_n < BASELINE_MOVES:
+            n = self.baseline_n
+            self.baseline_steps = (self.baseline_steps * n + steps) / (n + 1)
+            self.baseline_s = (self.baseline_s * n + elapsed_s) / (n + 1)
+            self.baseline_n += 1
+        self.recent.append((steps, elapsed_s))
+
+    def recent_means(self, n: int = BASELINE_MOVES) -> Tuple[float, float]:
+        last = list(self.recent)[-n:]
+        return (sum(s for s, _ in last) / len(last),
+                sum(t for _, t in last) / len(last))
+
+
+class MoveGuard:
+    """Budget for one move; check() it as steps go out."""
+
+    def __init__(self, supervisor: "MotionSupervisor", gate: int,
+                 direction: int, max_steps: int, deadline_s: float,
+                 full_travel: bool):
+        self.supervisor = supervisor
+        self.gate = gate
+        self.direction = direction
+        self.max_steps = max_steps
+        self.deadline_s = deadline_s
+        self.full_travel = full_travel
+        self.t0 = time.monotonic()
+        self.deadline = self.t0 + deadline_s
+
+    @property
+    def elapsed_s(self) -> float:
+        return time.monotonic() - self.t0
+
+    def overrun(self, steps: int) -> Optional[str]:
+        """Fault kind if the move is over budget, else None."""
+        if steps >= self.max_steps:
+            return "step_budget"
+        if time.monotonic() >= self.deadline:
+            return "timeout"
+        return None
+
+    def check(self, steps: int) -> None:
+        """Raise MotionFault (after reporting it) if over budget."""
+        kind = self.overrun(steps)
+        if kind is not None:
+            raise MotionFault(self.fail(kind, steps))
+
+    def fail(self, kind: str, steps: int, detail: str = "") -> FaultEvent:
+        """Report a fault for this move and return the event."""
+        if not detail and kind == "step_budget":
+            detail = f"budget {self.max_steps} steps"
+        elif not detail and kind == "timeout":
+            detail = f"deadline {self.deadline_s:.2f} s"
+        event = FaultEvent(kind, self.gate, self.direction, steps,
+                           self.elapsed_s, detail)
+        self.supervisor.report(event)
+        return event
+
+    def finish(self, steps: int) -> None:
+        """Move reached its limit: record travel if it was a full one."""
+        if self.full_travel:
+            self.supervisor.record(self.gate, self.direction, steps,
+                                   self.elapsed_s)
+
+
+class MotionSupervisor:
+    """Hands out MoveGuards and learns travel per gate and direction.
+
+    :param on_fault: Called with every FaultEvent (drift included).
+    :param state_path: Optional JSON file for travel history.
+    """
+
+    def __init__(self, on_fault: Optional[Callable[[FaultEvent], None]]
+                 = None, state_path: Optional[str] = None,
+                 default_max_steps: int = DEFAULT_MAX_STEPS,
+                 default_deadline_s: float = DEFAULT_DEADLINE_S):
+        self.on_fault = on_fault
+        self.state_path = state_path
+        self.default_max_steps = default_max_steps
+        self.default_deadline_s = default_deadline_s
+        self.travel: Dict[Tuple[int, int], TravelRecord] = {}
+        self.events: Deque[FaultEvent] = deque(maxlen=100)
+        if state_path and os.path.exists(state_path):
+            self.load()
+
+    # ---------------------------------------------------------------- #
+
+    def budget(self, gate: int, direction: int,
+               default_steps: Optional[int] = None,
+               default_deadline_s: Optional[float] = None
+               ) -> Tuple[int, float]:
+        """(max_steps, deadline_s) for the next move."""
+        rec = self.travel.get((gate, direction))
+        if rec is None or not rec.recent:
+            return (default_steps or self.default_max_steps,
+                    default_deadline_s or self.default_deadline_s)
+        worst_steps = max(s for s, _ in rec.recent)
+        worst_s = max(t for _, t in rec.recent)
+        return (math.ceil(worst_steps * BUDGET_MARGIN),
+                worst_s * BUDGET_MARGIN + DEADLINE_SLACK_S)
+
+    def start(self, gate: int, direction: int, full_travel: bool = True,
+              default_steps: Optional[int] = None,
+              default_deadline_s: Optional[float] = None) -> MoveGuard:
+        """Begin a supervised move.
+
+        :param full_travel: Move starts at the opposite limit, so its
+            step count is a full travel distance worth learning.
+        :param default_steps: Budget to use before any history exists.
+        :param default_deadline_s: Deadline to use before any history.
+        """
+        max_steps, deadline_s = self.budget(
+            gate, direction, default_steps, default_deadline_s
+        )
+        return MoveGuard(self, gate, direction, max_steps, deadline_s,
+                         full_travel)
+
+    def record(self, gate: int, direction: int, steps: int,
+               elapsed_s: float) -> None:
+        """Add a full-travel move and check it for drift."""
+        rec = self.travel.setdefault((gate, direction), TravelRecord())
+        rec.add(steps, elapsed_s)
+        self._check_drift(gate, direction, rec)
+        if self.state_path:
+            self.save()
+
+    def report(self, event: FaultEvent) -> None:
+        self.events.append(event)
+        print(f"motion fault: {event}")
+        if self.on_fault is not None:
+            self.on_fault(event)
+
+    def travel_steps(self, gate: int, direction: int) -> Optional[float]:
+        """Mean recent full-travel distance in steps, if known."""
+        rec = self.travel.get((gate, direction))
+        if rec is None or not rec.recent:
+            return None
+        return rec.recent_means()[0]
+
+    def _check_drift(self, gate: int, direction: int,
+                     rec: TravelRecord) -> None:
+        if rec.baseline_n < BASELINE_MOVES or len(rec.recent) < HISTORY // 2:
+            return
+        steps, secs = rec.recent_means()
+        limit = 1.0 + DRIFT_RATIO
+        drifting = (steps > rec.baseline_steps * limit
+                    or secs > rec.baseline_s * limit)
+        was_drifting, rec.drifting = rec.drifting, drifting
+        if drifting and not was_drifting:
+            self.report(FaultEvent(
+                "drift", gate, direction, round(steps), secs,
+                f"baseline {rec.baseline_steps:.0f} steps, "
+                f"{rec.baseline_s:.2f} s",
+            ))
+
+    # ---------------------------------------------------------------- #
+
+    def save(self) -> None:
+        data: List[dict] = []
+        for (gate, direction), rec in self.travel.items():
+            item = asdict(rec)
+            item.update(gate=gate, direction=direction,
+                        recent=[list(r) for r in rec.recent])
+            data.append(item)
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.state_path)
+
+    def load(self) -> None:
+        """Read the state file; a corrupt one leaves no learned travel."""
+        travel: Dict[Tuple[int, int], TravelRecord] = {}
+        try:
+            with open(self.state_path) as f:
+                data = json.load(f)
+            for item in data:
+                rec = TravelRecord(item["baseline_steps"],
+                                   item["baseline_s"], item["baseline_n"],
+                                   item.get("drifting", False))
+                rec.recent.extend(tuple(r) for r in item["recent"])
+                travel[(item["gate"], item["direction"])] = rec
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            print(f"motion_supervisor: ignoring {self.state_path}: {exc}")
+            return
+        self.travel = travel
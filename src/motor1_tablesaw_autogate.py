@@ -202,12 +202,11 @@ def main() -> None:
     except KeyboardInterrupt:
         print("\nInterrupted.")
     finally:
-        # Disable all motors on exit
-        for m in (1, 2, 3, 4):
-            try:
-                dist.set_enable(m, False)
-            except Exception:
-                pass
+        # Disable all motors on exit (one register update)
+        try:
+            dist.disable_all()
+        except Exception:
+            pass
         print("Stopped. Drivers disabled.")
 
 
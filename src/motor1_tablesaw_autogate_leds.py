@@ -1,33 +1,54 @@
 # motor1_tablesaw_autogate_leds.py
 # Auto-open/close Motor 1 from ADS1115 CH0 + show state on LED PCF8574.
+# (Single machine; gate_controller.py runs several gates plus the
+# impeller.)
 # - OPEN  limit (LOW) = flat pin 34
 # - CLOSED limit (LOW) = flat pin 33
 # - cw = 0, ccw = 1
 # - No holding torque: driver enabled only while stepping
-# - ~50 steps/s
+# - Gate moves run as asyncio tasks (motion_service), so current sensing
+#   and LEDs stay live while the gate travels
+# - Ramped stepping: starts at 1/STEP_INTERVAL_S, cruises at GATE_MAX_SPEED
 # - LED PCF: bit 0 = GREEN (open), bit 4 = RED (closed)
+# - Gate moves and saw on/off edges are sent to the aqserver live page
+#   (event_stream.EventSender, fire-and-forget UDP) and logged with the
+#   CH0 voltage (1 Hz) to the ts_store time series
+# - CH0 is sampled continuously (ads_sampler, 860 SPS) and decisions use
+#   the RMS of each 100 ms window instead of one single-shot reading
+# - Saw ON/OFF thresholds follow the learned idle baseline/noise
+#   (power_state); a dead or saturated sensor is reported as a fault
+# - Moves are bounded by motion_supervisor (learned step budget and
+#   deadline); travel history is kept in TRAVEL_STATE_PATH
 #
 # Depends on:
 #   distributor.Distributor
-#   pcf8574_in.PCF8574_in
+#   motion_service.MotionService
+#   motion_supervisor.MotionSupervisor
+#   input_bank.InputBank (5 x PCF8574 inputs)
+#   ads_sampler.AdsSampler
+#   power_state.PowerClassifier
 #   smbus2
-#   Adafruit ADS1x15 libs (board, busio, adafruit_ads1x15)
 
 from __future__ import annotations
 
+import asyncio
 import atexit
+import math
 import time
-from typing import Tuple
+from typing import Optional, Tuple
 
 import RPi.GPIO as GPIO  # noqa: F401
-from smbus2 import SMBus
+from ads_sampler import Ads1115Backend, AdsSampler
 from distributor import Distributor
-from pcf8574_in import PCF8574_in
-
-import board
-import busio
-from adafruit_ads1x15.ads1115 import ADS1115
-from adafruit_ads1x15.analog_in import AnalogIn
+from event_stream import EventSender
+from i2c_arbiter import ADC, LEDS, SAFETY, BusArbiter
+from input_bank import InputBank
+from input_interrupt import GpioInterrupt
+from motion_profile import step_intervals
+from motion_service import MotionService
+from motion_supervisor import MotionSupervisor
+from power_state import PowerClassifier
+from ts_store import GATE_EVENTS, TimeSeriesStore
 
 # -------------------------- CONFIG ----------------------------------- #
 
@@ -38,11 +59,24 @@ PIN_CLOSED = 33
 DIR_CW = 0
 DIR_CCW = 1
 STEP_INTERVAL_S = 0.0025      # 50 steps/s
-DIR_SETUP_S = 0.0005        # small dir->step setup pause
 
-# ADS thresholds (volts) — tune to your sensor
-SAW_ON_THRESH_V = 0.50      # >= this -> ON
-SAW_OFF_THRESH_V = 0.30     # <= this -> OFF
+# Ramp profile (see motion_profile.py). STEP_INTERVAL_S is the standing-
+# start speed; past GATE_TRAVEL_STEPS the gate keeps creeping at that
+# speed until its limit switch trips.
+GATE_TRAVEL_STEPS = 800
+GATE_MAX_SPEED = 1200.0     # steps/s cruise
+GATE_ACCEL = 4000.0         # steps/s^2
+
+# Learned travel per direction (motion_supervisor); None = don't persist
+TRAVEL_STATE_PATH: Optional[str] = "gate_travel.json"
+
+# Saw ON/OFF: power_state.PowerClassifier learns the idle baseline and
+# noise; ON needs at least this step above idle (volts, window RMS)
+SAW_MIN_DELTA_V = 0.30
+ADS_CHANNEL = 0             # tablesaw
+ADS_DATA_RATE = 860         # samples/s, continuous mode
+ADS_WINDOW_S = 0.1          # RMS window
+ADS_RDY_PIN = None          # BCM pin wired to ALERT/RDY, or None
 
 # LED expander (your “walking test” address)
 LED_I2C_BUS = 1
@@ -50,31 +84,43 @@ LED_PCF_ADDR = 0x20         # adjust if your LED board is at another addr
 LED_BIT_OPEN = 0            # GREEN
 LED_BIT_CLOSED = 4          # RED
 
-# Input expanders (5 x PCF8574)
-_INPUT_DEVS = [PCF8574_in(address=0x20 + i) for i in range(5)]
+# BCM pin wired to the (wired-OR) PCF8574 INT lines, or None to poll
+INPUT_INT_PIN = None
 
+# One owner for the shared I2C bus: inputs > ADC > LEDs
+_I2C = BusArbiter(bus_num=LED_I2C_BUS)
+atexit.register(_I2C.close)
 
-# -------------------------- INPUTS ----------------------------------- #
+# Input expanders (5 x PCF8574), sampled by one background thread
+_INPUTS = InputBank(
+    interrupt=(
+        GpioInterrupt({INPUT_INT_PIN: range(5)})
+        if INPUT_INT_PIN is not None else None
+    ),
+    bus=_I2C.client("inputs", SAFETY),
+)
+LIMIT_MASK = (1 << PIN_OPEN) | (1 << PIN_CLOSED)
 
-def _pack_40(b0: int, b1: int, b2: int, b3: int, b4: int) -> int:
-    return b0 | (b1 << 8) | (b2 << 16) | (b3 << 24) | (b4 << 32)
+# Live events for the aqserver dashboard (dropped if it isn't running)
+_EVENTS = EventSender()
 
+# On-disk history ("adc" and "gate" series)
+ADC_LOG_PERIOD_S = 1.0
+_STORE = TimeSeriesStore()
+atexit.register(_STORE.close)
 
-def _read_all_flat() -> int:
-    b = [dev.read_all() & 0xFF for dev in _INPUT_DEVS]
-    return _pack_40(*b)
 
+# -------------------------- INPUTS ----------------------------------- #
 
 def _limits_low() -> Tuple[bool, bool]:
-    """Return (open_low, closed_low)."""
-    val = _read_all_flat()
-    return ((val >> PIN_OPEN) & 1) == 0, ((val >> PIN_CLOSED) & 1) == 0
+    """Return (open_low, closed_low) from the latest input snapshot."""
+    snap = _INPUTS.read()
+    return snap.is_low(PIN_OPEN), snap.is_low(PIN_CLOSED)
 
 
 # -------------------------- LED OUTPUTS ------------------------------- #
 
-_led_bus = SMBus(LED_I2C_BUS)
-atexit.register(_led_bus.close)
+_led_bus = _I2C.client("leds", LEDS)
 
 # Start clean (as in your walking test). If you need to preserve other
 # LEDs, remove this line and tell me to switch to read-modify-write only.
@@ -95,17 +141,20 @@ def _led_off(bit: int) -> None:
     _led_write()
 
 def _set_gate_leds(open_low: bool, closed_low: bool) -> None:
-    """Map state to LEDs: GREEN when open, RED when closed."""
+    """Map state to LEDs: GREEN when open, RED when closed.
+
+    One write, and only if the LEDs actually change.
+    """
+    global _led_shadow
+    new = _led_shadow & ~((1 << LED_BIT_OPEN) | (1 << LED_BIT_CLOSED))
     if closed_low:
-        _led_on(LED_BIT_CLOSED)
-        _led_off(LED_BIT_OPEN)
+        new |= 1 << LED_BIT_CLOSED
     elif open_low:
-        _led_on(LED_BIT_OPEN)
-        _led_off(LED_BIT_CLOSED)
-    else:
-        # in-between → both off (can change to blink if you want)
-        _led_off(LED_BIT_OPEN)
-        _led_off(LED_BIT_CLOSED)
+        new |= 1 << LED_BIT_OPEN
+    # in-between → both off (can change to blink if you want)
+    if new != _led_shadow:
+        _led_shadow = new
+        _led_write()
 
 
 # -------------------------- MOTOR ------------------------------------ #
@@ -113,92 +162,148 @@ def _set_gate_leds(open_low: bool, closed_low: bool) -> None:
 def _enable(dist: Distributor, on: bool) -> None:
     dist.set_enable(MOTOR_ID, bool(on))
 
-def _set_dir(dist: Distributor, dir_bit: int) -> None:
-    dist.set_dir(MOTOR_ID, dir_bit)
+def _gate_intervals() -> Tuple[float, ...]:
+    """Ramped step timing for one gate move (cached by motion_profile)."""
+    return step_intervals(
+        GATE_TRAVEL_STEPS, GATE_MAX_SPEED, GATE_ACCEL, 1.0 / STEP_INTERVAL_S
+    )
 
-def _step(dist: Distributor) -> None:
-    dist.step(MOTOR_ID)
+def _gate_event(state: str, steps: int = 0, elapsed_s: float = 0.0
+                ) -> None:
+    """Publish a gate state change to the dashboard and the store."""
+    _EVENTS.send("gate", {"gate": MOTOR_ID, "state": state,
+                          "steps": steps, "elapsed_s": round(elapsed_s, 3)})
+    _STORE.append("gate", (time.time(), MOTOR_ID, GATE_EVENTS.index(state),
+                           steps, elapsed_s))
+
+async def _move_gate(svc: MotionService, opening: bool) -> None:
+    """Run until OPEN (cw, pin 34) or CLOSED (ccw, pin 33) goes LOW.
+
+    Runs as a task: current sensing and the heartbeat keep going, and a
+    new edge cancels the move (driver is disabled either way).
+    """
+    if opening:
+        target, other, dir_bit, name = PIN_OPEN, PIN_CLOSED, DIR_CW, "OPEN"
+    else:
+        target, other, dir_bit, name = PIN_CLOSED, PIN_OPEN, DIR_CCW, "CLOSED"
 
-def _move_until_open(dist: Distributor) -> None:
-    """Enable, run CW until OPEN (pin 34) goes LOW; then disable."""
     open_low, closed_low = _limits_low()
     _set_gate_leds(open_low, closed_low)
-    if open_low:
-        print("Already OPEN (pin 34 LOW).")
+    if (open_low if opening else closed_low):
+        print(f"Already {name} (pin {target} LOW).")
         return
-    print("Opening (cw=0) until pin 34 LOW...")
-    _enable(dist, True)
-    _set_dir(dist, DIR_CW)
-    time.sleep(DIR_SETUP_S)
-
-    next_t = time.monotonic()
-    while True:
-        open_low, closed_low = _limits_low()
-        if open_low:
-            print("Reached OPEN (pin 34 LOW). Stopping.")
-            _set_gate_leds(open_low, closed_low)
-            break
-        if open_low and closed_low:
-            print("Both limits LOW! Safety stop.")
-            _set_gate_leds(open_low, closed_low)
-            break
-        now = time.monotonic()
-        if now < next_t:
-            time.sleep(next_step := (next_t - now))
-        _step(dist)
-        next_t += STEP_INTERVAL_S
+    print(f"{'Opening' if opening else 'Closing'} (dir={dir_bit}) "
+          f"until pin {target} LOW...")
+    _gate_event("opening" if opening else "closing")
 
-    _enable(dist, False)
+    result = await svc.move_until(
+        MOTOR_ID, dir_bit, target, other, _gate_intervals()
+    )
+    if result.reason == "limit":
+        print(f"Reached {name} (pin {target} LOW) after {result.steps} "
+              f"steps, {result.elapsed_s:.2f} s. Stopping.")
+    elif result.reason == "both_limits":
+        print("Both limits LOW! Safety stop.")
+    elif result.reason in ("timeout", "max_steps"):
+        print(f"{name} NOT reached: {result.reason} after {result.steps} "
+              f"steps, {result.elapsed_s:.2f} s. Gate stuck?")
+    else:
+        print(f"{name} move {result.reason} after {result.steps} steps.")
+    state = name.lower() if result.reason == "limit" else result.reason
+    _gate_event(state, result.steps, result.elapsed_s)
 
-def _move_until_closed(dist: Distributor) -> None:
-    """Enable, run CCW until CLOSED (pin 33) goes LOW; then disable."""
     open_low, closed_low = _limits_low()
     _set_gate_leds(open_low, closed_low)
-    if closed_low:
-        print("Already CLOSED (pin 33 LOW).")
-        return
-    print("Closing (ccw=1) until pin 33 LOW...")
-    _enable(dist, True)
-    _set_dir(dist, DIR_CCW)
-    time.sleep(DIR_SETUP_S)
-
-    next_t = time.monotonic()
-    while True:
-        open_low, closed_low = _limits_low()
-        if closed_low:
-            print("Reached CLOSED (pin 33 LOW). Stopping.")
-            _set_gate_leds(open_low, closed_low)
-            break
-        if open_low and closed_low:
-            print("Both limits LOW! Safety stop.")
-            _set_gate_leds(open_low, closed_low)
-            break
-        now = time.monotonic()
-        if now < next_t:
-            time.sleep(next_t - now)
-        _step(dist)
-        next_t += STEP_INTERVAL_S
 
-    _enable(dist, False)
+def _start_gate_move(svc: MotionService, task: Optional[asyncio.Task],
+                     opening: bool) -> asyncio.Task:
+    """Cancel any gate move in progress and start a new one."""
+    if task is not None and not task.done():
+        task.cancel()
+    return asyncio.create_task(_move_gate(svc, opening))
 
 
 # -------------------------- ADS1115 ---------------------------------- #
 
-def _init_ads() -> AnalogIn:
-    i2c = busio.I2C(board.SCL, board.SDA)
-    ads = ADS1115(i2c)
-    ads.gain = 1
-    return AnalogIn(ads, 0)  # Channel 0 for tablesaw
+def _init_ads() -> AdsSampler:
+    backend = Ads1115Backend(_I2C.client("ads1115", ADC), gain=1,
+                             rdy_pin=ADS_RDY_PIN)
+    sampler = AdsSampler(backend, ADS_CHANNEL, ADS_DATA_RATE, ADS_WINDOW_S)
+    sampler.start()
+    return sampler
 
-def _saw_state(volts: float, was_on: bool) -> bool:
-    """Hysteresis: return new saw_on state given voltage and previous."""
-    if was_on:
-        return volts > SAW_OFF_THRESH_V
-    return volts >= SAW_ON_THRESH_V
+def _saw_classifier() -> PowerClassifier:
+    # DC-output sensor: one ADC code at idle is normal, not a flat line;
+    # a dead one is caught by the min_level_v idle-level check instead
+    return PowerClassifier("tablesaw", min_delta_v=SAW_MIN_DELTA_V,
+                           flat_v=0.0)
 
 
 # --------------------------- MAIN LOOP -------------------------------- #
 
+async def _run(dist: Distributor, ads: AdsSampler) -> None:
+    supervisor = MotionSupervisor(state_path=TRAVEL_STATE_PATH)
+    svc = MotionService(dist, _INPUTS.word, supervisor)
+
+    def _on_inputs(snap, changed: int) -> None:
+        # A limit edge wakes a sleeping move instead of waiting for a step
+        if changed & LIMIT_MASK:
+            svc.notify_inputs()
+
+    _INPUTS.add_listener(_on_inputs)
+    gate_task: Optional[asyncio.Task] = None
+    saw = _saw_classifier()
+    last_t = None
+    last_print = time.monotonic()
+    last_log = 0.0
+
+    try:
+        while True:
+            # Latest window from the sampler thread (non-blocking)
+            stats = ads.latest
+            if stats is None or stats.t == last_t:
+                await asyncio.sleep(0.05)
+                continue
+            last_t = stats.t
+            v = stats.rms
+            if time.monotonic() - last_log >= ADC_LOG_PERIOD_S:
+                last_log = time.monotonic()
+                _STORE.append("adc", (time.time(), v, math.nan, math.nan,
+                                      math.nan))
+
+            for edge in saw.feed(stats):
+                if edge.kind == "on":       # OFF -> ON => open gate
+                    print(f"Tablesaw ON (V={v:.3f}, "
+                          f"thr={edge.threshold:.3f}). Opening gate.")
+                    gate_task = _start_gate_move(svc, gate_task, True)
+                elif edge.kind == "off":    # ON -> OFF => close gate
+                    print(f"Tablesaw OFF (V={v:.3f}, "
+                          f"thr={edge.threshold:.3f}). Closing gate.")
+                    gate_task = _start_gate_move(svc, gate_task, False)
+                else:
+                    print(f"Tablesaw sensor {edge.kind}: {edge.detail}")
+                _EVENTS.send("current", {"machine": "tablesaw",
+                                         "on": saw.on,
+                                         "fault": saw.fault,
+                                         "volts": round(v, 3)})
+
+            # Heartbeat (and ensure LEDs reflect whatever state we’re in)
+            if time.monotonic() - last_print >= 2.0:
+                last_print = time.monotonic()
+                state = "ON " if saw.on else "OFF"
+                open_low, closed_low = _limits_low()
+                _set_gate_leds(open_low, closed_low)
+                moving = " moving" if svc.busy(MOTOR_ID) else ""
+                print(f"[hb] saw={state} V={v:.3f}  "
+                      f"open_low={open_low} closed_low={closed_low}{moving}")
+
+            await asyncio.sleep(0.05)  # ~20 Hz poll
+    finally:
+        if gate_task is not None:
+            gate_task.cancel()
+        await svc.stop_all()
+
+
 def main() -> None:
     dist = Distributor()
     atexit.register(dist.close)
@@ -208,65 +313,35 @@ def main() -> None:
     _enable(dist, False)
 
     # Initialize LEDs to current limit state at startup
+    _INPUTS.start()
     open_low, closed_low = _limits_low()
     _set_gate_leds(open_low, closed_low)
 
-    chan0 = _init_ads()
+    ads = _init_ads()
     print(
         "Auto-gate + LEDs: CH0 controls Motor 1; LEDs on 0x20 "
         "(bit0 GREEN=open, bit4 RED=closed).\n"
         "Limits: OPEN=34 LOW, CLOSED=33 LOW. No debounce, instant stop.\n"
-        f"Hysteresis: on>={SAW_ON_THRESH_V:.3f} V, "
-        f"off<={SAW_OFF_THRESH_V:.3f} V."
+        "Saw thresholds adapt to the idle baseline "
+        f"(ON step >= {SAW_MIN_DELTA_V:.3f} V)."
     )
 
-    saw_on = False
-    last_print = time.monotonic()
-
     try:
-        while True:
-            v = chan0.voltage
-            new_state = _saw_state(v, saw_on)
-
-            # Edge: OFF -> ON => open gate
-            if not saw_on and new_state:
-                print(f"Tablesaw ON (V={v:.3f}). Opening gate.")
-                _move_until_open(dist)
-                # Refresh LEDs to final state
-                open_low, closed_low = _limits_low()
-                _set_gate_leds(open_low, closed_low)
-
-            # Edge: ON -> OFF => close gate
-            if saw_on and not new_state:
-                print(f"Tablesaw OFF (V={v:.3f}). Closing gate.")
-                _move_until_closed(dist)
-                open_low, closed_low = _limits_low()
-                _set_gate_leds(open_low, closed_low)
-
-            saw_on = new_state
-
-            # Heartbeat (and ensure LEDs reflect whatever state we’re in)
-            if time.monotonic() - last_print >= 2.0:
-                last_print = time.monotonic()
-                state = "ON " if saw_on else "OFF"
-                open_low, closed_low = _limits_low()
-                _set_gate_leds(open_low, closed_low)
-                print(f"[hb] saw={state} V={v:.3f}  "
-                      f"open_low={open_low} closed_low={closed_low}")
-
-            time.sleep(0.05)  # ~20 Hz poll
+        asyncio.run(_run(dist, ads))
     except KeyboardInterrupt:
         print("\nInterrupted.")
     finally:
-        # Disable all motors on exit
-        for m in (1, 2, 3, 4):
-            try:
-                dist.set_enable(m, False)
-            except Exception:
-                pass
+        # Disable all motors on exit (one register update)
+        try:
+            dist.disable_all()
+        except Exception:
+            pass
+        _INPUTS.stop()
+        ads.stop()
         # Turn both LEDs off (optional)
         _led_off(LED_BIT_OPEN)
         _led_off(LED_BIT_CLOSED)
+        print(_I2C.format_report())
         print("Stopped. Drivers disabled.")
 
 
@@ -1,5 +1,5 @@
 # gate_limits_pcf.py
-# Uses existing PCF8574_in drivers at 0x20..0x24.
+# Reads the 0x20..0x24 PCF8574 inputs through a shared input_bank.InputBank.
 # Debounces flat pins 34 (OPEN) and 33 (CLOSED), active-low.
 # Prints edges + periodic status; can also be used as a library.
 #
@@ -11,7 +11,7 @@ import time
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
-from pcf8574_in import PCF8574_in
+from input_bank import InputBank
 
 
 # ------------------------------ Config -------------------------------- #
@@ -25,14 +25,6 @@ POLL_PERIOD_S = 0.002  # ~500 Hz
 
 # ------------------------------ Helpers ------------------------------- #
 
-def _pack_40(b0: int, b1: int, b2: int, b3: int, b4: int) -> int:
-    """Pack five 8-bit chunks into a 40-bit little-endian value.
-
-    b0 is flat pins 0..7 (addr 0x20), b1 => 8..15, ... b4 => 32..39.
-    """
-    return (b0 | (b1 << 8) | (b2 << 16) | (b3 << 24) | (b4 << 32))
-
-
 def _bit_is_low(val: int, idx: int) -> bool:
     """Active-low: return True if flat pin idx is 0 (asserted)."""
     return ((val >> idx) & 1) == 0
@@ -69,16 +61,19 @@ class Debounce:
 
 
 class GateLimitsPCF:
-    """Reads two flat pins from 5× PCF8574 and debounces them."""
+    """Reads two flat pins from 5× PCF8574 and debounces them.
+
+    Pass the process-wide InputBank as bank so this shares its snapshot
+    instead of opening its own expanders.
+    """
 
-    def __init__(self, open_idx: int = OPEN_PIN, closed_idx: int = CLOSED_PIN):
+    def __init__(self, open_idx: int = OPEN_PIN, closed_idx: int = CLOSED_PIN,
+                 bank: Optional[InputBank] = None):
         self._open_idx = open_idx
         self._closed_idx = closed_idx
 
-        # Five input expanders at 0x20..0x24 (your PCF8574_in wrapper)
-        self._dev = [
-            PCF8574_in(address=0x20 + i) for i in range(5)
-        ]
+        # Five input expanders at 0x20..0x24
+        self._bank = bank if bank is not None else InputBank()
 
         # Debouncers (active-low => asserted == 0)
         self._db_o = Debounce()
@@ -90,8 +85,7 @@ class GateLimitsPCF:
         self._db_c.force(1 if not _bit_is_low(val, self._closed_idx) else 0)
 
     def _read_40(self) -> int:
-        b = [d.read_all() & 0xFF for d in self._dev]
-        return _pack_40(*b)
+        return self._bank.read().word
 
     def update(self) -> Tuple[Optional[int], Optional[int], str]:
         """Poll once; return (open_level, closed_level, state).
@@ -1,10 +1,18 @@
-from smbus2 import SMBus
+try:
+    from smbus2 import SMBus
+except ImportError:  # not on a Pi: pass bus= (or use fakes) instead
+    SMBus = None
 
 
 class PCF8574_in:
-    def __init__(self, address=0x20, bus_num=1):
+    def __init__(self, address=0x20, bus_num=1, bus=None):
+        """
+        :param address: I2C address of the PCF8574.
+        :param bus_num: I2C bus number, used when bus is not given.
+        :param bus: Existing SMBus-like handle to share between chips.
+        """
         self.address = address
-        self.bus = SMBus(bus_num)
+        self.bus = bus if bus is not None else SMBus(bus_num)
         # Write 0xFF to set all pins to input mode (float high)
         self.bus.write_byte(self.address, 0xFF)
 
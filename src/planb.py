@@ -1,22 +1,13 @@
 import serial
-import struct
 import time
 
+from pms import PmsReader
+
 ser = serial.Serial("/dev/serial0", baudrate=9600, timeout=2)
+reader = PmsReader(ser)
 
 def read_pms1003():
-    while True:
-        if ser.read(1) == b'\x42':
-            if ser.read(1) == b'\x4d':
-                frame = ser.read(30)
-                if len(frame) != 30:
-                    continue
-
-                data = struct.unpack('!HHHHHHHHHHHHHH', frame[:28])
-                checksum = struct.unpack('!H', frame[28:30])[0]
-                calc_checksum = 0x42 + 0x4D + sum(frame[:28])
-                if checksum == (calc_checksum & 0xFFFF):
-                    return data[:12]
+    return reader.read()
 
 try:
     while True:
@@ -1,7 +1,9 @@
 import serial
-import struct
+
+from pms import PmsReader
 
 ser = serial.Serial("/dev/serial0", baudrate=9600, timeout=2)
+reader = PmsReader(ser)
 
 labels = [
     "PM1.0_CF1", "PM2.5_CF1", "PM10_CF1",
@@ -11,18 +13,7 @@ labels = [
 ]
 
 def read_pms1003():
-    while True:
-        if ser.read(1) == b'\x42':
-            if ser.read(1) == b'\x4d':
-                frame = ser.read(30)
-                if len(frame) != 30:
-                    continue
-
-                data = struct.unpack('!HHHHHHHHHHHHHH', frame[:28])
-                checksum = struct.unpack('!H', frame[28:30])[0]
-                calc_checksum = 0x42 + 0x4D + sum(frame[:28])
-                if checksum == (calc_checksum & 0xFFFF):
-                    return data[:12]
+    return reader.read()
 
 # Print column headers once
 print(' '.join(labels))
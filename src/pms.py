@@ -0,0 +1,196 @@
+# pms.py
+# Plantower PMS1003 (PMS x003) frame parsing, shared by every AQ script.
+#
+# Frame (32 bytes, big-endian):
+#   0-1   0x42 0x4D header
+#   2-3   frame length (28)
+#   4-27  data1..data12 (see PmsFrame field order)
+#   28-29 data13 (reserved)
+#   30-31 checksum = sum of bytes 0..29
+#
+# PmsParser is incremental: feed() it whatever bytes the port has, it
+# resynchronises on the header inside its buffer with bytearray.find()
+# and returns the complete, checksum-valid frames. It does no I/O, so it
+# can be fuzzed and benchmarked with FakePmsSerial.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import random
+import struct
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+HEADER = b"\x42\x4d"
+FRAME_LEN = 32
+DATA_LEN = FRAME_LEN - 4        # the length field's value
+_BODY = struct.Struct(">H12HxxH")  # length, data1..12, data13, checksum
+
+LABELS = (
+    "PM1.0 (CF1)", "PM2.5 (CF1)", "PM10 (CF1)",
+    "PM1.0 (ATM)", "PM2.5 (ATM)", "PM10 (ATM)",
+    "0.3–0.5 μm", "0.5–1.0 μm", "1.0–2.5 μm",
+    "2.5–5.0 μm", "5.0–10 μm", ">10 μm",
+)
+
+UNITS = ("µg/m³",) * 6 + ("count/0.1L",) * 6
+
+
+class PmsFrame(NamedTuple):
+    """One PMS1003 reading: concentrations (µg/m³), then particle counts
+    per 0.1 L of air above each size (µm)."""
+
+    pm1_cf1: int
+    pm25_cf1: int
+    pm10_cf1: int
+    pm1_atm: int
+    pm25_atm: int
+    pm10_atm: int
+    n0_3: int
+    n0_5: int
+    n1_0: int
+    n2_5: int
+    n5_0: int
+    n10: int
+
+
+class PmsParser:
+    """Turns an arbitrary byte stream into validated PmsFrames."""
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.frames = 0
+        self.bad_frames = 0        # header found, length/checksum wrong
+        self.skipped_bytes = 0     # bytes discarded while hunting a header
+
+    @property
+    def pending(self) -> int:
+        """Bytes buffered towards the next frame."""
+        return len(self._buf)
+
+    def feed(self, data: bytes) -> List[PmsFrame]:
+        """Add bytes; return every complete valid frame now available."""
+        buf = self._buf
+        buf += data
+        out: List[PmsFrame] = []
+        pos = 0
+        end = len(buf)
+        while True:
+            i = buf.find(HEADER, pos)
+            if i < 0:
+                # Keep a trailing 0x42: it may be half of the next header
+                keep = end - 1 if end > pos and buf[-1] == HEADER[0] else end
+                self.skipped_bytes += keep - pos
+                pos = keep
+                break
+            self.skipped_bytes += i - pos
+            pos = i
+            if end - pos < FRAME_LEN:
+                break
+            length, *values, checksum = _BODY.unpack_from(buf, pos + 2)
+            if (
+                length != DATA_LEN
+                or checksum != sum(buf[pos:pos + FRAME_LEN - 2]) & 0xFFFF
+            ):
+                # Could be 0x42 0x4D inside data; resync just past it
+                self.bad_frames += 1
+                pos += 1
+                continue
+            out.append(PmsFrame._make(values))
+            pos += FRAME_LEN
+        if pos:
+            del buf[:pos]
+        self.frames += len(out)
+        return out
+
+
+class PmsReader:
+    """Reads frames from a serial port (or anything with read()).
+
+    Reads in bulk: whatever is waiting, or at least one frame's worth,
+    so a frame normally costs one read() call instead of 32.
+    """
+
+    def __init__(self, ser, parser: Optional[PmsParser] = None):
+        self.ser = ser
+        self.parser = parser or PmsParser()
+        self._ready: List[PmsFrame] = []
+
+    def read_available(self) -> List[PmsFrame]:
+        """One bulk read (blocks up to the port timeout); new frames."""
+        want = getattr(self.ser, "in_waiting", 0) or (
+            FRAME_LEN - self.parser.pending
+        )
+        return self.parser.feed(self.ser.read(want))
+
+    def read(self) -> PmsFrame:
+        """Block until the next valid frame and return it."""
+        while not self._ready:
+            self._ready.extend(self.read_available())
+        return self._ready.pop(0)
+
+    def frames(self) -> Iterator[PmsFrame]:
+        while True:
+            yield self.read()
+
+
+# -------------------------- offline testing ------------------------- #
+
+def encode_frame(values: Sequence[int]) -> bytes:
+    """Build a valid 32-byte frame from 12 data values."""
+    body = HEADER + struct.pack(">H12HH", DATA_LEN, *values, 0)
+    return body + struct.pack(">H", sum(body) & 0xFFFF)
+
+
+class FakePmsSerial:
+    """Byte-stream stand-in for serial.Serial.
+
+    read(n) returns up to n bytes, at most `chunk` at a time (None: no
+    limit), so callers see the same short reads a UART gives them.
+    """
+
+    def __init__(self, data: bytes = b"", chunk: Optional[int] = None):
+        self._data = bytearray(data)
+        self.chunk = chunk
+        self.reads = 0
+
+    def write_stream(self, data: bytes) -> None:
+        """Append bytes as if the sensor had sent them."""
+        self._data += data
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._data)
+
+    def read(self, size: int = 1) -> bytes:
+        self.reads += 1
+        if self.chunk is not None:
+            size = min(size, self.chunk)
+        out = bytes(self._data[:size])
+        del self._data[:size]
+        return out
+
+    def reset_input_buffer(self) -> None:
+        self._data.clear()
+
+    def close(self) -> None:
+        pass
+
+
+def noisy_stream(frames: Sequence[Sequence[int]], seed: int = 0,
+                 noise: float = 0.2) -> bytes:
+    """Frames with random junk, stray headers and corrupted frames mixed
+    in, for fuzzing the parser. Every frame in `frames` stays intact."""
+    rng = random.Random(seed)
+    out = bytearray()
+    for values in frames:
+        if rng.random() < noise:
+            out += bytes(rng.randrange(256) for _ in range(rng.randrange(40)))
+        if rng.random() < noise:
+            out += HEADER
+        if rng.random() < noise:
+            bad = bytearray(encode_frame(values))
+            bad[rng.randrange(4, FRAME_LEN)] ^= 1 << rng.randrange(8)
+            out += bad
+        out += encode_frame(values)
+    return bytes(out)
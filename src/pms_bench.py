@@ -0,0 +1,75 @@
+# pms_bench.py
+# Compare the old byte-at-a-time PMS1003 header hunt with pms.PmsReader,
+# on a noisy stream (junk, stray headers, corrupt frames) from
+# pms.FakePmsSerial.
+#
+# Usage: python pms_bench.py [frames] [noise]
+
+import random
+import struct
+import sys
+import time
+
+from pms import FakePmsSerial, PmsReader, noisy_stream
+
+FRAMES = 5000
+NOISE = 0.1
+
+
+def read_one_byte_at_a_time(ser):
+    """The plantower.py/planb.py pattern (None at end of stream)."""
+    while ser.in_waiting:
+        if ser.read(1) == b'\x42':
+            if ser.read(1) == b'\x4d':
+                frame = ser.read(30)
+                if len(frame) != 30:
+                    continue
+                data = struct.unpack('!HHHHHHHHHHHHHH', frame[:28])
+                checksum = struct.unpack('!H', frame[28:30])[0]
+                calc_checksum = 0x42 + 0x4D + sum(frame[:28])
+                if checksum == (calc_checksum & 0xFFFF):
+                    return data[1:13]
+    return None
+
+
+def report(name, ser, frames, elapsed):
+    print(
+        f"{name:12s}: {frames} frames  {ser.reads / frames:6.1f} reads/frame"
+        f"  {frames / elapsed:9.0f} frames/s"
+    )
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else FRAMES
+    noise = float(sys.argv[2]) if len(sys.argv) > 2 else NOISE
+    rng = random.Random(0)
+    values = [[rng.randrange(1000) for _ in range(12)]
+              for _ in range(frames)]
+    stream = noisy_stream(values, noise=noise)
+
+    ser = FakePmsSerial(stream)
+    old = []
+    t0 = time.perf_counter()
+    while True:
+        frame = read_one_byte_at_a_time(ser)
+        if frame is None:
+            break
+        old.append(frame)
+    report("byte-by-byte", ser, len(old), time.perf_counter() - t0)
+
+    ser = FakePmsSerial(stream, chunk=256)
+    reader = PmsReader(ser)
+    new = []
+    t0 = time.perf_counter()
+    while ser.in_waiting:
+        new += reader.read_available()
+    report("PmsReader", ser, len(new), time.perf_counter() - t0)
+
+    # The old hunt also loses good frames that follow a stray header
+    print(f"frames sent: {frames}  recovered: byte-by-byte {len(old)}, "
+          f"PmsReader {len(new)}  (bad frames rejected: "
+          f"{reader.parser.bad_frames})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# pms_sampler.py
+# One owner for the PMS1003 serial port.
+#
+# A background thread reads frames (pms.PmsReader) as the sensor sends
+# them, about one per second, and publishes them to an in-memory cache:
+# the latest reading plus a rolling history. Web handlers and other
+# consumers read the cache instead of the port, so they never block on
+# the sensor and never fight over it.
+#
+# - Readings carry a sequence number (usable as an HTTP ETag) and the
+#   wall-clock time they arrived (Last-Modified).
+# - Listeners are called from the sampler thread for every new reading.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, List, NamedTuple, Optional
+
+from pms import PmsFrame, PmsReader
+
+HISTORY_LEN = 3600      # readings kept (~1 h at the sensor's 1 Hz)
+IDLE_WAIT_S = 0.05      # pause after a read that produced nothing
+
+
+class Reading(NamedTuple):
+    """One published PMS frame."""
+
+    t: float          # time.time() when the frame was parsed
+    seq: int          # 1, 2, ... in arrival order
+    frame: PmsFrame
+
+
+Listener = Callable[[Reading], None]
+
+
+class PmsSampler:
+    """Reads a PmsReader in a thread and caches what it gets.
+
+    :param reader: pms.PmsReader on the sensor's serial port.
+    :param history_len: Readings kept for history().
+    """
+
+    def __init__(self, reader: PmsReader, history_len: int = HISTORY_LEN):
+        self.reader = reader
+        self._latest: Optional[Reading] = None
+        self._history: Deque[Reading] = deque(maxlen=history_len)
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._seq = 0
+
+    @property
+    def latest(self) -> Optional[Reading]:
+        """Most recent reading, or None before the first frame."""
+        return self._latest
+
+    def history(self, since: Optional[float] = None) -> List[Reading]:
+        """Cached readings, oldest first, optionally only after `since`
+        (a time.time() value)."""
+        with self._lock:
+            readings = list(self._history)
+        if since is not None:
+            readings = [r for r in readings if r.t > since]
+        return readings
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call listener(reading) for every new reading."""
+        self._listeners.append(listener)
+
+    def publish(self, frame: PmsFrame) -> Reading:
+        """Add a frame to the cache (the sampler thread calls this)."""
+        with self._lock:
+            self._seq += 1
+            reading = Reading(time.time(), self._seq, frame)
+            self._history.append(reading)
+            self._latest = reading
+        for listener in self._listeners:
+            listener(reading)
+        return reading
+
+    # ---------------------------------------------------------------- #
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background sampler thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="pms-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread; returns within one serial read timeout."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                frames = self.reader.read_available()
+            except OSError as exc:  # USB serial unplugged etc.
+                print(f"pms_sampler: read failed: {exc}")
+                frames = []
+            for frame in frames:
+                self.publish(frame)
+            if not frames:
+                self._stop.wait(IDLE_WAIT_S)
@@ -0,0 +1,380 @@
+# power_state.py
+# Machine ON/OFF classification from windowed current-sensor readings.
+#
+# The scripts used fixed volt thresholds (SAW_ON_THRESH_V, 0.025 V) that
+# had to be re-tuned whenever the sensor offset drifted. A
+# PowerClassifier instead learns each channel's idle baseline and noise
+# floor while the machine is off and places its thresholds relative to
+# them.
+#
+# - Input: ads_sampler.WindowStats, one per window (e.g. 100 ms).
+# - ON: rms above baseline + max(K_ON * noise, min_delta_v) for confirm_on
+#   consecutive windows, so start is reported at most confirm_on windows
+#   after the current rises above the threshold.
+# - OFF: rms below baseline + max(K_OFF * noise, OFF_FRACTION * (running
+#   level - baseline)) for confirm_off windows (hysteresis).
+# - Baseline and noise adapt (slow EMA) only while OFF and quiet; the
+#   first `learn` windows seed them and emit nothing, and every OFF edge
+#   re-seeds the baseline from the windows that confirmed it.
+# - Sensor faults: a flatlined signal (no window-to-window or in-window
+#   variation: dead or unplugged AC sensor), a dead DC-output sensor (idle
+#   level below its live zero, min_level_v), a saturated one (peak at the
+#   ADC rail) or a baseline that wandered off are flagged as "fault"
+#   edges, and "ok" when the signal recovers. DC-output sensors can sit on
+#   one ADC code at idle, so they run with flat_v=0 and rely on the
+#   min_level_v check instead.
+# - replay()/evaluate() run recorded traces offline so detection latency
+#   and false triggers can be benchmarked (power_state_bench.py).
+# - OnsetDetector works on raw samples instead: it tracks the per-mains-
+#   cycle RMS envelope and fires an "onset" edge on the start-up rise,
+#   well before the windowed classifier confirms ON. It is a hint (used
+#   to pre-open a gate), not a state: a start that never confirms is
+#   backed out by the caller.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import math
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ads_sampler import WindowStats
+
+K_ON = 6.0                 # noise multiples above baseline to turn ON
+K_OFF = 3.0                # ... and below which it turns OFF again
+OFF_FRACTION = 0.3         # of the running level above baseline
+MIN_DELTA_V = 0.02         # ON threshold never closer than this to idle
+LEARN_WINDOWS = 20
+CONFIRM_ON = 2
+CONFIRM_OFF = 5
+BASELINE_ALPHA = 0.02      # EMA weights while idle
+RUNNING_ALPHA = 0.1        # EMA weight of the running level
+FLAT_V = 1e-4              # less in-window variation than this = flat
+MIN_LEVEL_V = 0.001        # idle level below this = dead sensor (8 LSB)
+RAIL_V = 4.0               # peak at or above = saturated (gain 1)
+MAX_BASELINE_V = 1.0       # idle level above this = sensor offset fault
+FAULT_WINDOWS = 20
+
+MAINS_HZ = 60.0
+ONSET_LEARN_CYCLES = 60    # 1 s of idle envelope before arming
+ONSET_RISE_CYCLES = 3      # rise measured over this many cycles
+ONSET_ALPHA = 0.01         # idle envelope EMA weight per cycle
+ONSET_REARM_CYCLES = 30    # quiet cycles before the next onset
+
+
+class PowerEdge(NamedTuple):
+    t: float
+    name: str
+    kind: str              # "on", "off", "fault", "ok", "onset"
+    rms: float
+    threshold: float       # threshold crossed (on/off), else 0
+    detail: str = ""
+
+
+class PowerClassifier:
+    """Adaptive ON/OFF classifier for one current-sense channel.
+
+    :param name: Machine name put into edges.
+    :param min_delta_v: Smallest ON step above the idle baseline.
+    :param flat_v: In-window variation below which the signal counts as
+        flat; 0 disables the check (DC-output sensors that can sit on one
+        ADC code at idle).
+    :param min_level_v: Idle window RMS below which the sensor counts as
+        dead (no output at all, e.g. unpowered or disconnected); 0
+        disables the check (sensors whose idle output really is 0 V).
+    """
+
+    def __init__(self, name: str = "machine",
+                 min_delta_v: float = MIN_DELTA_V,
+                 learn: int = LEARN_WINDOWS, confirm_on: int = CONFIRM_ON,
+                 confirm_off: int = CONFIRM_OFF, flat_v: float = FLAT_V,
+                 rail_v: float = RAIL_V,
+                 max_baseline_v: float = MAX_BASELINE_V,
+                 min_level_v: float = MIN_LEVEL_V):
+        self.name = name
+        self.min_delta_v = min_delta_v
+        self.learn = learn
+        self.confirm_on = confirm_on
+        self.confirm_off = confirm_off
+        self.flat_v = flat_v
+        self.rail_v = rail_v
+        self.max_baseline_v = max_baseline_v
+        self.min_level_v = min_level_v
+
+        self.on = False
+        self.baseline: Optional[float] = None
+        self.noise = 0.0           # std of idle window RMS
+        self.running_level = 0.0
+        self.fault: Optional[str] = None
+        self.windows = 0
+        self._seed: List[float] = []
+        self._above = 0
+        self._below = 0
+        self._below_sum = 0.0
+        self._fault_run = 0
+        self._ok_run = 0
+        self._last_rms: Optional[float] = None
+
+    # ---------------------------- thresholds -------------------------- #
+
+    @property
+    def ready(self) -> bool:
+        return self.baseline is not None
+
+    @property
+    def on_threshold(self) -> float:
+        return self.baseline + max(K_ON * self.noise, self.min_delta_v)
+
+    @property
+    def off_threshold(self) -> float:
+        lift = max(self.running_level - self.baseline, 0.0)
+        return self.baseline + max(K_OFF * self.noise, OFF_FRACTION * lift,
+                                   self.min_delta_v / 2)
+
+    # ------------------------------ update ---------------------------- #
+
+    def feed(self, stats: WindowStats) -> List[PowerEdge]:
+        """Classify one window; return the edges it caused (usually [])."""
+        self.windows += 1
+        rms = stats.rms
+        edges: List[PowerEdge] = []
+        self._check_fault(stats, edges)
+        self._last_rms = rms
+
+        if self.baseline is None:
+            self._seed.append(rms)
+            if len(self._seed) >= self.learn:
+                # Lower half: a machine running at startup doesn't end up
+                # in the idle baseline
+                low = np.sort(self._seed)[: max(2, len(self._seed) // 2)]
+                self.baseline = float(np.median(low))
+                self.noise = float(low.std())
+                self._seed = []
+            return edges
+
+        if not self.on:
+            if rms >= self.on_threshold:
+                self._above += 1
+                if self._above >= self.confirm_on:
+                    threshold = self.on_threshold
+                    self.on = True
+                    self._above = self._below = 0
+                    self.running_level = rms
+                    edges.append(PowerEdge(stats.t, self.name, "on", rms,
+                                           threshold))
+            else:
+                self._above = 0
+                dev = rms - self.baseline
+                self.baseline += BASELINE_ALPHA * dev
+                self.noise = math.sqrt(
+                    (1 - BASELINE_ALPHA) * self.noise ** 2
+                    + BASELINE_ALPHA * dev * dev
+                )
+        else:
+            if rms <= self.off_threshold:
+                self._below += 1
+                self._below_sum += rms
+                if self._below >= self.confirm_off:
+                    threshold = self.off_threshold
+                    self.on = False
+                    # The offset may have moved while the machine ran
+                    # (the baseline is frozen then): restart from the
+                    # level it just settled at
+                    self.baseline = self._below_sum / self._below
+                    self._above = self._below = 0
+                    self._below_sum = 0.0
+                    edges.append(PowerEdge(stats.t, self.name, "off", rms,
+                                           threshold))
+            else:
+                self._below = 0
+                self._below_sum = 0.0
+                self.running_level += RUNNING_ALPHA * (
+                    rms - self.running_level
+                )
+        return edges
+
+    def _check_fault(self, stats: WindowStats,
+                     edges: List[PowerEdge]) -> None:
+        problem = None
+        if stats.peak >= self.rail_v:
+            problem = "saturated"
+        elif (self.flat_v > 0 and stats.ac_rms < self.flat_v
+              and self._last_rms is not None
+              and abs(stats.rms - self._last_rms) < self.flat_v):
+            problem = "flatline"
+        elif not self.on and stats.rms < self.min_level_v:
+            problem = "dead"
+        elif (self.baseline is not None and not self.on
+              and self.baseline > self.max_baseline_v):
+            problem = "offset"
+
+        if problem is not None:
+            self._ok_run = 0
+            self._fault_run += 1
+            if self.fault is None and self._fault_run >= FAULT_WINDOWS:
+                self.fault = problem
+                edges.append(PowerEdge(stats.t, self.name, "fault",
+                                       stats.rms, 0.0, problem))
+        else:
+            self._fault_run = 0
+            self._ok_run += 1
+            if self.fault is not None and self._ok_run >= FAULT_WINDOWS:
+                edges.append(PowerEdge(stats.t, self.name, "ok", stats.rms,
+                                       0.0, self.fault))
+                self.fault = None
+
+
+class OnsetDetector:
+    """Start-up detector on the per-cycle RMS envelope of raw samples.
+
+    Fires when the last two cycles both sit rise_v above the idle level
+    (one noisy cycle is not enough) and the envelope is still climbing:
+    it rose by at least rise_v / 2 over the last ONSET_RISE_CYCLES
+    cycles, so a slow offset shift does not count. rise_v is max(K_ON *
+    envelope noise, min_rise_v).
+
+    :param rate_hz: Sample rate of the channel.
+    :param min_rise_v: Smallest envelope rise that counts.
+    """
+
+    def __init__(self, name: str = "machine", rate_hz: float = 400.0,
+                 min_rise_v: float = MIN_DELTA_V / 2,
+                 mains_hz: float = MAINS_HZ,
+                 rise_cycles: int = ONSET_RISE_CYCLES):
+        self.name = name
+        self.cycle = max(1, round(rate_hz / mains_hz))
+        self.min_rise_v = min_rise_v
+        self.rise_cycles = rise_cycles
+        self.baseline: Optional[float] = None
+        self.noise = 0.0
+        self.fired = False
+        self.onsets = 0
+        self._sq = 0.0
+        self._n = 0
+        self._env: List[float] = []     # recent envelope, newest last
+        self._seed: List[float] = []
+        self._quiet = 0
+
+    @property
+    def rise_v(self) -> float:
+        return max(K_ON * self.noise, self.min_rise_v)
+
+    def reset(self) -> None:
+        """Re-arm now (e.g. after the machine was confirmed OFF)."""
+        self.fired = False
+        self._quiet = 0
+
+    def feed(self, t: float, volts: float) -> Optional[PowerEdge]:
+        """Add one sample; return an "onset" edge when a start is seen."""
+        self._sq += volts * volts
+        self._n += 1
+        if self._n < self.cycle:
+            return None
+        env = math.sqrt(self._sq / self._n)
+        self._sq = 0.0
+        self._n = 0
+        return self._cycle(t, env)
+
+    def _cycle(self, t: float, env: float) -> Optional[PowerEdge]:
+        hist = self._env
+        hist.append(env)
+        if len(hist) > self.rise_cycles + 1:
+            del hist[0]
+        if self.baseline is None:
+            self._seed.append(env)
+            if len(self._seed) >= ONSET_LEARN_CYCLES:
+                self.baseline = float(np.median(self._seed))
+                self.noise = float(np.std(self._seed))
+                self._seed = []
+            return None
+
+        rise_v = self.rise_v
+        level = self.baseline + rise_v
+        if self.fired:
+            # Re-arm once the envelope has been back at idle for a while
+            self._quiet = self._quiet + 1 if env < level else 0
+            if self._quiet >= ONSET_REARM_CYCLES:
+                self.reset()
+            return None
+
+        if (len(hist) > self.rise_cycles and env > level
+                and hist[-2] > level and env - hist[0] >= rise_v / 2):
+            self.fired = True
+            self.onsets += 1
+            return PowerEdge(t, self.name, "onset", env, level)
+
+        if env < level:
+            dev = env - self.baseline
+            self.baseline += ONSET_ALPHA * dev
+            self.noise = math.sqrt((1 - ONSET_ALPHA) * self.noise ** 2
+                                   + ONSET_ALPHA * dev * dev)
+        return None
+
+
+# ------------------------- offline evaluation ------------------------- #
+
+def replay(trace: Iterable[WindowStats],
+           classifier: PowerClassifier) -> List[PowerEdge]:
+    """Feed a recorded trace through a classifier; return all edges."""
+    edges: List[PowerEdge] = []
+    for stats in trace:
+        edges += classifier.feed(stats)
+    return edges
+
+
+def replay_onset(times: Sequence[float], volts: Sequence[float],
+                 detector: OnsetDetector) -> List[PowerEdge]:
+    """Feed a raw sample trace through an OnsetDetector."""
+    edges: List[PowerEdge] = []
+    for t, v in zip(times, volts):
+        edge = detector.feed(t, v)
+        if edge is not None:
+            edges.append(edge)
+    return edges
+
+
+def save_trace(path: str, trace: Sequence[WindowStats]) -> None:
+    """Write WindowStats rows to a .npy file (one row per window)."""
+    np.save(path, np.array(trace, dtype=np.float64))
+
+
+def load_trace(path: str) -> List[WindowStats]:
+    return [WindowStats(t, int(ch), int(n), *rest)
+            for t, ch, n, *rest in np.load(path).tolist()]
+
+
+class Evaluation(NamedTuple):
+    latencies: List[float]     # s from true start to "on", per detected run
+    missed: int                # true runs with no "on" edge
+    false_on: int              # "on" edges outside any true run
+    off_latencies: List[float]
+
+
+def evaluate(edges: Sequence[PowerEdge],
+             truth: Sequence[Tuple[float, float]],
+             tolerance_s: float = 1.0) -> Evaluation:
+    """Score edges against true (start, end) run spans.
+
+    An "on" edge counts for a run if it falls in [start, end +
+    tolerance_s); any other "on" edge is a false trigger.
+    """
+    ons = [e.t for e in edges if e.kind == "on"]
+    offs = [e.t for e in edges if e.kind == "off"]
+    latencies: List[float] = []
+    off_latencies: List[float] = []
+    used = set()
+    missed = 0
+    for start, end in truth:
+        hits = [t for t in ons if start <= t < end + tolerance_s]
+        if not hits:
+            missed += 1
+            continue
+        used.add(hits[0])
+        latencies.append(hits[0] - start)
+        after = [t for t in offs if t >= end]
+        if after:
+            off_latencies.append(after[0] - end)
+    false_on = len([t for t in ons if t not in used])
+    return Evaluation(latencies, missed, false_on, off_latencies)
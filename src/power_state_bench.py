@@ -0,0 +1,168 @@
+# power_state_bench.py
+# Offline benchmark of machine ON/OFF detection.
+#
+# Replays window traces through power_state.PowerClassifier and through
+# the old fixed-hysteresis rule (the autogate's _saw_state, applied to
+# the same window RMS) and reports start latency, stop latency, missed
+# runs and false ON triggers per scenario.
+#
+# A second table does the same for start-up onset detection (gate
+# pre-open): OnsetDetector on raw 400 Hz samples against the classifier's
+# confirmed ON, plus onsets that were never confirmed (false starts the
+# gate controller has to back out of).
+#
+# Traces are synthetic (ads_sampler.mains_current with known run spans)
+# unless a recorded trace is given; recorded traces (power_state
+# .save_trace, or an N x 2 array of raw (t, volts) samples for --onset)
+# have no ground truth, so only their edges are listed.
+#
+#   python3 power_state_bench.py                  # synthetic scenarios
+#   python3 power_state_bench.py trace.npy        # recorded window trace
+#   python3 power_state_bench.py --onset raw.npy  # recorded raw samples
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import sys
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+from ads_sampler import mains_current, synthetic_samples, synthetic_trace
+from power_state import (
+    OnsetDetector,
+    PowerClassifier,
+    PowerEdge,
+    evaluate,
+    load_trace,
+    replay,
+    replay_onset,
+)
+
+SECONDS = 120.0
+RUNS = ((10.0, 25.0), (40.0, 42.0), (60.0, 90.0), (105.0, 106.5))
+FIXED_ON_V = 0.10            # what a hand-tuned script would use here
+FIXED_OFF_V = 0.06
+
+
+def fixed_hysteresis(trace, on_v: float = FIXED_ON_V,
+                     off_v: float = FIXED_OFF_V) -> List[PowerEdge]:
+    """The old rule: ON at >= on_v, OFF at <= off_v."""
+    edges = []
+    on = False
+    for s in trace:
+        new = s.rms > off_v if on else s.rms >= on_v
+        if new != on:
+            edges.append(PowerEdge(s.t, "fixed", "on" if new else "off",
+                                   s.rms, on_v if new else off_v))
+        on = new
+    return edges
+
+
+def _drifting(wave: Callable[[float], float], volts_per_s: float):
+    return lambda t: wave(t) + volts_per_s * t
+
+
+SCENARIOS: Sequence[Tuple[str, Callable[[float], float]]] = (
+    ("clean", mains_current(0.3, noise_v=0.005, on=RUNS, seed=1)),
+    ("inrush", mains_current(0.3, noise_v=0.005, on=RUNS, seed=2,
+                             inrush=3.0)),
+    ("noisy", mains_current(0.3, noise_v=0.04, on=RUNS, seed=3)),
+    ("offset drift", _drifting(
+        mains_current(0.3, noise_v=0.005, on=RUNS, seed=4), 0.001)),
+    ("weak sensor", mains_current(0.05, noise_v=0.002, on=RUNS, seed=5)),
+    ("dead sensor", lambda t: 0.0),
+)
+
+
+def _fmt(values: Sequence[float]) -> str:
+    if not values:
+        return "      -"
+    return f"{sum(values) / len(values) * 1000:5.0f}/" \
+           f"{max(values) * 1000:.0f}"
+
+
+def bench() -> None:
+    print(f"{SECONDS:.0f} s traces, {len(RUNS)} runs, 100 ms windows; "
+          "latency in ms (mean/max)\n")
+    print(f"{'scenario':14s} {'rule':8s} {'start':>11s} {'stop':>11s} "
+          f"{'missed':>6s} {'false':>5s}  faults")
+    for name, wave in SCENARIOS:
+        trace = synthetic_trace(wave, SECONDS)
+        results = (
+            ("adaptive", replay(trace, PowerClassifier(name))),
+            ("fixed", fixed_hysteresis(trace)),
+        )
+        for rule, edges in results:
+            ev = evaluate(edges, RUNS)
+            faults = ",".join(e.detail for e in edges if e.kind == "fault")
+            print(f"{name:14s} {rule:8s} {_fmt(ev.latencies):>11s} "
+                  f"{_fmt(ev.off_latencies):>11s} {ev.missed:6d} "
+                  f"{ev.false_on:5d}  {faults or '-'}")
+
+
+ONSET_RATE_HZ = 400.0        # tablesaw channel rate (adc_scheduler)
+GLITCHES = ((30.0, 30.03), (50.0, 50.05), (70.0, 70.1))
+ONSET_SCENARIOS: Sequence[Tuple[str, Callable[[float], float]]] = (
+    ("inrush", mains_current(0.3, on=RUNS, seed=11, inrush=3.0)),
+    ("soft start", mains_current(0.3, on=RUNS, seed=12, ramp_s=1.5)),
+    ("slow start", mains_current(0.3, on=RUNS, seed=13, ramp_s=4.0)),
+    ("glitches", mains_current(0.3, on=GLITCHES, seed=14)),
+)
+
+
+def bench_onset() -> None:
+    print(f"\nOnset (raw {ONSET_RATE_HZ:.0f} Hz) vs confirmed ON; "
+          "latency in ms (mean/max)\n")
+    print(f"{'scenario':14s} {'onset':>11s} {'confirmed':>11s} "
+          f"{'lead':>11s} {'unconfirmed':>11s}")
+    for name, wave in ONSET_SCENARIOS:
+        times, volts = synthetic_samples(wave, SECONDS, ONSET_RATE_HZ)
+        onsets = replay_onset(times, volts, OnsetDetector(name,
+                                                          ONSET_RATE_HZ))
+        ons = [e for e in replay(synthetic_trace(wave, SECONDS),
+                                 PowerClassifier(name))
+               if e.kind == "on"]
+        truth = GLITCHES if name == "glitches" else RUNS
+        onset_lat = evaluate([e._replace(kind="on") for e in onsets],
+                             truth).latencies
+        on_lat = evaluate(ons, truth).latencies
+        leads = []
+        unconfirmed = 0
+        for e in onsets:
+            later = [o.t for o in ons if 0 <= o.t - e.t < 2.0]
+            if later:
+                leads.append(later[0] - e.t)
+            else:
+                unconfirmed += 1
+        print(f"{name:14s} {_fmt(onset_lat):>11s} {_fmt(on_lat):>11s} "
+              f"{_fmt(leads):>11s} {unconfirmed:11d}")
+
+
+def show_onsets(path: str) -> None:
+    samples = np.load(path)
+    rate = (len(samples) - 1) / (samples[-1, 0] - samples[0, 0])
+    for e in replay_onset(samples[:, 0], samples[:, 1],
+                          OnsetDetector(path, rate)):
+        print(f"{e.t:12.3f} onset env={e.rms:.4f} level={e.threshold:.4f}")
+
+
+def show_recorded(path: str) -> None:
+    trace = load_trace(path)
+    clf = PowerClassifier(path)
+    for e in replay(trace, clf):
+        print(f"{e.t:12.3f} {e.kind:6s} rms={e.rms:.4f} "
+              f"thr={e.threshold:.4f} {e.detail}")
+    print(f"{len(trace)} windows; baseline={clf.baseline} "
+          f"noise={clf.noise:.5f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--onset":
+        show_onsets(sys.argv[2])
+    elif len(sys.argv) > 1:
+        show_recorded(sys.argv[1])
+    else:
+        bench()
+        bench_onset()
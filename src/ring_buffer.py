@@ -0,0 +1,63 @@
+# ring_buffer.py
+# Fixed-size NumPy ring buffer of timestamped multi-channel samples.
+#
+# Storage is preallocated at twice the capacity and every sample is
+# written twice (at i and i + capacity), so the newest `capacity`
+# samples are always one contiguous slice. view() therefore returns
+# zero-copy arrays in time order, ready for Line2D.set_data(), and
+# nothing is allocated per sample.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+class RingBuffer:
+    """Last `capacity` samples of `channels` float values plus a time.
+
+    :param capacity: Samples kept.
+    :param channels: Values per sample.
+    """
+
+    def __init__(self, capacity: int, channels: int = 1):
+        self.capacity = capacity
+        self.channels = channels
+        self._t = np.full(2 * capacity, np.nan)
+        self._v = np.full((2 * capacity, channels), np.nan, np.float32)
+        self._head = 0      # index of the next write, 0..capacity-1
+        self.count = 0      # samples held, up to capacity
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, t: float, values: Sequence[float]) -> None:
+        i = self._head
+        j = i + self.capacity
+        self._t[i] = self._t[j] = t
+        self._v[i] = self._v[j] = values
+        self._head = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def view(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(t, values) of the held samples, oldest first (no copy).
+
+        values has shape (len, channels); values[:, k] is channel k.
+        """
+        end = self._head + self.capacity
+        start = end - self.count
+        return self._t[start:end], self._v[start:end]
+
+    def last(self) -> Tuple[float, np.ndarray]:
+        i = (self._head - 1) % self.capacity
+        return self._t[i], self._v[i]
+
+    def max(self, channels: Sequence[int]) -> float:
+        """Largest value in the given channels (0 if empty)."""
+        if not self.count:
+            return 0.0
+        _, values = self.view()
+        return float(values[:, channels].max())
@@ -0,0 +1,215 @@
+# rollup.py
+# Incremental min/max/mean/count downsampling for ts_store series.
+#
+# Each rolled-up series gets one extra series per tier (10 s, 1 min,
+# 15 min, 1 h), named "<series>@<seconds>", e.g. "pms@60". A Rollup sees
+# every raw record as it is appended and emits a tier record when a
+# bucket closes, so there is no batch job and long-range queries read at
+# most a few thousand pre-aggregated rows.
+#
+# - Tier records: t (bucket start), [key], count, then min/max/mean for
+#   every value field. NaN values are ignored (a field that was NaN for
+#   the whole bucket rolls up to NaN).
+# - A key field (e.g. the temperature sensor id) gets separate buckets
+#   per key value.
+# - Buckets still open at close() are emitted as they are; after a
+#   restart the same bucket may then appear twice, which merge_buckets()
+#   folds back together.
+# - pick_tier()/history() choose the finest tier that keeps a query under
+#   a point budget, so response time does not grow with the window.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import math
+from typing import (
+    Callable, Dict, Iterable, List, Optional, Sequence, Tuple,
+)
+
+TIERS = (10, 60, 900, 3600)
+RAW_PERIOD_S = 1.0          # nominal spacing of raw samples
+MAX_POINTS = 1000           # default point budget for history()
+
+Emit = Callable[[str, tuple], None]
+
+
+def tier_name(series: str, tier: int) -> str:
+    return f"{series}@{tier}"
+
+
+def rollup_layout(fields: Sequence[str], fmt: str, key: Optional[str]
+                  ) -> Tuple[Tuple[str, ...], str]:
+    """(fields, struct format) of the tier records for a raw series.
+
+    :param fields: Raw series fields, "t" first.
+    :param fmt: Raw series struct format (used for the key's type).
+    :param key: Field that splits buckets, or None.
+    """
+    codes = fmt.lstrip("<>=!@")[1:]      # drop the "d" of t
+    out_fields: List[str] = ["t"]
+    out_fmt = "<d"
+    if key is not None:
+        out_fields.append(key)
+        out_fmt += codes[fields.index(key) - 1]
+    out_fields.append("count")
+    out_fmt += "I"
+    for name in fields[1:]:
+        if name != key:
+            out_fields += [f"{name}_min", f"{name}_max", f"{name}_mean"]
+            out_fmt += "fff"
+    return tuple(out_fields), out_fmt
+
+
+class _Bucket:
+    __slots__ = ("start", "count", "n", "lo", "hi", "sum")
+
+    def __init__(self, start: float, width: int):
+        self.start = start
+        self.count = 0
+        self.n = [0] * width
+        self.lo = [math.inf] * width
+        self.hi = [-math.inf] * width
+        self.sum = [0.0] * width
+
+    def add(self, values: Sequence[float]) -> None:
+        self.count += 1
+        n, lo, hi, sm = self.n, self.lo, self.hi, self.sum
+        for i, v in enumerate(values):
+            if v != v:       # NaN
+                continue
+            n[i] += 1
+            sm[i] += v
+            if v < lo[i]:
+                lo[i] = v
+            if v > hi[i]:
+                hi[i] = v
+
+    def record(self, key: Optional[int]) -> tuple:
+        out: List[float] = [self.start]
+        if key is not None:
+            out.append(key)
+        out.append(self.count)
+        for i, cnt in enumerate(self.n):
+            if cnt:
+                out += [self.lo[i], self.hi[i], self.sum[i] / cnt]
+            else:
+                out += [math.nan] * 3
+        return tuple(out)
+
+
+class Rollup:
+    """Feeds tier series from raw records of one series.
+
+    :param series: Raw series name.
+    :param fields: Raw series fields, "t" first.
+    :param key: Field that splits buckets, or None.
+    :param emit: emit(tier_series_name, record), e.g. store.append.
+    """
+
+    def __init__(self, series: str, fields: Sequence[str],
+                 key: Optional[str], emit: Emit,
+                 tiers: Sequence[int] = TIERS):
+        self.series = series
+        self.tiers = tuple(tiers)
+        self.emit = emit
+        self._key_idx = fields.index(key) if key is not None else None
+        self._value_idx = [i for i, f in enumerate(fields)
+                           if i and f != key]
+        # (tier, key value) -> open bucket
+        self._open: Dict[Tuple[int, Optional[int]], _Bucket] = {}
+
+    def add(self, record: Sequence) -> None:
+        t = record[0]
+        key = record[self._key_idx] if self._key_idx is not None else None
+        values = [record[i] for i in self._value_idx]
+        for tier in self.tiers:
+            start = t - t % tier
+            bucket = self._open.get((tier, key))
+            if bucket is None or bucket.start != start:
+                if bucket is not None:
+                    self.emit(tier_name(self.series, tier),
+                              bucket.record(key))
+                bucket = _Bucket(start, len(values))
+                self._open[(tier, key)] = bucket
+            bucket.add(values)
+
+    def close(self) -> None:
+        """Emit every open bucket (partial)."""
+        for (tier, key), bucket in sorted(self._open.items(),
+                                          key=lambda kv: kv[1].start):
+            self.emit(tier_name(self.series, tier), bucket.record(key))
+        self._open.clear()
+
+
+# ------------------------------ queries ------------------------------ #
+
+def pick_tier(span_s: float, max_points: int = MAX_POINTS,
+              tiers: Sequence[int] = TIERS) -> int:
+    """Finest tier (0 = raw) with at most max_points buckets in span_s."""
+    if span_s / RAW_PERIOD_S <= max_points:
+        return 0
+    for tier in tiers:
+        if span_s / tier <= max_points:
+            return tier
+    return tiers[-1]
+
+
+def merge_buckets(rows: Iterable[tuple], fields: Sequence[str]
+                  ) -> List[tuple]:
+    """Fold tier rows with the same t (and key) into one."""
+    has_key = fields[1] != "count"
+    first = 3 if has_key else 2
+    merged: Dict[tuple, List] = {}
+    for row in rows:
+        ident = row[:first - 1]
+        prev = merged.get(ident)
+        if prev is None:
+            merged[ident] = list(row)
+            continue
+        c0, c1 = prev[first - 1], row[first - 1]
+        for i in range(first, len(row), 3):
+            lo, hi, mean = row[i:i + 3]
+            if mean != mean:
+                continue
+            if prev[i + 2] != prev[i + 2]:
+                prev[i:i + 3] = [lo, hi, mean]
+                continue
+            prev[i] = min(prev[i], lo)
+            prev[i + 1] = max(prev[i + 1], hi)
+            prev[i + 2] = (prev[i + 2] * c0 + mean * c1) / (c0 + c1)
+        prev[first - 1] = c0 + c1
+    return [tuple(r) for r in merged.values()]
+
+
+def history(store, series: str, field: str, t0: float, t1: float,
+            max_points: int = MAX_POINTS, key: Optional[int] = None
+            ) -> Tuple[int, List[Tuple[float, float, float, float]]]:
+    """One field over [t0, t1) at the tier that fits max_points.
+
+    :param store: ts_store.TimeSeriesStore.
+    :param key: Key value to select (e.g. sensor id) for keyed series.
+    :return: (tier seconds or 0 for raw, [(t, min, max, mean), ...]).
+    """
+    tier = pick_tier(t1 - t0, max_points)
+    if tier == 0:
+        fields = store.fields(series)
+        i = fields.index(field)
+        key_field = store.rollup_key(series)
+        k = None
+        if key_field is not None and key is not None:
+            k = fields.index(key_field)
+        rows = [(r[0], r[i], r[i], r[i])
+                for r in store.query(series, t0, t1)
+                if k is None or r[k] == key]
+        return 0, rows
+    name = tier_name(series, tier)
+    fields = store.fields(name)
+    # Include the bucket t0 falls in
+    rows = merge_buckets(store.query(name, t0 - t0 % tier, t1), fields)
+    has_key = fields[1] != "count"
+    i = fields.index(f"{field}_min")
+    out = [(r[0], r[i], r[i + 1], r[i + 2]) for r in rows
+           if not has_key or key is None or r[1] == key]
+    out.sort()
+    return tier, out
@@ -0,0 +1,136 @@
+# sse_load_test.py
+# Load test for the SSE fan-out: N simulated viewers against a fake
+# PMS1003 sensor.
+#
+# In-process (default): a feeder thread writes frames into a
+# pms.FakePmsSerial at RATE_HZ, a PmsSampler parses them and publishes to
+# an event_stream.Broadcaster exactly as aqserver does, and N client
+# threads consume Broadcaster.stream(). Reports delivered/missed events,
+# publish-to-client latency and process CPU per event, so the cost can be
+# compared as N grows.
+#
+# Against a running aqserver: --url http://pi:5000/api/stream opens N
+# real HTTP connections and counts "pms" events.
+#
+# Usage: python sse_load_test.py [clients] [seconds] [rate_hz]
+#        python sse_load_test.py [clients] [seconds] --url URL
+
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+
+from event_stream import Broadcaster
+from pms import FakePmsSerial, PmsReader, encode_frame
+from pms_sampler import PmsSampler
+
+CLIENTS = 50
+SECONDS = 5.0
+RATE_HZ = 20.0     # much faster than the real sensor's 1 Hz
+
+
+def _client(broadcaster, stop, stats):
+    received = 0
+    latencies = []
+    for chunk in broadcaster.stream(keepalive_s=0.5, stop=stop):
+        now = time.time()
+        for block in chunk.split(b"\n\n"):
+            if block.startswith(b"id:") and b"event: pms" in block:
+                data = json.loads(block.split(b"data: ", 1)[1])
+                latencies.append(now - data["t"])
+                received += 1
+    stats.append((received, latencies))
+
+
+def run_in_process(clients, seconds, rate_hz):
+    ser = FakePmsSerial()
+    sampler = PmsSampler(PmsReader(ser))
+    broadcaster = Broadcaster()
+    sampler.add_listener(lambda r: broadcaster.publish(
+        "pms", {"t": r.t, "seq": r.seq, **r.frame._asdict()}
+    ))
+
+    stop = threading.Event()
+    stats = []
+    threads = [
+        threading.Thread(target=_client, args=(broadcaster, stop, stats))
+        for _ in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    while broadcaster.subscribers < clients:
+        time.sleep(0.01)
+
+    sampler.start()
+    cpu0 = time.process_time()
+    t_end = time.monotonic() + seconds
+    n = 0
+    while time.monotonic() < t_end:
+        ser.write_stream(encode_frame([n & 0xFFFF] * 12))
+        n += 1
+        time.sleep(1.0 / rate_hz)
+    time.sleep(0.2)          # let the last frame through
+    cpu = time.process_time() - cpu0
+    stop.set()
+    broadcaster.wake_all()
+    for t in threads:
+        t.join()
+    sampler.stop()
+
+    published = broadcaster.published
+    received = [r for r, _ in stats]
+    latencies = [x for _, lat in stats for x in lat]
+    print(f"clients={clients} frames sent={n} published={published}")
+    print(f"delivered/client: min {min(received)} max {max(received)}  "
+          f"missed total {published * clients - sum(received)}")
+    if latencies:
+        print(f"latency ms: median {statistics.median(latencies) * 1e3:.2f}"
+              f"  max {max(latencies) * 1e3:.2f}")
+    print(f"CPU: {cpu * 1e3 / max(published, 1):.2f} ms per event, "
+          f"{cpu * 1e6 / max(published * clients, 1):.1f} µs per "
+          f"event per client")
+
+
+def run_http(url, clients, seconds):
+    counts = [0] * clients
+
+    def client(i):
+        deadline = time.monotonic() + seconds
+        with urllib.request.urlopen(url, timeout=seconds + 20) as resp:
+            for line in resp:
+                if line.startswith(b"event: pms"):
+                    counts[i] += 1
+                if time.monotonic() > deadline:
+                    break
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True)
+               for i in range(clients)]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(seconds + 30)
+    print(f"clients={clients} {time.monotonic() - t0:.1f} s  pms events/"
+          f"client: min {min(counts)} max {max(counts)}")
+
+
+def main():
+    args = sys.argv[1:]
+    url = None
+    if "--url" in args:
+        i = args.index("--url")
+        url = args[i + 1]
+        del args[i:i + 2]
+    clients = int(args[0]) if len(args) > 0 else CLIENTS
+    seconds = float(args[1]) if len(args) > 1 else SECONDS
+    rate_hz = float(args[2]) if len(args) > 2 else RATE_HZ
+    if url:
+        run_http(url, clients, seconds)
+    else:
+        run_in_process(clients, seconds, rate_hz)
+
+
+if __name__ == "__main__":
+    main()
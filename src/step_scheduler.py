@@ -0,0 +1,351 @@
+# step_scheduler.py
+# Dedicated step-timing thread for distributor.Distributor.
+#
+# The step loops used to sleep(next_t - now) on an ordinary thread or
+# event loop, so under load steps bunched up or stretched and nothing
+# measured it. StepScheduler runs every active move from one thread:
+#
+# - The thread asks for SCHED_FIFO (and optionally a CPU of its own) and
+#   keeps running as a normal thread if that is not permitted.
+# - Waiting is a hybrid: sleep until SPIN_S before the step, then spin,
+#   so the step goes out within microseconds of its slot instead of at
+#   the scheduler's next wakeup.
+# - Every step records actual minus planned time into the move's
+#   LatenessHistogram. Steps later than LATE_FRACTION of their interval
+#   are counted as late: a late step followed by an on-time one is a
+#   short interval, which is where a loaded motor stalls.
+#
+# Moves on different motors interleave (earliest due step first); a new
+# move on a motor cancels the one already running there. While the
+# scheduler runs, only its thread should touch the Distributor.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from distributor import Distributor
+
+RT_PRIORITY = 20            # SCHED_FIFO; below the kernel IRQ threads (50)
+SPIN_S = 0.0002             # spin instead of sleeping this close to a step
+DIR_SETUP_S = 0.0005        # EN/DIR -> first step
+LATE_FRACTION = 0.25        # late: more than this share of the interval
+LATE_EDGES_US = (10, 50, 100, 250, 500, 1000, 2500, 5000)
+IDLE_WAIT_S = 0.1
+
+
+def configure_realtime(priority: int = RT_PRIORITY,
+                       cpu: Optional[int] = None) -> str:
+    """Move the calling thread to SCHED_FIFO, and onto cpu, if allowed.
+
+    :return: "fifo" or "normal", with "+cpuN" if the affinity took.
+    """
+    mode = "normal"
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        mode = "fifo"
+    except (AttributeError, OSError):
+        pass
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            mode += f"+cpu{cpu}"
+        except (AttributeError, OSError):
+            pass
+    return mode
+
+
+class LatenessHistogram:
+    """Step lateness (actual - planned) in fixed µs bins."""
+
+    def __init__(self, edges_us: Sequence[float] = LATE_EDGES_US):
+        self.edges_us = tuple(edges_us)
+        self.counts = [0] * (len(self.edges_us) + 1)
+        self.n = 0
+        self.total_s = 0.0
+        self.worst_s = 0.0
+
+    def add(self, late_s: float) -> None:
+        late_s = max(late_s, 0.0)
+        self.counts[bisect_right(self.edges_us, late_s * 1e6)] += 1
+        self.n += 1
+        self.total_s += late_s
+        if late_s > self.worst_s:
+            self.worst_s = late_s
+
+    def merge(self, other: "LatenessHistogram") -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.n += other.n
+        self.total_s += other.total_s
+        self.worst_s = max(self.worst_s, other.worst_s)
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.n if self.n else 0.0
+
+    def labels(self) -> List[str]:
+        edges = [f"{e:g}" for e in self.edges_us]
+        return ([f"<{edges[0]}"]
+                + [f"{a}-{b}" for a, b in zip(edges, edges[1:])]
+                + [f">={edges[-1]}"])
+
+    def as_dict(self) -> Dict[str, int]:
+        return dict(zip(self.labels(), self.counts))
+
+    def format(self) -> str:
+        """Non-empty bins, e.g. "<10:950 10-50:48 250-500:2" (µs)."""
+        return " ".join(f"{label}:{count}"
+                        for label, count in self.as_dict().items() if count)
+
+
+@dataclass
+class MoveTiming:
+    """Planned-vs-actual step timing of one move."""
+
+    motor: int
+    histogram: LatenessHistogram = field(default_factory=LatenessHistogram)
+    late: int = 0       # steps later than LATE_FRACTION of their interval
+    slips: int = 0      # schedule re-based after falling a step behind
+
+    def advance(self, planned: float, actual: float,
+                interval: float) -> float:
+        """Record a step sent at actual for slot planned.
+
+        :return: The next step's planned time. More than a step behind,
+            the schedule slips instead of bunching steps to catch up.
+        """
+        late_s = actual - planned
+        self.histogram.add(late_s)
+        if late_s > LATE_FRACTION * interval:
+            self.late += 1
+        nxt = planned + interval
+        if actual > nxt:
+            self.slips += 1
+            return actual
+        return nxt
+
+    @property
+    def steps(self) -> int:
+        return self.histogram.n
+
+    def summary(self) -> str:
+        h = self.histogram
+        return (f"motor {self.motor}: {h.n} steps, {self.late} late, "
+                f"{self.slips} slips, mean {h.mean_s * 1e6:.0f} µs, "
+                f"worst {h.worst_s * 1e6:.0f} µs [{h.format()}]")
+
+
+class StepMove:
+    """One move on the step thread; its future resolves to itself.
+
+    reason is "limit"-style text from check(), "max_steps" or
+    "cancelled".
+    """
+
+    def __init__(self, motor: int, direction: int,
+                 intervals: Sequence[float],
+                 check: Optional[Callable[[int], Optional[str]]],
+                 max_steps: Optional[int]):
+        self.motor = motor
+        self.direction = direction
+        self.intervals = intervals
+        self.check = check
+        self.max_steps = max_steps
+        self.future: Future = Future()
+        self.timing = MoveTiming(motor)
+        self.steps = 0
+        self.reason: Optional[str] = None
+        self.elapsed_s = 0.0
+        self.cancelled = False
+        self.next_t = 0.0
+        self.t0 = 0.0
+
+
+class StepScheduler:
+    """Runs Distributor step moves from one timing thread.
+
+    :param dist: Distributor to step; owned by the thread while running.
+    :param realtime: Ask for SCHED_FIFO at priority for the thread.
+    :param cpu: Pin the thread to this CPU (e.g. one kept free with
+        isolcpus).
+    :param pulse_us: Distributor.step() pulse width; the second register
+        update alone holds STEP high well past the DRV8825's 1.9 µs.
+    """
+
+    def __init__(self, dist: Distributor, realtime: bool = True,
+                 cpu: Optional[int] = None, priority: int = RT_PRIORITY,
+                 spin_s: float = SPIN_S, pulse_us: int = 0):
+        self.dist = dist
+        self.realtime = realtime
+        self.cpu = cpu
+        self.priority = priority
+        self.spin_s = spin_s
+        self.pulse_us = pulse_us
+        self.mode = "stopped"
+        self.histogram = LatenessHistogram()    # every step so far
+        self._moves: Dict[int, StepMove] = {}
+        self._pending: List[StepMove] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------------------------------------------------------- #
+
+    def submit(
+        self,
+        motor: int,
+        direction: int,
+        intervals: Sequence[float],
+        check: Optional[Callable[[int], Optional[str]]] = None,
+        max_steps: Optional[int] = None,
+    ) -> StepMove:
+        """Queue a move; it replaces any move running on motor.
+
+        :param intervals: Step timing table; the last interval repeats.
+        :param check: Called with the step count before every step; a
+            non-None return ends the move with that reason.
+        :param max_steps: Step cap. Without check or max_steps the move
+            is exactly len(intervals) steps.
+        """
+        if motor not in Distributor.MOTOR_MAP:
+            raise ValueError(f"Invalid motor ID: {motor}")
+        if not intervals:
+            raise ValueError("intervals must not be empty")
+        if not self.running:
+            raise RuntimeError("step scheduler is not running")
+        if check is None and max_steps is None:
+            max_steps = len(intervals)
+        move = StepMove(motor, direction, intervals, check, max_steps)
+        with self._lock:
+            self._pending.append(move)
+        self._wake.set()
+        return move
+
+    def cancel(self, move: StepMove) -> None:
+        move.cancelled = True
+        self._wake.set()
+
+    # ---------------------------------------------------------------- #
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="step-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> bool:
+        """Stop the thread; running moves end as "cancelled".
+
+        :return: False if the thread is still running after timeout (it
+            still owns the Distributor; do not touch it).
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        return True
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---------------------------------------------------------------- #
+
+    def _run(self) -> None:
+        self.mode = (configure_realtime(self.priority, self.cpu)
+                     if self.realtime else "normal")
+        try:
+            while not self._stop.is_set():
+                self._admit()
+                for move in [m for m in self._moves.values()
+                             if m.cancelled]:
+                    self._finish(move, "cancelled")
+                if not self._moves:
+                    self._wake.wait(IDLE_WAIT_S)
+                    self._wake.clear()
+                    continue
+                move = min(self._moves.values(), key=lambda m: m.next_t)
+                try:
+                    self._service(move)
+                except Exception as e:     # bus error: end this move only
+                    self._finish(move, "error", e)
+        finally:
+            self._admit()
+            for move in list(self._moves.values()):
+                self._finish(move, "cancelled")
+            self.mode = "stopped"
+
+    def _service(self, move: StepMove) -> None:
+        reason = move.check(move.steps) if move.check else None
+        if reason is None and move.max_steps is not None \
+                and move.steps >= move.max_steps:
+            reason = "max_steps"
+        if reason is not None:
+            self._finish(move, reason)
+            return
+        if self._wait_until(move.next_t):
+            return                         # new or cancelled move
+        actual = time.perf_counter()
+        self.dist.step(move.motor, self.pulse_us)
+        interval = move.intervals[min(move.steps, len(move.intervals) - 1)]
+        move.steps += 1
+        move.next_t = move.timing.advance(move.next_t, actual, interval)
+
+    def _wait_until(self, deadline: float) -> bool:
+        """Sleep, then spin, until deadline; True if woken early."""
+        remaining = deadline - time.perf_counter()
+        if remaining > self.spin_s:
+            if self._wake.wait(remaining - self.spin_s):
+                self._wake.clear()
+                return True
+        while time.perf_counter() < deadline:
+            pass
+        return False
+
+    def _admit(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for move in pending:
+            old = self._moves.get(move.motor)
+            if old is not None:
+                self._finish(old, "cancelled")
+            if move.cancelled or self._stop.is_set():
+                move.reason = "cancelled"
+                move.future.set_result(move)
+                continue
+            with self.dist.transaction():  # EN + DIR in one update
+                self.dist.set_enable(move.motor, True)
+                self.dist.set_dir(move.motor, move.direction)
+            move.t0 = time.perf_counter()
+            move.next_t = move.t0 + DIR_SETUP_S
+            self._moves[move.motor] = move
+
+    def _finish(self, move: StepMove, reason: str,
+                error: Optional[BaseException] = None) -> None:
+        self._moves.pop(move.motor, None)
+        try:
+            self.dist.set_enable(move.motor, False)
+        except Exception as e:
+            error = error or e
+        move.reason = reason
+        move.elapsed_s = time.perf_counter() - move.t0
+        self.histogram.merge(move.timing.histogram)
+        if error is not None:
+            move.future.set_exception(error)
+        else:
+            move.future.set_result(move)
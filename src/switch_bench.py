@@ -0,0 +1,58 @@
+# switch_bench.py
+# Bus cost of one 16-bit SwitchController sample, against a fake SMBus.
+#
+# Compares the old per-port read (two read_byte_data calls) with the
+# sequential block read now used by SwitchController._read_raw_states.
+#
+# Usage: python switch_bench.py [samples] [bus_hz]
+
+import sys
+import time
+
+from fake_smbus import FakeSMBus
+from hardware.switchcontroller import GPIOA, SwitchController
+
+SAMPLES = 2000
+BUS_HZ = 100000
+
+
+def per_port_read(bus, address):
+    value_a = bus.read_byte_data(address, GPIOA)
+    value_b = bus.read_byte_data(address, GPIOA + 1)
+    return (value_b << 8) | value_a
+
+
+def report(name, bus, samples, elapsed):
+    print(
+        f"{name:10s}: {bus.transactions / samples:4.1f} transactions/sample"
+        f"  {bus.bytes / samples:4.1f} bytes/sample"
+        f"  {samples / elapsed:7.0f} samples/s"
+    )
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else SAMPLES
+    bus_hz = int(sys.argv[2]) if len(sys.argv) > 2 else BUS_HZ
+
+    bus = FakeSMBus(bus_hz=bus_hz)
+    sc = SwitchController(bus=bus)
+    print(f"setup: {bus.transactions} transactions "
+          f"({dict(bus.calls)})")
+    sc._write_pair(0x00, 0xFFFF)  # cached: no traffic
+    print(f"re-config: {bus.transactions} transactions")
+
+    bus.reset_counts()
+    t0 = time.perf_counter()
+    for _ in range(samples):
+        per_port_read(bus, sc.address)
+    report("per-port", bus, samples, time.perf_counter() - t0)
+
+    bus.reset_counts()
+    t0 = time.perf_counter()
+    for _ in range(samples):
+        sc.read_all()
+    report("block", bus, samples, time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    main()
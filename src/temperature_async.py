@@ -1,18 +1,27 @@
 import asyncio
+import time
 from async_temp_sensor import AsyncDS18B20Reader
+from ts_store import TimeSeriesStore
 
 async def main():
     sensor_reader = AsyncDS18B20Reader()
+    store = TimeSeriesStore()
     print("Async sensor reader ready")
 
-    while True:
-        temps = await sensor_reader.read_all()
-        for sid, temp in temps.items():
-            if temp is not None:
-                print(f"{sid}: {temp:.2f} °C")
-            else:
-                print(f"{sid}: Failed to read")
-        await asyncio.sleep(2)
+    try:
+        while True:
+            temps = await sensor_reader.read_all()
+            now = time.time()
+            for sid, temp in temps.items():
+                if temp is not None:
+                    print(f"{sid}: {temp:.2f} °C")
+                    store.append("temp", (now, store.label_id("temp", sid),
+                                          temp))
+                else:
+                    print(f"{sid}: Failed to read")
+            await asyncio.sleep(2)
+    finally:
+        store.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,359 @@
+# ts_store.py
+# Append-only on-disk time series for PM, ADC, temperature and gate data.
+#
+# Layout under the store root, one directory per series:
+#
+#   <root>/<series>/YYYYMMDD.bin   fixed-size little-endian records (UTC day)
+#   <root>/<series>/index.json     {"segments": {day: [t_first, t_last, n]},
+#                                   "labels": [...]}
+#
+# - Every record starts with a float64 time.time() stamp; the rest of the
+#   layout is fixed per series (SERIES below), so record i of a segment is
+#   at i * record_size and time lookups are a bisect over the file.
+# - Writes are batched in memory and appended once BATCH_RECORDS are
+#   waiting or FLUSH_INTERVAL_S has passed, to keep SD/SSD writes few and
+#   large. Every append checks the age of all series, so a rarely written
+#   one (e.g. "gate") is flushed on time while others are busy. Call
+#   flush()/close() on shutdown.
+# - Reads mmap the segments that overlap the query, so months of 1 Hz data
+#   never have to fit in memory. Queries also see records still waiting
+#   in this process's write buffer.
+# - One writing process per series (aqserver writes "pms", the gate
+#   controller "adc" and "gate", ...); any process may read. Before its
+#   first write to a segment the writer repairs what a crash or power cut
+#   can leave behind: a torn record at the end is cut off and the index
+#   count is reconciled with the records actually on disk. Stamps are
+#   assumed non-decreasing within a series. Appends and queries may come
+#   from different threads.
+# - "pms", "adc" and "temp" are also rolled up as they are appended into
+#   "<series>@<seconds>" tier series (rollup.py) for long-range queries.
+#
+# Style: flake8 / black -l 79
+
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import (
+    Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple,
+)
+
+from pms import PmsFrame
+from rollup import TIERS, Rollup, rollup_layout, tier_name
+
+DEFAULT_ROOT = os.path.expanduser("~/dustcollector-data")
+BATCH_RECORDS = 300
+READ_CHUNK = 4096          # records copied out of the mmap at a time
+FLUSH_INTERVAL_S = 60.0
+DAY_S = 86400
+
+# Gate event codes for the "gate" series
+GATE_EVENTS = (
+    "opening", "closing", "open", "closed",
+    "timeout", "max_steps", "both_limits", "cancelled",
+)
+
+
+class SeriesSpec(NamedTuple):
+    """Record layout of one series (first field is always t)."""
+
+    fields: Tuple[str, ...]
+    fmt: str
+
+
+SERIES: Dict[str, SeriesSpec] = {
+    "pms": SeriesSpec(("t",) + PmsFrame._fields, "<d12H"),
+    "adc": SeriesSpec(("t", "ch0", "ch1", "ch2", "ch3"), "<d4f"),
+    "temp": SeriesSpec(("t", "sensor", "celsius"), "<dHf"),
+    "gate": SeriesSpec(("t", "gate", "event", "steps", "elapsed_s"),
+                       "<dBBIf"),
+}
+
+# Series rolled up into TIERS, with the field that splits their buckets
+ROLLUPS: Dict[str, Optional[str]] = {"pms": None, "adc": None,
+                                     "temp": "sensor"}
+for _name, _key in ROLLUPS.items():
+    for _tier in TIERS:
+        SERIES[tier_name(_name, _tier)] = SeriesSpec(
+            *rollup_layout(SERIES[_name].fields, SERIES[_name].fmt, _key)
+        )
+
+
+_T = struct.Struct("<d")      # the t field that starts every record
+
+
+def _day(t: float) -> str:
+    return time.strftime("%Y%m%d", time.gmtime(t))
+
+
+class _Series:
+    """Write buffer and index for one series."""
+
+    def __init__(self, root: str, name: str, spec: SeriesSpec):
+        self.name = name
+        self.dir = os.path.join(root, name)
+        self.struct = struct.Struct(spec.fmt)
+        self.fields = spec.fields
+        os.makedirs(self.dir, exist_ok=True)
+        self.index_path = os.path.join(self.dir, "index.json")
+        self.segments: Dict[str, List[float]] = {}
+        self.labels: List[str] = []
+        self.load_index()
+        # day -> (buffer, t_first, t_last, count) not yet on disk
+        self.pending: Dict[str, List] = {}
+        self.pending_count = 0
+        self.first_pending_at: Optional[float] = None
+        self._day = ""
+        self._day_end = 0.0
+        self._repaired: Set[str] = set()   # days checked by this writer
+
+    def load_index(self) -> None:
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                data = json.load(f)
+            self.segments = data.get("segments", {})
+            self.labels = data.get("labels", [])
+
+    def save_index(self) -> None:
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segments": self.segments, "labels": self.labels}, f)
+        os.replace(tmp, self.index_path)
+
+    def segment_path(self, day: str) -> str:
+        return os.path.join(self.dir, day + ".bin")
+
+    def append(self, record: Sequence) -> None:
+        t = record[0]
+        if not self._day_end - DAY_S <= t < self._day_end:
+            self._day = _day(t)
+            self._day_end = (t // DAY_S + 1) * DAY_S
+        entry = self.pending.get(self._day)
+        if entry is None:
+            entry = self.pending[self._day] = [bytearray(), t, t, 0]
+        entry[0] += self.struct.pack(*record)
+        entry[2] = t
+        entry[3] += 1
+        self.pending_count += 1
+        if self.first_pending_at is None:
+            self.first_pending_at = time.monotonic()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        for day, (buf, t_first, t_last, count) in sorted(self.pending.items()):
+            if day not in self._repaired:
+                self.repair(day)
+            with open(self.segment_path(day), "ab") as f:
+                f.write(buf)
+            seg = self.segments.get(day)
+            if seg is None:
+                self.segments[day] = [t_first, t_last, count]
+            else:
+                seg[1] = t_last
+                seg[2] += count
+        self.pending.clear()
+        self.pending_count = 0
+        self.first_pending_at = None
+        self.save_index()
+
+    def repair(self, day: str) -> None:
+        """Cut a torn trailing record off a segment and make its index
+        entry match the whole records in the file."""
+        self._repaired.add(day)
+        path = self.segment_path(day)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        rec = self.struct.size
+        whole = size - size % rec
+        if whole != size:
+            with open(path, "r+b") as f:
+                f.truncate(whole)
+        n = whole // rec
+        seg = self.segments.get(day)
+        if n == 0:
+            self.segments.pop(day, None)
+        elif seg is None or seg[2] != n:
+            with open(path, "rb") as f:
+                t_first = _T.unpack(f.read(_T.size))[0]
+                f.seek(whole - rec)
+                t_last = _T.unpack(f.read(_T.size))[0]
+            self.segments[day] = [t_first, t_last, n]
+
+
+class TimeSeriesStore:
+    """Batched writer and mmap reader for the series in SERIES.
+
+    :param root: Store directory.
+    :param batch_records: Flush a series once this many records wait.
+    :param flush_interval_s: ... or once its oldest waiting record is
+        this old (checked for every series on any append; call flush()
+        when idle).
+    :param rollups: Maintain the ROLLUPS tier series while appending.
+    """
+
+    def __init__(self, root: str = DEFAULT_ROOT,
+                 batch_records: int = BATCH_RECORDS,
+                 flush_interval_s: float = FLUSH_INTERVAL_S,
+                 rollups: bool = True):
+        self.root = root
+        self.batch_records = batch_records
+        self.flush_interval_s = flush_interval_s
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.RLock()
+        self._rollups: Dict[str, Rollup] = {}
+        if rollups:
+            for name, key in ROLLUPS.items():
+                self._rollups[name] = Rollup(
+                    name, SERIES[name].fields, key, self._append
+                )
+
+    def _get(self, name: str) -> _Series:
+        series = self._series.get(name)
+        if series is None:
+            if name not in SERIES:
+                raise KeyError(f"unknown series {name!r}")
+            with self._lock:
+                series = self._series.get(name)
+                if series is None:
+                    series = _Series(self.root, name, SERIES[name])
+                    self._series[name] = series
+        return series
+
+    # -------------------------- writing --------------------------------- #
+
+    def append(self, name: str, record: Sequence) -> None:
+        """Queue one record (t first, then the series' fields)."""
+        with self._lock:
+            self._append(name, record)
+            rollup = self._rollups.get(name)
+            if rollup is not None:
+                rollup.add(record)
+
+    def _append(self, name: str, record: Sequence) -> None:
+        series = self._get(name)
+        with self._lock:
+            series.append(record)
+            if series.pending_count >= self.batch_records:
+                series.flush()
+            self._flush_stale()
+
+    def _flush_stale(self) -> None:
+        """Flush every series whose oldest waiting record is too old."""
+        now = time.monotonic()
+        for series in self._series.values():
+            if series.first_pending_at is not None and (
+                now - series.first_pending_at >= self.flush_interval_s
+            ):
+                series.flush()
+
+    def label_id(self, name: str, label: str) -> int:
+        """Small integer for a label (e.g. a DS18B20 id) in a series."""
+        series = self._get(name)
+        with self._lock:
+            if label not in series.labels:
+                series.labels.append(label)
+                series.save_index()
+            return series.labels.index(label)
+
+    def labels(self, name: str) -> List[str]:
+        return list(self._get(name).labels)
+
+    def flush(self) -> None:
+        with self._lock:
+            for series in self._series.values():
+                series.flush()
+
+    def close(self) -> None:
+        """Emit open rollup buckets and flush everything."""
+        with self._lock:
+            for rollup in self._rollups.values():
+                rollup.close()
+            self.flush()
+
+    # -------------------------- reading --------------------------------- #
+
+    def segments(self, name: str) -> Dict[str, List[float]]:
+        """{day: [t_first, t_last, count]} as on disk."""
+        series = self._get(name)
+        with self._lock:
+            if not series.pending:
+                series.load_index()   # may be written by another process
+            return {day: list(seg) for day, seg in series.segments.items()}
+
+    def query(self, name: str, t0: Optional[float] = None,
+              t1: Optional[float] = None) -> Iterator[tuple]:
+        """Records with t0 <= t < t1, oldest first."""
+        series = self._get(name)
+        lo = float("-inf") if t0 is None else t0
+        hi = float("inf") if t1 is None else t1
+        rec = series.struct
+        # Disk and buffer snapshot together: records flushed after this
+        # are in `pending` and are not read again from the file.
+        with self._lock:
+            segments = self.segments(name)
+            pending = [(day, bytes(buf), first, last)
+                       for day, (buf, first, last, _) in
+                       series.pending.items()]
+        for day, (first, last, count) in sorted(segments.items()):
+            if last < lo or first >= hi:
+                continue
+            yield from self._query_segment(series.segment_path(day), rec,
+                                           int(count), lo, hi)
+        for _, buf, first, last in sorted(pending):
+            if last < lo or first >= hi:
+                continue
+            for record in rec.iter_unpack(buf):
+                if lo <= record[0] < hi:
+                    yield record
+
+    @staticmethod
+    def _query_segment(path: str, rec: struct.Struct, count: int,
+                       lo: float, hi: float) -> Iterator[tuple]:
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            n = min(size // rec.size, count)
+            if n == 0:
+                return
+            with mmap.mmap(f.fileno(), n * rec.size,
+                           access=mmap.ACCESS_READ) as mm:
+                stamps = _Stamps(mm, rec.size, n)
+                start = bisect.bisect_left(stamps, lo)
+                end = bisect.bisect_left(stamps, hi, start)
+                # Copy bounded chunks so no buffer export outlives the map
+                for i in range(start, end, READ_CHUNK):
+                    j = min(i + READ_CHUNK, end)
+                    yield from rec.iter_unpack(
+                        mm[i * rec.size:j * rec.size]
+                    )
+
+    def fields(self, name: str) -> Tuple[str, ...]:
+        return SERIES[name].fields
+
+    @staticmethod
+    def rollup_key(name: str) -> Optional[str]:
+        """Field that splits a series' rollup buckets (None: no key)."""
+        return ROLLUPS.get(name)
+
+
+class _Stamps:
+    """Read-only view of the t field of every record, for bisect."""
+
+    def __init__(self, mm: mmap.mmap, size: int, n: int):
+        self._mm = mm
+        self._size = size
+        self._n = n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> float:
+        return _T.unpack_from(self._mm, i * self._size)[0]
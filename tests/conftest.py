@@ -0,0 +1,9 @@
+"""pytest configuration for the tests directory."""
+
+# On-device demo scripts: they open real hardware at import time and loop
+# forever, so they are run by hand on the Pi, not collected.
+collect_ignore = [
+    "test_lcm1602.py",
+    "test_stepper8825_real.py",
+    "test_vl53l0x.py",
+]
@@ -0,0 +1,54 @@
+"""Tests for round-robin ADS1115 channel scheduling."""
+
+import pytest
+
+from adc_scheduler import MACHINES, AdcScheduler, ChannelConfig
+from ads_sampler import SyntheticAdc, mains_current
+
+
+def _adc():
+    return SyntheticAdc({
+        0: mains_current(amps_v=0.5, seed=1),
+        1: mains_current(amps_v=0.2, on=(), seed=2),
+        2: mains_current(amps_v=0.3, seed=3),
+        3: lambda t: 1.25,
+    })
+
+
+def test_rates_are_met_and_spread_evenly():
+    adc = _adc()
+    sched = AdcScheduler(adc, MACHINES, data_rate=860)
+    sched.run_slots(860 * 5)
+    report = sched.report()
+    for cfg in MACHINES:
+        r = report[cfg.name]
+        assert abs(r["rate_hz"] - cfg.rate_hz) <= 1.0
+        assert r["max_late_slots"] <= len(MACHINES)
+    assert adc.conversions == sum(r["samples"] for r in report.values())
+    assert sched.idle_slots == 860 * 5 - adc.conversions
+
+
+def test_window_stats_per_channel():
+    sched = AdcScheduler(_adc(), MACHINES, data_rate=860, window_s=0.1)
+    seen = []
+    sched.add_listener(lambda name, stats: seen.append(name))
+    sched.run_slots(860)
+    assert seen.count("tablesaw") == 10 and seen.count("spare") == 10
+    assert sched.latest("tablesaw").rms > 0.3
+    assert sched.latest("lathe").rms < 0.05
+    assert abs(sched.latest("spare").rms - 1.25) < 1e-9
+    t, v = sched["drill press"].buffer.view()
+    assert len(t) == 160 and v.shape == (160, 1)
+
+
+def test_single_channel_never_switches_mux():
+    adc = _adc()
+    sched = AdcScheduler(adc, [ChannelConfig(0, "saw", 800.0)])
+    sched.run_slots(500)
+    assert sched.mux_switches == 1
+
+
+def test_overbooked_rates_are_rejected():
+    with pytest.raises(ValueError):
+        AdcScheduler(_adc(), [ChannelConfig(0, "a", 500.0),
+                              ChannelConfig(1, "b", 400.0)])
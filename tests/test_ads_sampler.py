@@ -0,0 +1,51 @@
+"""Tests for windowed RMS sampling on the synthetic ADS1115 backend."""
+
+import math
+import time
+
+import numpy as np
+
+from ads_sampler import AdsSampler, SyntheticAdc, mains_current, window_stats
+
+
+def test_window_stats_sine_and_dc():
+    t = np.arange(860) / 860
+    s = window_stats(0.0, 0, 0.4 * np.sin(2 * math.pi * 60 * t))
+    assert abs(s.rms - 0.4 / math.sqrt(2)) < 1e-3
+    assert abs(s.ac_rms - s.rms) < 1e-3 and abs(s.mean) < 1e-3
+    assert 0.39 < s.peak <= 0.4
+    dc = window_stats(0.0, 0, np.full(86, 0.6))
+    assert math.isclose(dc.rms, 0.6) and dc.ac_rms < 1e-9
+
+
+def test_rms_separates_on_and_off_where_single_samples_do_not():
+    wave = mains_current(amps_v=0.3, noise_v=0.005, on=((1.0, 2.0),))
+    adc = SyntheticAdc({0: wave})
+    sampler = AdsSampler(adc, channel=0, data_rate=860, window_s=0.1)
+    adc.configure(0, 860)
+    rms = [sampler.collect().rms for _ in range(30)]
+    off, on = rms[:9] + rms[21:], rms[11:19]
+    assert max(off) < 0.02 and min(on) > 0.2
+    # One instantaneous sample of the running machine is often near zero
+    adc.t = 1.5
+    raw = []
+    for _ in range(100):
+        adc.wait_ready()
+        raw.append(abs(adc.read_volts()))
+    assert min(raw) < 0.05
+    assert adc.conversions == 30 * 86 + 100
+
+
+def test_thread_publishes_windows():
+    adc = SyntheticAdc({2: mains_current(amps_v=0.5)}, realtime=True)
+    sampler = AdsSampler(adc, channel=2, data_rate=860, window_s=0.02)
+    seen = []
+    sampler.add_listener(seen.append)
+    sampler.start()
+    deadline = time.monotonic() + 2.0
+    while len(seen) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sampler.stop()
+    assert not sampler.running
+    assert len(seen) >= 3 and seen[-1].channel == 2
+    assert sampler.latest.n == 17 and sampler.latest.rms > 0.3
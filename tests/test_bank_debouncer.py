@@ -0,0 +1,65 @@
+"""Tests for the vectorized 40-bit BankDebouncer."""
+
+import random
+
+from bank_debouncer import BankDebouncer
+
+ALL_HIGH = (1 << 40) - 1
+
+
+def test_press_is_accepted_after_threshold():
+    db = BankDebouncer(sample_period_s=0.005, debounce_ms=15)  # 3 samples
+    pressed = ALL_HIGH & ~(1 << 34)
+    assert db.update(pressed) == (ALL_HIGH, 0, 0)
+    assert db.update(pressed) == (ALL_HIGH, 0, 0)
+    stable, rising, falling = db.update(pressed)
+    assert stable == pressed
+    assert falling == 1 << 34 and rising == 0
+    assert db.settled
+    stable, rising, falling = db.update(pressed)
+    assert (rising, falling) == (0, 0)
+
+
+def test_bounce_is_rejected():
+    db = BankDebouncer(sample_period_s=0.005, debounce_ms=20)  # 4 samples
+    low = ALL_HIGH & ~(1 << 3)
+    for raw in (low, ALL_HIGH, low, ALL_HIGH, low, ALL_HIGH, ALL_HIGH):
+        stable, _, _ = db.update(raw)
+        assert stable == ALL_HIGH
+    assert db.settled
+
+
+def test_per_pin_times():
+    db = BankDebouncer(sample_period_s=0.001, debounce_ms=2,
+                       pin_ms={5: 10})
+    raw = ALL_HIGH & ~(1 << 1) & ~(1 << 5)
+    fell_at = {}
+    for n in range(1, 12):
+        _, _, falling = db.update(raw)
+        for pin in (1, 5):
+            if falling >> pin & 1:
+                fell_at[pin] = n
+    assert fell_at == {1: 2, 5: 10}
+
+
+def test_matches_scalar_integrator():
+    """Vertical counters behave like one integrator per pin."""
+    rng = random.Random(1)
+    thresholds = {pin: rng.randint(1, 9) for pin in range(40)}
+    db = BankDebouncer(sample_period_s=0.001, debounce_ms=1,
+                       pin_ms={p: n for p, n in thresholds.items()})
+    count = [0] * 40
+    stable = [1] * 40
+    for _ in range(2000):
+        raw = rng.getrandbits(40)
+        got, _, _ = db.update(raw)
+        for pin in range(40):
+            level = raw >> pin & 1
+            if level != stable[pin]:
+                count[pin] += 1
+                if count[pin] >= thresholds[pin]:
+                    stable[pin] = level
+                    count[pin] = 0
+            elif count[pin]:
+                count[pin] -= 1
+        assert got == sum(bit << pin for pin, bit in enumerate(stable))
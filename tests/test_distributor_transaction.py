@@ -0,0 +1,60 @@
+"""Tests for batched Distributor register updates (fake SPI/latch)."""
+
+import pytest
+
+from distributor import Distributor, FakeLatch, FakeSpi
+
+
+def _make_dist():
+    spi = FakeSpi()
+    dist = Distributor(spi=spi, latch=FakeLatch(spi))
+    dist.disable_all()
+    dist.latch.history.clear()
+    return dist
+
+
+def test_transaction_sends_one_update():
+    dist = _make_dist()
+    before = dist.flushes
+    with dist.transaction():
+        dist.set_enable(2, True)
+        dist.set_dir(2, 1)
+        with dist.transaction():        # nested: commits with the outer
+            dist.set_dir(3, 1)
+        assert dist.flushes == before
+    assert dist.flushes == before + 1 and dist.commits >= 1
+    assert dist.latch.history[-1][1] == dist.bits
+
+
+def test_unchanged_flush_is_skipped():
+    dist = _make_dist()
+    before, skipped = dist.flushes, dist.skipped
+    dist.set_enable(1, False)           # already disabled
+    with dist.transaction():
+        dist.set_dir(1, 1)
+        dist.set_dir(1, 0)              # back where it was
+    assert dist.flushes == before
+    assert dist.skipped == skipped + 2
+
+
+def test_step_inside_transaction_still_pulses_after_dir():
+    dist = _make_dist()
+    step_bit = 1 << Distributor.MOTOR_MAP[1]['step']
+    dir_bit = 1 << Distributor.MOTOR_MAP[1]['dir']
+    with dist.transaction():
+        dist.set_dir(1, 1)
+        dist.step(1, pulse_us=0)
+    words = [w for _, w in dist.latch.history]
+    # DIR settles on its own update before the STEP edge
+    assert words[0] & dir_bit and not words[0] & step_bit
+    assert words[1] & step_bit and not words[2] & step_bit
+
+
+def test_failed_transaction_rolls_back():
+    dist = _make_dist()
+    bits, before = dist.bits, dist.flushes
+    with pytest.raises(RuntimeError):
+        with dist.transaction():
+            dist.set_enable(4, True)
+            raise RuntimeError("abort")
+    assert dist.bits == bits and dist.flushes == before
@@ -0,0 +1,59 @@
+"""Tests for the Distributor waveform engine (fake SPI/latch backend)."""
+
+import pytest
+
+from distributor import Distributor, FakeLatch, FakeSpi
+
+
+def _make_dist():
+    spi = FakeSpi()
+    return Distributor(spi=spi, latch=FakeLatch(spi))
+
+
+def _pulses(history, bitnum):
+    """Count rising edges of one output bit in the latched history."""
+    count = 0
+    prev = 0
+    for _, word in history:
+        level = (word >> bitnum) & 1
+        if level and not prev:
+            count += 1
+        prev = level
+    return count
+
+
+def test_all_motors_get_their_steps():
+    dist = _make_dist()
+    moves = {1: (100, 1000), 2: (50, 500), 3: (100, 1000), 4: (7, 300)}
+    wave = dist.build_waveform(moves)
+    dist.latch.history.clear()
+    dist.play(wave)
+    for motor, (steps, _) in moves.items():
+        bitnum = Distributor.MOTOR_MAP[motor]['step']
+        assert _pulses(dist.latch.history, bitnum) == steps
+
+
+def test_coincident_steps_share_frames():
+    dist = _make_dist()
+    wave = dist.build_waveform({m: (200, 1000) for m in (1, 2, 3, 4)})
+    # One high and one low frame per step time, not per motor.
+    assert len(wave) == 2 * 200
+    assert abs(wave.duration_s - 0.2) < 0.001
+
+
+def test_enable_and_dir_bits_are_kept():
+    dist = _make_dist()
+    dist.set_enable(2, True)
+    dist.set_dir(2, 1)
+    before = dist.bits
+    wave = dist.build_waveform({2: (10, 2000)})
+    dist.play(wave)
+    assert dist.bits == before
+    dir_bit = 1 << Distributor.MOTOR_MAP[2]['dir']
+    assert all(word & dir_bit for _, word in dist.latch.history[-len(wave):])
+
+
+def test_rate_too_high_for_tick_is_rejected():
+    dist = _make_dist()
+    with pytest.raises(ValueError):
+        dist.build_waveform({1: (10, 20000)}, tick_s=0.0001)
@@ -0,0 +1,95 @@
+"""Tests for the SSE broadcaster and the controller event datagrams."""
+
+import threading
+import time
+
+from event_stream import (
+    KEEPALIVE,
+    Broadcaster,
+    EventReceiver,
+    EventSender,
+)
+
+
+def test_new_subscriber_gets_latest_of_each_kind_then_live_events():
+    b = Broadcaster()
+    b.publish("pms", {"seq": 1})
+    b.publish("gate", {"state": "open"})
+    b.publish("pms", {"seq": 2})
+    stream = b.stream(keepalive_s=0.01)
+    first = next(stream)
+    assert b'"state":"open"' in first and b'"seq":2' in first
+    assert b'"seq":1' not in first
+    assert b.subscribers == 1
+    assert next(stream) == KEEPALIVE
+    b.publish("current", {"on": True})
+    assert next(stream) == b'id: 4\nevent: current\ndata: {"on":true}\n\n'
+    stream.close()
+    assert b.subscribers == 0
+
+
+def test_resume_from_last_event_id():
+    b = Broadcaster(backlog=3)
+    for n in range(5):
+        b.publish("pms", {"n": n})
+    chunk = next(b.stream(last_id=3, keepalive_s=0.01))
+    assert chunk.startswith(b"id: 4\n") and b"id: 5\n" in chunk
+    # ids 1-2 are older than the backlog: start over from the snapshot
+    chunk = next(b.stream(last_id=0, keepalive_s=0.01))
+    assert chunk == b'id: 5\nevent: pms\ndata: {"n":4}\n\n'
+
+
+def test_stale_last_event_id_after_restart_is_treated_as_new():
+    b = Broadcaster()
+    b.publish("gate", {"state": "open"})
+    stream = b.stream(last_id=5000, keepalive_s=0.01)
+    assert next(stream).startswith(b"id: 1\nevent: gate\n")
+    for n in range(10):
+        b.publish("pms", {"n": n})
+    got = b""
+    while got.count(b"event: pms") < 10:
+        chunk = next(stream)
+        assert chunk != KEEPALIVE
+        got += chunk
+    assert b"id: 2\n" in got and b"id: 11\n" in got
+    stream.close()
+
+
+def test_fan_out_to_many_threads():
+    b = Broadcaster()
+    stop = threading.Event()
+    got = []
+
+    def client():
+        data = b"".join(b.stream(keepalive_s=0.05, stop=stop))
+        got.append(data.count(b"event: pms"))
+
+    threads = [threading.Thread(target=client) for _ in range(20)]
+    for t in threads:
+        t.start()
+    while b.subscribers < 20:
+        time.sleep(0.001)
+    for n in range(50):
+        b.publish("pms", {"n": n})
+    time.sleep(0.1)
+    stop.set()
+    b.wake_all()
+    for t in threads:
+        t.join()
+    assert got == [50] * 20
+
+
+def test_sender_to_receiver():
+    b = Broadcaster()
+    rx = EventReceiver(b, port=0)
+    rx.start()
+    try:
+        tx = EventSender(*rx.addr)
+        tx.send("gate", {"gate": 1, "state": "closing"})
+        deadline = time.monotonic() + 2
+        while b.last_id == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        tx.close()
+    finally:
+        rx.stop()
+    assert b.last_id == 1
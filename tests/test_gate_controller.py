@@ -0,0 +1,192 @@
+"""Tests for multi-gate orchestration (fake SPI/latch, simulated gates)."""
+
+import asyncio
+import json
+
+from ads_sampler import synthetic_trace
+from distributor import Distributor, FakeLatch, FakeSpi
+from gate_controller import (
+    DEFAULT_GATES,
+    ControllerConfig,
+    GateController,
+    Impeller,
+    load_config,
+)
+from motion_service import MotionService
+from power_state import PowerEdge, replay
+
+TRAVEL = 20                 # steps between the limits
+
+
+class GateSim:
+    """Counts steps per motor and drives the limit bits from them."""
+
+    def __init__(self, dist):
+        self.dist = dist
+        self.pos = {g.motor: 0 for g in DEFAULT_GATES}   # 0 = closed
+        self.max_moving = 0
+        step = dist.step
+
+        def counted(motor, pulse_us=20):
+            dir_bit = Distributor.MOTOR_MAP[motor]['dir']
+            opening = not dist.bits & (1 << dir_bit)     # cw = open
+            delta = 1 if opening else -1
+            self.pos[motor] = max(0, min(TRAVEL, self.pos[motor] + delta))
+            step(motor, pulse_us)
+
+        dist.step = counted
+
+    def word(self):
+        word = (1 << 40) - 1
+        for g in DEFAULT_GATES:
+            if self.pos[g.motor] == 0:
+                word &= ~(1 << g.pin_closed)
+            if self.pos[g.motor] == TRAVEL:
+                word &= ~(1 << g.pin_open)
+        return word
+
+
+def _controller(events=None, **config):
+    spi = FakeSpi()
+    dist = Distributor(spi=spi, latch=FakeLatch(spi, record=False))
+    sim = GateSim(dist)
+    svc = MotionService(dist, sim.word)
+    relay = []
+    ctl = GateController(
+        svc, sim.word,
+        ControllerConfig(spin_down_s=0.1, impeller_lead_s=0.01,
+                         preopen_confirm_s=0.1, **config),
+        Impeller(write=relay.append), intervals=(0.001,),
+        on_event=None if events is None else (
+            lambda kind, data: events.append((kind, data))),
+    )
+    return ctl, sim, svc, relay
+
+
+def _edge(name, kind):
+    return PowerEdge(0.0, name, kind, 1.0, 0.5)
+
+
+def test_three_machines_open_concurrently_then_spin_down():
+    ctl, sim, svc, relay = _controller()
+
+    async def run():
+        ctl.bind()
+        for g in DEFAULT_GATES:
+            ctl.handle(_edge(g.machine, "on"))
+        await asyncio.sleep(0.005)
+        moving = sum(svc.busy(g.motor) for g in DEFAULT_GATES)
+        assert not ctl.impeller.on
+        await asyncio.sleep(0.08)
+        assert ctl.impeller.on
+        opened = dict(sim.pos)
+        ctl.handle(_edge("tablesaw", "off"))
+        ctl.handle(_edge("lathe", "off"))
+        await asyncio.sleep(0.15)
+        assert ctl.impeller.on            # drill press still running
+        assert sim.pos[1] == TRAVEL       # flushing gates stay open
+        ctl.handle(_edge("drill press", "off"))
+        await asyncio.sleep(0.05)
+        assert ctl.impeller.on            # spinning down
+        await asyncio.sleep(0.2)
+        await ctl.stop()
+        return moving, opened
+
+    moving, opened = asyncio.run(run())
+    assert moving == 3
+    assert all(p == TRAVEL for p in opened.values())
+    assert all(p == 0 for p in sim.pos.values())
+    assert relay == [True, False]
+    assert all(g.state == "closed" for g in ctl.gates.values())
+
+
+def test_restart_during_spin_down_keeps_impeller_on():
+    ctl, sim, svc, relay = _controller()
+
+    async def run():
+        ctl.bind()
+        ctl.handle(_edge("lathe", "on"))
+        await asyncio.sleep(0.05)
+        ctl.handle(_edge("lathe", "off"))
+        await asyncio.sleep(0.05)
+        ctl.handle(_edge("lathe", "on"))
+        await asyncio.sleep(0.15)
+        state = ctl.gates["lathe"].state
+        await ctl.stop()
+        return state
+
+    assert asyncio.run(run()) == "running"
+    assert relay == [True, False]         # the final False is stop()
+    assert sim.pos[2] == TRAVEL
+
+
+def test_onset_preopens_and_false_start_backs_out():
+    ctl, sim, svc, relay = _controller()
+
+    async def run():
+        ctl.bind()
+        ctl.handle(_edge("tablesaw", "onset"))
+        await asyncio.sleep(0.05)
+        early = (ctl.gates["tablesaw"].state, sim.pos[1] > 0,
+                 ctl.impeller.on)
+        await asyncio.sleep(0.15)         # never confirmed ON
+        await asyncio.sleep(0.05)
+        late = (ctl.gates["tablesaw"].state, ctl.impeller.on)
+        # A confirmed start keeps the pre-opened gate
+        ctl.handle(_edge("lathe", "onset"))
+        await asyncio.sleep(0.02)
+        ctl.handle(_edge("lathe", "on"))
+        await asyncio.sleep(0.15)
+        lathe = ctl.gates["lathe"].state
+        await ctl.stop()
+        return early, late, lathe
+
+    early, late, lathe = asyncio.run(run())
+    assert early == ("preopen", True, True)
+    assert late == ("closed", False)
+    assert sim.pos[1] == 0
+    assert lathe == "running" and sim.pos[2] == TRAVEL
+    assert ctl.false_starts == 1
+
+
+def test_load_config_carries_flat_v(tmp_path):
+    path = tmp_path / "gates.json"
+    path.write_text(json.dumps({"gates": [
+        {"machine": "saw", "adc_channel": 0, "motor": 1, "pin_open": 34,
+         "pin_closed": 33, "flat_v": 0.0005},
+        {"machine": "lathe", "adc_channel": 1, "motor": 2, "pin_open": 37,
+         "pin_closed": 36},
+    ]}))
+    gates = load_config(str(path)).gates
+    assert [g.flat_v for g in gates] == [0.0005, 0.0]
+    assert all(g.flat_v == 0.0 for g in DEFAULT_GATES)
+
+
+def test_default_gates_flag_a_dead_sensor():
+    dead = synthetic_trace(lambda t: 0.0, 5.0)        # no output at all
+    for gate in DEFAULT_GATES:
+        edges = replay(dead, gate.classifier())
+        assert [(e.kind, e.detail) for e in edges] == [("fault", "dead")]
+    # a live DC sensor idling on one code at its offset is not a fault
+    idle = synthetic_trace(lambda t: 0.5, 5.0)
+    assert replay(idle, DEFAULT_GATES[0].classifier()) == []
+
+
+def test_move_to_a_limit_already_reached_still_reports_it():
+    events = []
+    ctl, sim, svc, relay = _controller(events)
+
+    async def run():
+        ctl.bind()
+        ctl.handle(_edge("lathe", "on"))
+        await asyncio.sleep(0.1)
+        assert sim.pos[2] == TRAVEL
+        events.clear()
+        ctl._move(ctl.gates["lathe"], opening=True)   # already open
+        await asyncio.sleep(0.01)
+        await ctl.stop()
+
+    asyncio.run(run())
+    gate_events = [d for kind, d in events if kind == "gate"]
+    assert [(d["gate"], d["state"], d["steps"]) for d in gate_events] \
+        == [(2, "open", 0)]
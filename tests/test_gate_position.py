@@ -0,0 +1,70 @@
+"""Tests for step-counted gate positions."""
+
+import asyncio
+
+from distributor import Distributor, FakeLatch, FakeSpi
+from gate_position import PositionTracker, load_positions
+from motion_service import MotionService
+
+ALL_HIGH = (1 << 40) - 1
+OPEN_PIN = 34
+CLOSED_PIN = 33
+
+
+def test_count_learns_travel_and_fraction():
+    tracker = PositionTracker()
+    assert tracker.fraction_open(1) is None
+    tracker.begin(1, 0)                  # homing: unknown start
+    tracker.end(1, 37, "limit")
+    assert tracker[1].known and tracker[1].steps == 0
+    tracker.begin(1, 1)
+    tracker.progress(1, 100)
+    assert tracker[1].steps == 100 and tracker.fraction_open(1) is None
+    tracker.end(1, 400, "limit")         # open limit: travel learned
+    assert tracker[1].travel == 400 and tracker.fraction_open(1) == 1.0
+    assert tracker.steps_to(1, 0.25) == (0, 300)
+    tracker.begin(1, 0)
+    tracker.end(1, 300, "target")
+    assert tracker.fraction_open(1) == 0.25
+    tracker.begin(1, 0)
+    tracker.end(1, 50, "timeout")        # may have lost steps
+    assert tracker.fraction_open(1) is None
+
+
+def test_positions_persist_and_interrupted_move_is_unknown(tmp_path):
+    path = str(tmp_path / "positions.json")
+    tracker = PositionTracker(path)
+    tracker.closed(1)
+    tracker.closed(2)
+    for motor in (1, 2):
+        tracker.begin(motor, 1)
+        tracker.end(motor, 200, "limit")
+    tracker.begin(1, 0)
+    tracker.end(1, 50, "target")
+    tracker.begin(2, 0)                  # still running at the "crash"
+    tracker.progress(2, 20)
+    assert load_positions(path)[2].moving
+    resumed = PositionTracker(path)
+    assert resumed.fraction_open(1) == 0.75
+    assert resumed[2].travel == 200 and resumed.fraction_open(2) is None
+
+
+def test_motion_service_counts_and_parks_gate():
+    spi = FakeSpi()
+    dist = Distributor(spi=spi, latch=FakeLatch(spi, record=False))
+    word = [ALL_HIGH & ~(1 << CLOSED_PIN)]
+    tracker = PositionTracker()
+    tracker.closed(1)
+    tracker[1].travel = 40
+    svc = MotionService(dist, lambda: word[0], positions=tracker)
+
+    async def run():
+        word[0] = ALL_HIGH                   # leaves the closed limit
+        task = svc.start_move_to(1, 0.5, OPEN_PIN, CLOSED_PIN,
+                                 intervals=(0.0005,))
+        return await task
+
+    result = asyncio.run(run())
+    assert result.reason == "target" and result.steps == 20
+    assert tracker.fraction_open(1) == 0.5
+    assert not tracker[1].moving
@@ -0,0 +1,58 @@
+"""Tests for the priority I2C bus arbiter (FakeSMBus backend)."""
+
+import threading
+import time
+
+from fake_smbus import FakeSMBus
+from i2c_arbiter import ADC, DISPLAY, SAFETY, BusArbiter
+from pcf8574_in import PCF8574_in
+
+
+class _OrderBus(FakeSMBus):
+    def __init__(self):
+        super().__init__()
+        self.order = []
+
+    def read_byte(self, addr):
+        self.order.append(addr)
+        return super().read_byte(addr)
+
+
+def test_waiting_transactions_run_in_priority_order():
+    bus = _OrderBus()
+    arbiter = BusArbiter(bus)
+    display = arbiter.client("oled", DISPLAY)
+    adc = arbiter.client("ads", ADC)
+    inputs = arbiter.client("inputs", SAFETY)
+
+    threads = []
+    with display.transaction():          # a frame is on the wire
+        for client, addr in ((display, 0x3C), (adc, 0x48),
+                             (inputs, 0x20)):
+            t = threading.Thread(target=client.read_byte, args=(addr,))
+            t.start()
+            threads.append(t)
+            time.sleep(0.02)             # queued in this order
+        display.read_byte(0x3D)          # re-entrant for the holder
+    for t in threads:
+        t.join(1.0)
+    assert bus.order == [0x3D, 0x20, 0x48, 0x3C]
+    report = {r.name: r for r in arbiter.report()}
+    assert report["inputs"].wait_max_ms >= 15    # behind the frame only
+    assert report["oled"].wait_max_ms > report["inputs"].wait_max_ms
+    assert report["oled"].transactions == 2      # transaction + 1 call
+
+
+def test_clients_share_one_handle_with_stats():
+    bus = FakeSMBus(bus_hz=100_000)
+    arbiter = BusArbiter(bus)
+    client = arbiter.client("inputs", SAFETY)
+    chips = [PCF8574_in(0x20 + i, bus=client) for i in range(2)]
+    bus.port[0x21] = 0x5A
+    assert chips[1].read_all() == 0x5A
+    report = arbiter.report()[0]
+    assert report.name == "inputs" and report.transactions == 3
+    assert 0 < report.utilization < 1
+    assert "inputs" in arbiter.format_report()
+    client.close()                       # no-op: the arbiter owns it
+    arbiter.close()
@@ -0,0 +1,95 @@
+"""Tests for the shared input-expander sampler (fake chips)."""
+
+import threading
+
+import pytest
+
+from input_bank import ALL_HIGH, InputBank
+
+
+class FakeChip:
+    """read_all() device with a settable port byte."""
+
+    def __init__(self, value=0xFF):
+        self.value = value
+        self.fail = False
+        self.reads = 0
+
+    def read_all(self):
+        self.reads += 1
+        if self.fail:
+            raise OSError("I2C NACK")
+        return self.value
+
+
+def _bank(**kwargs):
+    chips = [FakeChip() for _ in range(5)]
+    return InputBank(devices=chips, **kwargs), chips
+
+
+def test_snapshot_word_packs_chips_lowest_first():
+    bank, chips = _bank()
+    assert bank.snapshot.word == ALL_HIGH and bank.snapshot.seq == 1
+    chips[0].value = 0xFE          # pin 0
+    chips[4].value = 0x7F          # pin 39
+    snap = bank.sample()
+    assert snap.word == ALL_HIGH & ~(1 << 0) & ~(1 << 39)
+    assert snap.is_low(0) and snap.is_low(39) and not snap.is_low(8)
+    assert snap.seq == 2 and bank.word() == snap.word
+    assert bank.reads == 15        # three samples of five chips
+
+
+def test_listeners_get_changed_mask_only_on_change():
+    bank, chips = _bank()
+    calls = []
+    bank.add_listener(lambda snap, changed: calls.append((snap, changed)))
+    bank.sample()
+    assert calls == []
+    chips[1].value = 0xF7          # chip 1 bit 3 = pin 11
+    bank.sample()
+    chips[1].value = 0xFF
+    chips[2].value = 0xFE          # pin 16
+    bank.sample()
+    assert [changed for _, changed in calls] == [
+        1 << 11, (1 << 11) | (1 << 16)
+    ]
+    assert calls[0][0].is_low(11) and not calls[1][0].is_low(11)
+
+
+def test_partial_sample_when_one_chip_fails():
+    bank, chips = _bank()
+    chips[0].value = 0xFE
+    chips[2].value = 0x00
+    bank.sample()
+    chips[0].value = 0xFF
+    chips[2].value = 0xFF
+    chips[2].fail = True
+    with pytest.raises(OSError):
+        bank.sample()
+    snap = bank.snapshot
+    assert not snap.is_low(0)                  # good chip updated
+    assert (snap.word >> 16) & 0xFF == 0x00    # failed chip keeps its bits
+    assert snap.stale == 0xFF << 16            # ... flagged as stale
+    assert snap.is_stale(16) and not snap.is_stale(0)
+    assert chips[3].reads == chips[1].reads    # later chips still read
+    assert bank.sample(chips=[0]).stale == 0xFF << 16   # not re-read
+    chips[2].fail = False
+    assert bank.sample().stale == 0
+
+
+def test_start_and_stop_sampler_thread():
+    bank, chips = _bank(period_s=0.001)
+    changed = threading.Event()
+    bank.add_listener(lambda snap, mask: changed.set())
+    bank.start()
+    try:
+        assert bank.running
+        chips[3].value = 0xEF
+        assert changed.wait(1.0)
+        assert bank.read().is_low(28)
+    finally:
+        bank.stop()
+    assert not bank.running
+    seq = bank.snapshot.seq
+    chips[3].value = 0xFF
+    assert bank.read().seq == seq + 1      # stopped: read() samples now
@@ -0,0 +1,110 @@
+"""Tests for interrupt-driven input sampling (simulated INT lines)."""
+
+import threading
+import time
+
+from fake_smbus import FakeSMBus
+from hardware.switchcontroller import GPIOA, SwitchController
+from input_bank import InputBank
+from input_interrupt import (
+    TRIGGERS_KEPT,
+    InterruptSource,
+    SimulatedInterrupt,
+)
+
+
+class FakeChip:
+    def __init__(self):
+        self.value = 0xFF
+        self.reads = 0
+
+    def read_all(self):
+        self.reads += 1
+        return self.value
+
+
+def _bank(fallback_period_s):
+    chips = [FakeChip() for _ in range(5)]
+    irq = SimulatedInterrupt()
+    bank = InputBank(devices=chips, interrupt=irq,
+                     fallback_period_s=fallback_period_s)
+    changed = threading.Event()
+    bank.add_listener(lambda snap, mask: changed.set())
+    return bank, chips, irq, changed
+
+
+def test_wait_collects_triggered_chips_or_times_out():
+    irq = SimulatedInterrupt()
+    assert isinstance(irq, InterruptSource)
+    t0 = time.monotonic()
+    assert irq.wait(0.02) == frozenset()
+    assert time.monotonic() - t0 >= 0.015
+    irq.trigger([1])
+    irq.trigger([3, 1])
+    assert irq.wait(1.0) == {1, 3}
+    assert len(irq.triggers) == 2 and irq.still_asserted() == frozenset()
+
+
+def test_trigger_history_is_bounded_and_wake_is_not_a_trigger():
+    irq = SimulatedInterrupt()
+    for _ in range(TRIGGERS_KEPT + 10):
+        irq.trigger([0])
+    assert len(irq.triggers) == TRIGGERS_KEPT
+    irq.wait(0.0)
+    irq.triggers.clear()
+    woke = threading.Thread(target=lambda: irq.wait(5.0))
+    woke.start()
+    time.sleep(0.01)
+    irq.wake()
+    woke.join(1.0)
+    assert not woke.is_alive() and len(irq.triggers) == 0
+
+
+def test_interrupt_wakes_sampler_and_reads_only_that_chip():
+    bank, chips, irq, changed = _bank(fallback_period_s=10.0)
+    bank.start()
+    try:
+        before = [c.reads for c in chips]
+        chips[2].value = 0xFB          # pin 18
+        irq.trigger([2])
+        assert changed.wait(1.0)
+        assert bank.snapshot.is_low(18)
+        assert bank.wakeups == 1
+        reads = [c.reads - b for c, b in zip(chips, before)]
+        assert reads == [0, 0, 1, 0, 0]
+    finally:
+        bank.stop()
+    assert not bank.running
+    assert len(irq.triggers) == 1          # stop() only wakes the sampler
+
+
+def test_quiet_interrupts_fall_back_to_full_poll():
+    bank, chips, irq, changed = _bank(fallback_period_s=0.01)
+    bank.start()
+    try:
+        chips[4].value = 0x7F          # missed edge: no trigger
+        assert changed.wait(1.0)
+        assert bank.snapshot.is_low(39)
+        assert bank.wakeups == 0
+    finally:
+        bank.stop()
+
+
+def test_switch_controller_wait_for_change():
+    bus = FakeSMBus()
+    bus.write_i2c_block_data(0x20, GPIOA, [0xFF, 0xFF])
+    sc = SwitchController(bus=bus)
+    sc.enable_interrupts()
+    irq = SimulatedInterrupt()
+
+    def press():
+        time.sleep(0.02)
+        bus.write_byte_data(0x20, GPIOA, 0xFD)    # switch 1
+        irq.trigger([0])
+
+    threading.Thread(target=press).start()
+    t0 = time.monotonic()
+    assert sc.wait_for_change(irq, 5.0) == 0xFFFD
+    assert time.monotonic() - t0 < 1.0
+    # Nothing pending: samples anyway after the timeout
+    assert sc.wait_for_change(irq, 0.01) == 0xFFFD
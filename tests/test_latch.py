@@ -0,0 +1,38 @@
+"""Tests for the latch strategies' jitter measurement (software latch)."""
+
+import pytest
+
+from distributor import Distributor, FakeSpi
+from latch import JitterMeter, SoftLatch, make_latch
+
+
+def test_soft_latch_measures_intervals():
+    spi = FakeSpi()
+    dist = Distributor(spi=spi, latch=make_latch("soft", spi=spi))
+    assert isinstance(dist.latch, SoftLatch)
+    dist.disable_all()
+    for motor in (1, 2, 3, 4):
+        dist.set_enable(motor, True)
+    summary = dist.latch.jitter.summary()
+    # reset() in __init__, disable_all(), then one update per enable
+    assert dist.latch.pulses == 6 and summary.n == 5
+    assert dist.latch.output == dist.bits
+    assert 0 < summary.min_us <= summary.mean_us <= summary.max_us
+    assert summary.rate_hz == pytest.approx(1e6 / summary.mean_us)
+
+
+def test_jitter_meter_ring_and_reset():
+    meter = JitterMeter(keep=8)
+    assert meter.summary().n == 0
+    for _ in range(21):
+        meter.mark()
+    s = meter.summary()
+    assert s.n == 20 and s.min_us <= s.p99_us <= s.max_us
+    meter.reset()
+    meter.mark()
+    assert meter.summary().n == 0
+
+
+def test_unknown_latch_rejected():
+    with pytest.raises(ValueError):
+        make_latch("parport")
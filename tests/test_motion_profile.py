@@ -0,0 +1,46 @@
+"""Tests for motion_profile step timing tables."""
+
+import pytest
+
+from distributor import Distributor, FakeLatch, FakeSpi
+from motion_profile import SHAPES, profile_duration, step_intervals
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_ramps_up_cruises_and_ramps_down(shape):
+    iv = step_intervals(2000, 1600.0, 4000.0, 200.0, shape)
+    assert len(iv) == 2000
+    speeds = [1.0 / t for t in iv]
+    assert speeds[0] < 300
+    assert speeds[-1] < 300
+    assert abs(speeds[1000] - 1600.0) < 1.0
+    assert max(speeds) <= 1600.0 + 1e-6
+    # Symmetric decel
+    assert abs(iv[0] - iv[-1]) < 1e-9
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_short_move_never_reaches_cruise(shape):
+    speeds = [1.0 / t for t in step_intervals(50, 5000.0, 4000.0, 200.0,
+                                              shape)]
+    assert max(speeds) < 5000.0
+
+
+def test_faster_than_fixed_start_speed():
+    fixed = 1000 / 200.0
+    assert profile_duration(1000, 1200.0, 4000.0) < fixed / 3
+
+
+def test_tables_are_cached():
+    a = step_intervals(900, 1000.0, 3000.0)
+    assert step_intervals(900, 1000.0, 3000.0) is a
+
+
+def test_profile_drives_distributor_waveform():
+    spi = FakeSpi()
+    dist = Distributor(spi=spi, latch=FakeLatch(spi))
+    iv = step_intervals(300, 1500.0, 5000.0)
+    wave = dist.build_waveform(profiles={1: iv, 2: iv})
+    assert wave.steps == {1: 300, 2: 300}
+    # Waveform ends with the last pulse, not after its trailing interval.
+    assert abs(wave.duration_s - sum(iv[:-1])) < 0.001
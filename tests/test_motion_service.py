@@ -0,0 +1,67 @@
+"""Tests for the asyncio MotionService (fake SPI/latch backend)."""
+
+import asyncio
+
+from distributor import Distributor, FakeLatch, FakeSpi
+from motion_service import MotionService
+
+ALL_HIGH = (1 << 40) - 1
+OPEN_PIN = 34
+CLOSED_PIN = 33
+
+
+def _make_dist():
+    spi = FakeSpi()
+    return Distributor(spi=spi, latch=FakeLatch(spi, record=False))
+
+
+def _enabled(dist, motor):
+    return not dist.bits & (1 << Distributor.MOTOR_MAP[motor]['en'])
+
+
+def test_limit_edge_ends_move_and_disables_driver():
+    dist = _make_dist()
+    word = [ALL_HIGH]
+    svc = MotionService(dist, lambda: word[0])
+
+    async def run():
+        task = svc.start_move(1, 0, OPEN_PIN, CLOSED_PIN,
+                              intervals=(0.002,))
+        await asyncio.sleep(0.05)
+        assert _enabled(dist, 1)
+        word[0] &= ~(1 << OPEN_PIN)
+        svc.notify_inputs()
+        return await task
+
+    result = asyncio.run(run())
+    assert result.reason == "limit"
+    assert 10 <= result.steps <= 40
+    assert not _enabled(dist, 1)
+
+
+def test_moves_overlap_and_cancel_cleanly():
+    dist = _make_dist()
+    svc = MotionService(dist, lambda: ALL_HIGH)
+
+    async def run():
+        a = svc.start_move(1, 0, OPEN_PIN, intervals=(0.001,))
+        b = svc.start_move(2, 1, 36, intervals=(0.001,))
+        await asyncio.sleep(0.05)
+        assert svc.busy(1) and svc.busy(2)
+        await svc.stop_all()
+        return await a, await b
+
+    a, b = asyncio.run(run())
+    assert a.reason == b.reason == "cancelled"
+    assert a.steps > 0 and b.steps > 0
+    assert not _enabled(dist, 1) and not _enabled(dist, 2)
+
+
+def test_max_steps_cap():
+    dist = _make_dist()
+    svc = MotionService(dist, lambda: ALL_HIGH)
+    result = asyncio.run(
+        svc.move_until(3, 0, OPEN_PIN, intervals=(0.0005,), max_steps=25)
+    )
+    assert result.reason == "max_steps"
+    assert result.steps == 25
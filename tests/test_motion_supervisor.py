@@ -0,0 +1,92 @@
+"""Tests for motion_supervisor budgets, drift warnings and persistence."""
+
+import asyncio
+
+import pytest
+
+from distributor import Distributor, FakeLatch, FakeSpi
+from motion_service import MotionService
+from motion_supervisor import (
+    BASELINE_MOVES,
+    DEFAULT_MAX_STEPS,
+    HISTORY,
+    MotionFault,
+    MotionSupervisor,
+)
+
+ALL_HIGH = (1 << 40) - 1
+OPEN_PIN = 34
+CLOSED_PIN = 33
+
+
+def test_budget_learned_from_full_travel():
+    sup = MotionSupervisor()
+    assert sup.budget(1, 0)[0] == DEFAULT_MAX_STEPS
+    for steps in (800, 810, 790):
+        sup.start(1, 0).finish(steps)
+    sup.start(1, 0, full_travel=False).finish(5000)  # partial: ignored
+    max_steps, deadline_s = sup.budget(1, 0)
+    assert max_steps == 1215
+    assert 0 < deadline_s < 1.0
+    assert sup.budget(1, 1)[0] == DEFAULT_MAX_STEPS
+
+
+def test_overrun_raises_and_reports():
+    events = []
+    sup = MotionSupervisor(on_fault=events.append)
+    sup.record(2, 1, 100, 0.1)
+    guard = sup.start(2, 1)
+    guard.check(149)
+    with pytest.raises(MotionFault) as exc:
+        guard.check(150)
+    assert exc.value.event.kind == "step_budget"
+    assert events == [exc.value.event]
+
+
+def test_drift_warning_when_travel_grows():
+    events = []
+    sup = MotionSupervisor(on_fault=events.append)
+    for _ in range(BASELINE_MOVES):
+        sup.record(1, 0, 800, 1.0)
+    for _ in range(HISTORY // 2):
+        sup.record(1, 0, 805, 1.02)
+    assert events == []
+    for _ in range(BASELINE_MOVES):
+        sup.record(1, 0, 1000, 1.3)
+    assert [e.kind for e in events] == ["drift"]      # once per excursion
+    for _ in range(BASELINE_MOVES):
+        sup.record(1, 0, 800, 1.0)                     # back in tolerance
+    for _ in range(BASELINE_MOVES):
+        sup.record(1, 0, 1000, 1.3)
+    assert [e.kind for e in events] == ["drift", "drift"]
+
+
+def test_travel_history_persists(tmp_path):
+    path = str(tmp_path / "travel.json")
+    sup = MotionSupervisor(state_path=path)
+    sup.record(1, 0, 800, 1.0)
+    sup.record(1, 1, 820, 1.1)
+    again = MotionSupervisor(state_path=path)
+    assert again.budget(1, 0) == sup.budget(1, 0)
+    assert again.travel_steps(1, 1) == 820
+
+
+def test_corrupt_state_file_starts_without_travel(tmp_path):
+    path = tmp_path / "travel.json"
+    path.write_text('[{"gate": 1, "direction": 0, "baseline_st')
+    sup = MotionSupervisor(state_path=str(path))
+    assert sup.travel == {}
+    assert sup.budget(1, 0)[0] == DEFAULT_MAX_STEPS
+
+
+def test_service_move_times_out_on_jammed_gate():
+    spi = FakeSpi()
+    dist = Distributor(spi=spi, latch=FakeLatch(spi, record=False))
+    events = []
+    sup = MotionSupervisor(on_fault=events.append, default_deadline_s=0.05)
+    svc = MotionService(dist, lambda: ALL_HIGH, sup)
+    result = asyncio.run(
+        svc.move_until(1, 0, OPEN_PIN, CLOSED_PIN, intervals=(0.002,))
+    )
+    assert result.reason == "timeout"
+    assert [e.kind for e in events] == ["timeout"]
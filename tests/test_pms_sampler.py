@@ -0,0 +1,36 @@
+"""Tests for the background PMS sampler cache."""
+
+import time
+
+from pms import FakePmsSerial, PmsReader, encode_frame
+from pms_sampler import PmsSampler
+
+
+def _values(n):
+    return (n, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12)
+
+
+def _wait_for(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_sampler_publishes_latest_and_history():
+    ser = FakePmsSerial(b"".join(encode_frame(_values(n)) for n in range(5)))
+    sampler = PmsSampler(PmsReader(ser), history_len=3)
+    seen = []
+    sampler.add_listener(seen.append)
+    assert sampler.latest is None
+    sampler.start()
+    try:
+        assert _wait_for(lambda: len(seen) == 5)
+        ser.write_stream(encode_frame(_values(99)))
+        assert _wait_for(lambda: sampler.latest.seq == 6)
+    finally:
+        sampler.stop()
+    assert not sampler.running
+    assert sampler.latest.frame.pm1_cf1 == 99
+    assert [r.seq for r in sampler.history()] == [4, 5, 6]
+    assert [r.seq for r in sampler.history(since=seen[4].t)] == [6]
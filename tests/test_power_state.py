@@ -0,0 +1,61 @@
+"""Tests for the adaptive machine power-state classifier."""
+
+from ads_sampler import mains_current, synthetic_samples, synthetic_trace
+from power_state import (
+    CONFIRM_ON,
+    OnsetDetector,
+    PowerClassifier,
+    evaluate,
+    load_trace,
+    replay,
+    replay_onset,
+    save_trace,
+)
+
+RUNS = ((5.0, 12.0), (20.0, 21.0))
+
+
+def test_detects_runs_within_bounded_latency():
+    trace = synthetic_trace(mains_current(0.3, on=RUNS, seed=1), 30.0)
+    edges = replay(trace, PowerClassifier("saw"))
+    assert [e.kind for e in edges] == ["on", "off", "on", "off"]
+    ev = evaluate(edges, RUNS)
+    assert ev.missed == 0 and ev.false_on == 0
+    assert max(ev.latencies) <= CONFIRM_ON * 0.1 + 1e-9
+
+
+def test_follows_offset_drift_without_false_triggers():
+    wave = mains_current(0.1, noise_v=0.002, on=RUNS, seed=2)
+    trace = synthetic_trace(lambda t: wave(t) + 0.001 * t, 30.0)
+    clf = PowerClassifier("lathe")
+    ev = evaluate(replay(trace, clf), RUNS)
+    assert ev.missed == 0 and ev.false_on == 0
+    assert 0.02 < clf.baseline < 0.035
+
+
+def test_dead_sensor_is_a_fault_not_idle(tmp_path):
+    trace = synthetic_trace(lambda t: 0.0, 5.0)
+    clf = PowerClassifier("drill")
+    edges = replay(trace, clf)
+    assert [(e.kind, e.detail) for e in edges] == [("fault", "flatline")]
+    assert clf.fault == "flatline" and not clf.on
+    path = str(tmp_path / "trace.npy")
+    save_trace(path, trace)
+    assert load_trace(path) == trace
+
+
+def test_onset_fires_on_start_up_before_confirmed_on():
+    wave = mains_current(0.3, on=RUNS, seed=3, inrush=3.0)
+    times, volts = synthetic_samples(wave, 30.0, 400.0)
+    onsets = replay_onset(times, volts, OnsetDetector("saw", 400.0))
+    ons = [e for e in replay(synthetic_trace(wave, 30.0),
+                             PowerClassifier("saw")) if e.kind == "on"]
+    assert len(onsets) == len(ons) == 2
+    for onset, on, (start, _) in zip(onsets, ons, RUNS):
+        assert start < onset.t < start + 0.05
+        assert onset.t < on.t
+
+
+def test_dc_sensor_on_one_code_is_not_flat_with_flat_v_zero():
+    trace = synthetic_trace(lambda t: 0.5, 5.0)
+    assert replay(trace, PowerClassifier("dc", flat_v=0.0)) == []
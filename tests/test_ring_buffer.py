@@ -0,0 +1,25 @@
+"""Tests for the NumPy ring buffer used by the live plot."""
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+
+def test_view_is_ordered_and_zero_copy():
+    buf = RingBuffer(4, channels=2)
+    assert len(buf) == 0 and buf.max([0]) == 0.0
+    for i in range(6):
+        buf.append(100.0 + i, (i, 10 * i))
+    t, values = buf.view()
+    assert list(t) == [102.0, 103.0, 104.0, 105.0]
+    assert list(values[:, 1]) == [20, 30, 40, 50]
+    assert np.shares_memory(t, buf._t)
+    assert buf.max([0]) == 5.0
+    assert buf.last()[0] == 105.0
+
+
+def test_partial_fill():
+    buf = RingBuffer(10)
+    buf.append(1.0, (7,))
+    t, values = buf.view()
+    assert list(t) == [1.0] and values.shape == (1, 1)
@@ -0,0 +1,62 @@
+"""Tests for incremental rollup tiers and tier selection."""
+
+import math
+
+from rollup import Rollup, history, merge_buckets, pick_tier
+from ts_store import DAY_S, TimeSeriesStore
+
+T0 = 1_750_000_000.0 - 1_750_000_000.0 % DAY_S
+
+
+def test_buckets_emit_min_max_mean_count():
+    out = []
+    r = Rollup("adc", ("t", "ch0", "ch1"), None,
+               lambda name, rec: out.append((name, rec)), tiers=(10,))
+    for i in range(25):
+        r.add((T0 + i, float(i), math.nan))
+    assert [rec[0] - T0 for _, rec in out] == [0, 10]
+    name, (t, count, lo, hi, mean, lo1, hi1, mean1) = out[0]
+    assert name == "adc@10"
+    assert (count, lo, hi, mean) == (10, 0.0, 9.0, 4.5)
+    assert math.isnan(mean1)
+    r.close()
+    assert out[-1][1][1] == 5        # partial last bucket
+
+
+def test_keyed_buckets_and_merge():
+    out = []
+    r = Rollup("temp", ("t", "sensor", "celsius"), "sensor",
+               lambda name, rec: out.append(rec), tiers=(60,))
+    for i in range(60):
+        r.add((T0 + i, i % 2, 20.0 + i % 2))
+    r.close()
+    assert sorted((rec[1], rec[2], rec[5]) for rec in out) == [
+        (0, 30, 20.0), (1, 30, 21.0)]
+    fields = ("t", "sensor", "count", "celsius_min", "celsius_max",
+              "celsius_mean")
+    merged = merge_buckets([(T0, 0, 2, 1.0, 3.0, 2.0),
+                            (T0, 0, 2, 5.0, 5.0, 5.0)], fields)
+    assert merged == [(T0, 0, 4, 1.0, 5.0, 3.5)]
+
+
+def test_pick_tier():
+    assert pick_tier(600) == 0
+    assert pick_tier(3600) == 10
+    assert pick_tier(7 * DAY_S) == 900
+    assert pick_tier(365 * DAY_S) == 3600
+
+
+def test_history_uses_tiers_from_store(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), batch_records=5000)
+    for i in range(4 * 3600):
+        store.append("pms", (T0 + i,) + (i % 60,) * 12)
+    tier, rows = history(store, "pms", "pm25_atm", T0, T0 + 4 * 3600)
+    assert tier == 60
+    assert len(rows) == 239           # last minute is still open
+    assert rows[0][1:] == (0, 59, 29.5)
+    tier, rows = history(store, "pms", "pm25_atm", T0, T0 + 100)
+    assert tier == 0 and len(rows) == 100
+    store.close()
+    tier, rows = history(TimeSeriesStore(str(tmp_path)), "pms",
+                         "pm25_atm", T0, T0 + 4 * 3600)
+    assert len(rows) == 240
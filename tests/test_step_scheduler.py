@@ -0,0 +1,115 @@
+"""Tests for the step-timing thread (fake SPI/latch backend)."""
+
+import asyncio
+import threading
+
+from distributor import Distributor, FakeLatch, FakeSpi
+from motion_service import MotionService
+from step_scheduler import LatenessHistogram, MoveTiming, StepScheduler
+
+ALL_HIGH = (1 << 40) - 1
+OPEN_PIN = 34
+
+
+def _make_scheduler():
+    spi = FakeSpi()
+    dist = Distributor(spi=spi, latch=FakeLatch(spi))
+    steps = StepScheduler(dist, realtime=False)
+    steps.start()
+    return dist, steps
+
+
+def _pulses(history, bitnum):
+    count = 0
+    prev = 0
+    for _, word in history:
+        level = (word >> bitnum) & 1
+        count += level and not prev
+        prev = level
+    return count
+
+
+def test_moves_interleave_and_record_timing():
+    dist, steps = _make_scheduler()
+    try:
+        a = steps.submit(1, 0, [0.001] * 40)
+        b = steps.submit(3, 1, [0.002] * 20)
+        a, b = a.future.result(2.0), b.future.result(2.0)
+    finally:
+        steps.stop()
+    assert a.reason == b.reason == "max_steps"
+    for move in (a, b):
+        bitnum = Distributor.MOTOR_MAP[move.motor]["step"]
+        assert _pulses(dist.latch.history, bitnum) == move.steps
+        assert move.timing.steps == move.steps
+    assert steps.histogram.n == 60
+    assert dist.bits & (1 << Distributor.MOTOR_MAP[1]["en"])   # disabled
+
+
+def test_check_and_cancel_end_moves():
+    dist, steps = _make_scheduler()
+    try:
+        limited = steps.submit(2, 0, (0.0005,),
+                               check=lambda n: "limit" if n >= 15 else None)
+        endless = steps.submit(4, 0, (0.0005,), check=lambda n: None)
+        assert limited.future.result(2.0).steps == 15
+        steps.cancel(endless)
+        assert endless.future.result(2.0).reason == "cancelled"
+    finally:
+        steps.stop()
+    assert dist.bits & (1 << Distributor.MOTOR_MAP[4]["en"])
+
+
+def test_lateness_bins_and_slips():
+    timing = MoveTiming(1)
+    nxt = timing.advance(1.0, 1.000005, 0.001)         # 5 µs: on time
+    assert nxt == 1.001
+    nxt = timing.advance(nxt, nxt + 0.0006, 0.001)     # late, no slip
+    assert timing.late == 1 and timing.slips == 0
+    nxt = timing.advance(nxt, nxt + 0.003, 0.001)      # slipped
+    assert timing.slips == 1
+    h = timing.histogram
+    assert h.as_dict()["<10"] == 1 and h.as_dict()["500-1000"] == 1
+    assert h.as_dict()["2500-5000"] == 1
+    total = LatenessHistogram()
+    total.merge(h)
+    assert total.n == 3 and total.worst_s == h.worst_s
+
+
+def test_motion_service_uses_scheduler():
+    dist, steps = _make_scheduler()
+    word = [ALL_HIGH]
+    svc = MotionService(dist, lambda: word[0], scheduler=steps)
+
+    async def run():
+        task = svc.start_move(1, 0, OPEN_PIN, intervals=(0.001,))
+        await asyncio.sleep(0.03)
+        word[0] &= ~(1 << OPEN_PIN)
+        return await task
+
+    try:
+        result = asyncio.run(run())
+    finally:
+        steps.stop()
+    assert result.reason == "limit" and result.steps > 0
+    assert result.timing.steps == result.steps
+
+
+def test_stop_keeps_thread_until_it_has_exited():
+    dist, steps = _make_scheduler()
+    release = threading.Event()
+    entered = threading.Event()
+
+    def stuck(n):                 # e.g. a hung bus call on the thread
+        entered.set()
+        release.wait(5.0)
+        return "limit"
+
+    move = steps.submit(1, 0, [0.001], check=stuck)
+    assert entered.wait(1.0)
+    assert steps.stop(timeout=0.05) is False
+    assert steps.running            # still owns the Distributor
+    release.set()
+    assert steps.stop() is True
+    assert not steps.running
+    assert move.future.result(1.0).reason in ("limit", "cancelled")
@@ -2,8 +2,8 @@
 # tests/test_stepper8825_real.py
 
 import time
-from src.hardware.stepperactuator8825 import StepperActuator8825
-from src.hardware.switchcontroller import SwitchController
+from hardware.stepperactuator8825 import StepperActuator8825
+from hardware.switchcontroller import SwitchController
 #from your_gpio_mcp_library import MCP23017  # Replace with your actual import
 
 def main():
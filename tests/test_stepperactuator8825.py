@@ -0,0 +1,81 @@
+"""Tests for StepperActuator8825 on the simulated step backend."""
+
+import pytest
+
+from gate_position import PositionTracker
+from hardware.step_backends import SimulatedStepBackend
+from hardware.stepperactuator8825 import StepperActuator8825
+from motion_supervisor import MotionFault
+
+TRAVEL = 50                 # steps between the limits
+OPEN_ID = 1
+CLOSED_ID = 0
+
+
+class GateSwitches:
+    """Limit switches driven by the simulated backend's position."""
+
+    def __init__(self, backend, open_wired=True, closed_wired=True):
+        self.backend = backend
+        self.open_wired = open_wired
+        self.closed_wired = closed_wired
+
+    def read_switch(self, switch_id):
+        pos = self.backend.position
+        if switch_id == CLOSED_ID:
+            return self.closed_wired and pos <= 0
+        return self.open_wired and pos >= TRAVEL
+
+
+def _actuator(start=TRAVEL // 2, tracker=None, **wiring):
+    backend = SimulatedStepBackend()
+    backend.position = start
+    switches = GateSwitches(backend, **wiring)
+    act = StepperActuator8825(
+        7, "test gate", None, 0, 1, 2, OPEN_ID, CLOSED_ID, switches,
+        steps_per_action=100, backend=backend, tracker=tracker,
+    )
+    return act, backend
+
+
+def test_homes_to_closed_from_anywhere():
+    act, backend = _actuator(start=30)
+    assert act.position == "closed"
+    assert backend.position == 0 and backend.steps_issued == 30
+    assert not backend.enabled
+
+
+def test_open_close_and_learned_travel():
+    tracker = PositionTracker()
+    act, backend = _actuator(tracker=tracker)
+    assert act.fraction_open is None         # travel not measured yet
+    act.open()
+    assert act.position == "open" and backend.position == TRAVEL
+    assert act.fraction_open == 1.0
+    act.close()
+    assert act.position == "closed" and backend.position == 0
+    assert act.fraction_open == 0.0
+    for _ in range(2):
+        act.open()
+        act.close()
+    sup = act.supervisor
+    assert sup.travel_steps(7, 1) == TRAVEL
+    assert sup.travel_steps(7, 0) == TRAVEL
+    assert sup.budget(7, 1)[0] == TRAVEL * 3 // 2   # BUDGET_MARGIN
+
+
+def test_missing_open_limit_raises_motion_fault():
+    tracker = PositionTracker()
+    act, backend = _actuator(tracker=tracker, open_wired=False)
+    with pytest.raises(MotionFault) as exc:
+        act.open()
+    assert exc.value.event.kind == "step_budget"
+    assert backend.steps_issued - TRAVEL // 2 == 100  # steps_per_action
+    assert act.position == "unknown" and not backend.enabled
+    assert act.fraction_open is None                  # steps may be lost
+    assert act.supervisor.events[-1].kind == "step_budget"
+
+
+def test_missing_closed_limit_fails_homing():
+    with pytest.raises(MotionFault):
+        _actuator(closed_wired=False)
@@ -0,0 +1,117 @@
+"""Tests for SwitchController against the fake SMBus."""
+
+import time
+
+import pytest
+
+from fake_smbus import FakeSMBus
+from hardware import switchcontroller
+from hardware.switchcontroller import GPIOA, SwitchController
+
+
+def _make():
+    bus = FakeSMBus()
+    bus.write_i2c_block_data(0x20, GPIOA, [0xFF, 0xFF])
+    sc = SwitchController(bus=bus, debounce_time=0.01)
+    bus.reset_counts()
+    return bus, sc
+
+
+def test_one_transaction_per_sample():
+    bus, sc = _make()
+    for _ in range(10):
+        sc.read_all()
+    assert bus.transactions == 10
+    assert bus.calls["read_i2c_block_data"] == 10
+
+
+def test_config_registers_are_cached():
+    bus, sc = _make()
+    sc._write_pair(0x00, 0xFFFF)
+    sc._write_pair(0x0C, 0xFFFF)
+    assert bus.transactions == 0
+    sc.enable_interrupts()
+    writes = bus.transactions
+    sc.enable_interrupts()
+    assert bus.transactions - writes == 1  # only the clearing read
+
+
+def test_timed_debounce_does_not_sleep():
+    bus, sc = _make()
+    bus.write_byte_data(0x20, GPIOA + 1, 0xFE)  # switch 8 pressed
+    t0 = time.monotonic()
+    assert not sc.read_switch(8)
+    assert time.monotonic() - t0 < 0.005
+    time.sleep(0.012)
+    assert sc.read_switch(8)
+
+
+class FakeClock:
+    """Stands in for the time module inside switchcontroller."""
+
+    def __init__(self, on_sleep=None):
+        self.now = 100.0
+        self.on_sleep = on_sleep
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, s):
+        self.now += s
+        if self.on_sleep is not None:
+            self.on_sleep()
+
+
+def _clocked(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(switchcontroller, "time", clock)
+    bus = FakeSMBus()
+    bus.write_i2c_block_data(0x20, GPIOA, [0xFF, 0xFF])
+    sc = SwitchController(bus=bus, debounce_time=0.02, **kwargs)
+    return bus, sc, clock
+
+
+def test_timed_debounce_rejects_a_glitch(monkeypatch):
+    bus, sc, clock = _clocked(monkeypatch)
+    bus.write_byte_data(0x20, GPIOA, 0xFB)      # switch 2 bounces low
+    assert sc.read_all() == 0xFFFF
+    clock.now += 0.015
+    bus.write_byte_data(0x20, GPIOA, 0xFF)      # ... and back before 20 ms
+    assert sc.read_all() == 0xFFFF
+    clock.now += 0.015                          # 30 ms after the glitch
+    assert sc.read_all() == 0xFFFF
+    assert not sc.read_switch(2)
+
+
+def test_timed_debounce_accepts_a_held_level(monkeypatch):
+    bus, sc, clock = _clocked(monkeypatch)
+    bus.write_byte_data(0x20, GPIOA, 0xFB)
+    sc.read_all()
+    clock.now += 0.01
+    bus.write_byte_data(0x20, GPIOA, 0xFF)      # bounce restarts the timer
+    sc.read_all()
+    bus.write_byte_data(0x20, GPIOA, 0xFB)
+    sc.read_all()
+    clock.now += 0.019
+    assert not sc.read_switch(2)
+    clock.now += 0.002
+    assert sc.read_switch(2)
+
+
+def test_sleep_debounce_rejects_a_glitch(monkeypatch):
+    bus, sc, clock = _clocked(monkeypatch, debounce_mode="sleep")
+    bus.write_byte_data(0x20, GPIOA, 0xFB)
+    clock.on_sleep = lambda: bus.write_byte_data(0x20, GPIOA, 0xFF)
+    assert sc.read_all() == 0xFFFF
+    bus.write_byte_data(0x20, GPIOA, 0xFB)
+    clock.on_sleep = None                       # still low after the wait
+    assert sc.read_all() == 0xFFFB
+
+
+def test_stable_state_primed_from_first_read():
+    bus = FakeSMBus()
+    bus.write_i2c_block_data(0x20, GPIOA, [0xFF, 0x7F])   # switch 15 held
+    sc = SwitchController(bus=bus)
+    assert sc.read_switch(15) and not sc.read_switch(14)
+    with pytest.raises(ValueError):
+        SwitchController(bus=bus, debounce_mode="bogus")
@@ -0,0 +1,93 @@
+"""Tests for the append-only time-series store."""
+
+import json
+import math
+import os
+import time
+
+import pytest
+
+from ts_store import DAY_S, TimeSeriesStore
+
+T0 = 1_750_000_000.0 - 1_750_000_000.0 % DAY_S   # a UTC midnight
+
+
+def test_batched_writes_and_daily_segments(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), batch_records=100)
+    for i in range(250):
+        store.append("adc", (T0 - 50 + i, i * 0.01, 0.0, 0.0, math.nan))
+    # Two full batches on disk, 50 records still buffered
+    segments = store.segments("adc")
+    assert sum(seg[2] for seg in segments.values()) == 200
+    assert len(segments) == 2            # crossed UTC midnight
+    rows = list(store.query("adc"))
+    assert len(rows) == 250
+    assert [r[0] for r in rows] == sorted(r[0] for r in rows)
+    store.close()
+    size = os.path.getsize(tmp_path / "adc" / "20250615.bin")
+    assert size == 200 * 24
+
+
+def test_any_append_flushes_other_stale_series(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), flush_interval_s=0.05,
+                            rollups=False)
+    store.append("gate", (T0, 1, 0, 0, 0.0))
+    store.append("adc", (T0, 0.1, 0.0, 0.0, math.nan))
+    assert store.segments("gate") == {}
+    time.sleep(0.06)
+    store.append("adc", (T0 + 1, 0.1, 0.0, 0.0, math.nan))
+    assert sum(seg[2] for seg in store.segments("gate").values()) == 1
+    store.close()
+
+
+def test_query_range_uses_bisect_and_reopens(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), batch_records=1000)
+    for i in range(3 * 3600):
+        store.append("pms", (T0 + i,) + (i % 100,) * 12)
+    store.close()
+    reader = TimeSeriesStore(str(tmp_path))
+    rows = list(reader.query("pms", T0 + 1000, T0 + 1010))
+    assert [r[0] - T0 for r in rows] == list(range(1000, 1010))
+    assert rows[0][5] == 0               # pm25_atm of record 1000
+
+
+def test_labels_persist(tmp_path):
+    store = TimeSeriesStore(str(tmp_path))
+    a = store.label_id("temp", "28-0000aaaa")
+    b = store.label_id("temp", "28-0000bbbb")
+    assert (a, b) == (0, 1)
+    store.append("temp", (T0, b, 21.5))
+    store.close()
+    again = TimeSeriesStore(str(tmp_path))
+    assert again.label_id("temp", "28-0000bbbb") == 1
+    assert list(again.query("temp")) == [(T0, 1, 21.5)]
+
+
+def test_unknown_series(tmp_path):
+    with pytest.raises(KeyError):
+        TimeSeriesStore(str(tmp_path)).append("nope", (T0,))
+
+
+def test_torn_record_and_stale_index_repaired_on_first_write(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), rollups=False)
+    for i in range(10):
+        store.append("adc", (T0 + i, i * 0.1, 0.0, 0.0, 0.0))
+    store.close()
+    seg_path = tmp_path / "adc" / "20250615.bin"
+    index_path = tmp_path / "adc" / "index.json"
+    # Crash after the data write but before the index update, then a
+    # power cut in the middle of the next record
+    index = json.loads(index_path.read_text())
+    index["segments"]["20250615"] = [T0, T0 + 7, 8]
+    index_path.write_text(json.dumps(index))
+    with open(seg_path, "ab") as f:
+        f.write(b"\x00" * 5)
+
+    store = TimeSeriesStore(str(tmp_path), rollups=False)
+    store.append("adc", (T0 + 10, 1.0, 0.0, 0.0, 0.0))
+    store.flush()
+    assert os.path.getsize(seg_path) == 11 * 24
+    assert store.segments("adc")["20250615"] == [T0, T0 + 10, 11]
+    rows = list(store.query("adc"))
+    assert [r[0] for r in rows] == [T0 + i for i in range(11)]
+    assert rows[-1][1] == 1.0